@@ -9,6 +9,44 @@ class Settings:
     NVIDIA_API_KEY: str = os.getenv("NVIDIA_API_KEY")
     LLM_API_KEY: str = os.getenv("LLM_API_KEY")
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    MAX_UPLOAD_MB: int = int(os.getenv("MAX_UPLOAD_MB", "500"))
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "nvidia/nv-embedqa-e5-v5")
+    # Optional OpenAI-compatible endpoint (e.g. a self-hosted NIM or tools/embedding_server.py)
+    EMBEDDING_BASE_URL: str = os.getenv("EMBEDDING_BASE_URL")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "50"))
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+    # Template sections generated at once (concurrent LLM requests per document)
+    GENERATION_MAX_CONCURRENCY: int = int(os.getenv("GENERATION_MAX_CONCURRENCY", "4"))
+    # Streaming generation: keep-alive interval and how long finished runs stay resumable
+    GENERATION_HEARTBEAT_SECONDS: float = float(os.getenv("GENERATION_HEARTBEAT_SECONDS", "15"))
+    GENERATION_RUN_RETENTION_MINUTES: int = int(os.getenv("GENERATION_RUN_RETENTION_MINUTES", "60"))
+    RAG_INDEX_MEMORY_BUDGET_MB: int = int(os.getenv("RAG_INDEX_MEMORY_BUDGET_MB", "1024"))
+    RAG_PARSE_WORKERS: int = int(os.getenv("RAG_PARSE_WORKERS", "0"))  # 0 = one per CPU core
+    # "auto" picks exact search, HNSW or IVF-PQ by corpus size; or force "flat", "hnsw", "ivfpq"
+    RAG_INDEX_BACKEND: str = os.getenv("RAG_INDEX_BACKEND", "auto")
+    RAG_HNSW_MIN_VECTORS: int = int(os.getenv("RAG_HNSW_MIN_VECTORS", "20000"))
+    RAG_IVFPQ_MIN_VECTORS: int = int(os.getenv("RAG_IVFPQ_MIN_VECTORS", "500000"))
+    # Fuse BM25 keyword ranking with vector search (exact batch, CAS and method identifiers)
+    RAG_HYBRID_SEARCH: bool = os.getenv("RAG_HYBRID_SEARCH", "true").lower() == "true"
+    # Reranking: MMR trade-off (1 = relevance only, lower = more diverse) and the
+    # similarity bonus for BM25 matches, which embeddings tend to underrate
+    RAG_MMR_LAMBDA: float = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+    RAG_KEYWORD_BOOST: float = float(os.getenv("RAG_KEYWORD_BOOST", "0.05"))
+    # Adaptive k: retrieval stops returning chunks once cosine similarity falls
+    # below RAG_MIN_SCORE or more than RAG_SCORE_FALLOFF below the best match
+    RAG_ADAPTIVE_K: bool = os.getenv("RAG_ADAPTIVE_K", "true").lower() == "true"
+    RAG_MIN_SCORE: float = float(os.getenv("RAG_MIN_SCORE", "0.2"))
+    RAG_SCORE_FALLOFF: float = float(os.getenv("RAG_SCORE_FALLOFF", "0.15"))
+    RAG_MIN_RESULTS: int = int(os.getenv("RAG_MIN_RESULTS", "1"))
+    # Near-duplicate chunks (repeated headers, spec tables, copied sections) are
+    # embedded once when their word shingles overlap at least this much (Jaccard)
+    RAG_DEDUP: bool = os.getenv("RAG_DEDUP", "true").lower() == "true"
+    RAG_DEDUP_THRESHOLD: float = float(os.getenv("RAG_DEDUP_THRESHOLD", "0.9"))
+    RAG_QUERY_CACHE_SIZE: int = int(os.getenv("RAG_QUERY_CACHE_SIZE", "4096"))  # query embeddings, process-wide
+    RAG_RESULT_CACHE_SIZE: int = int(os.getenv("RAG_RESULT_CACHE_SIZE", "1024"))  # search results, per index
+    RAG_CHUNK_COMPRESSION: str = os.getenv("RAG_CHUNK_COMPRESSION", "none")  # "zstd" needs the zstandard package
+    RAG_CACHE_DIR: str = os.getenv("RAG_CACHE_DIR", os.path.join("persistent_uploads", ".cache"))
 
 
 settings = Settings()
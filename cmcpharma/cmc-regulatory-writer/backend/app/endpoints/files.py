@@ -1,7 +1,16 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from ..services.file_manager import FileManager
-from ..models.file import FileItem
+from ..services.embedding_cache import get_embedding_cache
+from ..services.file_manager import FileManager, FileTooLargeError
+from ..services.ingestion_service import ingestion_service
+from ..services.query_cache import query_embedding_cache, retrieval_result_stats
+from ..services.rag_registry import ALL_UPLOADS_SCOPE, rag_registry
+from ..services.text_cache import get_page_cache
+from ..models.file import (
+    CacheMetrics, FileItem, IngestionStatus, RetrievalCacheStats, SessionIngestionStatus,
+    UploadError, UploadManifest, UploadRecord
+)
 from typing import List
+import asyncio
 
 router = APIRouter()
 
@@ -11,10 +20,36 @@ async def upload_vendor_document(session_id: str, file: UploadFile = File(...)):
     try:
         file_manager = FileManager(session_id=session_id)
         saved_file = await file_manager.save_file(file)
+        # Parse, chunk, embed and index in the background while the user sets up the template
+        ingestion_service.enqueue(session_id, saved_file.name)
         return saved_file
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
 
+@router.post("/upload-batch/{session_id}", response_model=UploadManifest)
+async def upload_vendor_documents(session_id: str, files: List[UploadFile] = File(...)):
+    """Uploads several source documents to a session concurrently and returns a manifest."""
+    file_manager = FileManager(session_id=session_id)
+    results = await asyncio.gather(
+        *(file_manager.save_file(file) for file in files),
+        return_exceptions=True
+    )
+    
+    manifest = UploadManifest(session_id=session_id)
+    for file, result in zip(files, results):
+        if isinstance(result, Exception):
+            manifest.errors.append(UploadError(name=file.filename, detail=str(result)))
+            continue
+        manifest.files.append(result)
+        manifest.total_bytes += result.size
+        ingestion_service.enqueue(session_id, result.name)
+    
+    if not manifest.files and manifest.errors:
+        raise HTTPException(status_code=400, detail=manifest.model_dump())
+    return manifest
+
 @router.get("/session/{session_id}", response_model=List[FileItem])
 async def list_session_files(session_id: str):
     """Lists all files uploaded to a specific session."""
@@ -24,3 +59,68 @@ async def list_session_files(session_id: str):
         return files
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not list files: {e}")
+
+@router.delete("/{session_id}/{file_name}")
+async def delete_session_file(session_id: str, file_name: str):
+    """Deletes an upload from a session along with its manifest entry."""
+    if not FileManager(session_id).delete_file(file_name):
+        raise HTTPException(status_code=404, detail=f"File '{file_name}' not found in session '{session_id}'")
+    # Indexes holding the file can't drop it; they go once their current users are done
+    rag_registry.invalidate(session_id)
+    rag_registry.invalidate(ALL_UPLOADS_SCOPE)
+    return {"message": "File deleted successfully"}
+
+@router.get("/manifest/{session_id}", response_model=List[UploadRecord])
+async def get_upload_manifest(session_id: str):
+    """Lists a session's uploads with hashes, page/chunk counts and index state."""
+    return FileManager(session_id).get_upload_records()
+
+@router.get("/cache-stats", response_model=RetrievalCacheStats)
+async def get_retrieval_cache_stats():
+    """Reports hit rates of the chunk-embedding, query-embedding, page-text, retrieval-result and index caches."""
+    registry_stats = rag_registry.stats
+    registry_lookups = registry_stats.hits + registry_stats.misses
+    chunk_stats = get_embedding_cache().stats
+    page_stats = get_page_cache().stats
+    return RetrievalCacheStats(
+        chunk_embeddings=CacheMetrics(
+            hits=chunk_stats.hits,
+            misses=chunk_stats.misses,
+            hit_rate=chunk_stats.hit_rate
+        ),
+        query_embeddings=CacheMetrics(
+            hits=query_embedding_cache.stats.hits,
+            misses=query_embedding_cache.stats.misses,
+            hit_rate=query_embedding_cache.stats.hit_rate,
+            size=len(query_embedding_cache)
+        ),
+        page_text=CacheMetrics(
+            hits=page_stats.hits,
+            misses=page_stats.misses,
+            hit_rate=page_stats.hit_rate
+        ),
+        retrieval_results=CacheMetrics(
+            hits=retrieval_result_stats.hits,
+            misses=retrieval_result_stats.misses,
+            hit_rate=retrieval_result_stats.hit_rate
+        ),
+        index_registry=CacheMetrics(
+            hits=registry_stats.hits,
+            misses=registry_stats.misses,
+            hit_rate=registry_stats.hits / registry_lookups if registry_lookups else 0.0,
+            size=len(rag_registry)
+        )
+    )
+
+@router.get("/status/{session_id}", response_model=SessionIngestionStatus)
+async def get_session_ingestion_status(session_id: str):
+    """Reports background ingestion progress for every file in a session."""
+    return ingestion_service.get_session_status(session_id)
+
+@router.get("/status/{session_id}/{file_name}", response_model=IngestionStatus)
+async def get_file_ingestion_status(session_id: str, file_name: str):
+    """Reports background ingestion progress for a single uploaded file."""
+    status = ingestion_service.get_file_status(session_id, file_name)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"File '{file_name}' not found in session '{session_id}'")
+    return status
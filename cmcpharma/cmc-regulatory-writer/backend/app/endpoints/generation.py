@@ -1,18 +1,80 @@
-from fastapi import APIRouter, Body, HTTPException
-from ..models.document import GeneratedDocument, GeneratedSection, RefinementRequest
+from fastapi import APIRouter, Body, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from ..models.document import GeneratedDocument, GenerationJobStatus, RefinementRequest
 from ..models.template import Template
-from ..services.rag_service import RAGService
 from ..services.generation_service import GenerationService
+from ..services.generation_runs import GenerationRun, generate_full_document, generation_runs
 from ..services.file_manager import FileManager
-from ..core.config import settings
-from datetime import datetime
-import asyncio
+from typing import Optional
 
 router = APIRouter()
 
 @router.post("/generate/{session_id}", response_model=GeneratedDocument)
 async def generate_document(session_id: str, template: Template = Body(...)):
     """Generates a full regulatory document based on a template and uploaded files."""
+    _require_session_files(session_id)
+    try:
+        return await generate_full_document(session_id, template)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Generation failed: {e}")
+
+@router.post("/generate/{session_id}/stream")
+async def stream_document(session_id: str, template: Template = Body(...)):
+    """
+    Generates a document in the background and streams its progress as server-sent events:
+    run-started (with the run_id to resume from), section-started, token-delta,
+    section-completed, citations-updated, then document-completed or error.
+    """
+    _require_session_files(session_id)
+    run = generation_runs.start(session_id, template)
+    return _event_stream(run, 0)
+
+@router.get("/runs/{run_id}/events")
+async def resume_document_stream(run_id: str, last_event_id: Optional[int] = None,
+                                 last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """Reconnect to a generation run's event stream; only events after Last-Event-ID are sent"""
+    run = _get_run(run_id)
+    if last_event_id is None:
+        try:
+            last_event_id = int(last_event_id_header) if last_event_id_header else 0
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID must be an event id from this stream")
+    return _event_stream(run, last_event_id)
+
+@router.post("/jobs/{session_id}", response_model=GenerationJobStatus, status_code=202)
+async def submit_generation_job(session_id: str, template: Template = Body(...)):
+    """Start generating a document in the background; poll the returned job_id for progress and the result"""
+    _require_session_files(session_id)
+    return generation_runs.start(session_id, template).job_status()
+
+@router.get("/jobs/{job_id}", response_model=GenerationJobStatus)
+async def get_generation_job(job_id: str):
+    """Job status with per-section progress and timings"""
+    return _get_run(job_id).job_status()
+
+@router.post("/jobs/{job_id}/cancel", response_model=GenerationJobStatus)
+async def cancel_generation_job(job_id: str):
+    """Cancel a running job, stopping its outstanding LLM calls"""
+    run = await generation_runs.cancel(_get_run(job_id))
+    return run.job_status()
+
+@router.get("/jobs/{job_id}/result", response_model=GeneratedDocument)
+async def get_generation_job_result(job_id: str):
+    """The generated document of a completed job"""
+    run = _get_run(job_id)
+    if run.status == "running":
+        raise HTTPException(status_code=409, detail=f"Generation job '{job_id}' is still running")
+    if run.document is None:
+        raise HTTPException(status_code=409, detail=f"Generation job '{job_id}' {run.status}: {run.error or 'no document was produced'}")
+    return run.document
+
+def _get_run(run_id: str) -> GenerationRun:
+    run = generation_runs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Generation job '{run_id}' not found")
+    return run
+
+def _require_session_files(session_id: str) -> None:
     file_manager = FileManager(session_id)
     file_paths = file_manager.get_session_file_paths()
     
@@ -25,105 +87,17 @@ async def generate_document(session_id: str, template: Template = Body(...)):
         print(f"❌ No files found in session {session_id}")
         raise HTTPException(status_code=400, detail=f"No source files found for session '{session_id}'. Please upload files first.")
 
-    try:
-        rag_service = RAGService(file_paths=file_paths)
-        generation_service = GenerationService()
-        
-        # Flatten TOC to get all sections (including nested ones)
-        def flatten_toc(toc_items):
-            flat_items = []
-            for item in toc_items:
-                flat_items.append(item)
-                if hasattr(item, 'children') and item.children:
-                    flat_items.extend(flatten_toc(item.children))
-            return flat_items
-        
-        all_sections = flatten_toc(template.toc)
-        print(f"Generating {len(all_sections)} sections from template: {[item.title for item in all_sections]}")
-        
-        # Generate sections sequentially to ensure proper content distribution
-        generated_sections = []
-        document_id = f"{session_id}-document"  # Create a document-level ID for citation tracking
-        
-        for i, toc_item in enumerate(all_sections):
-            print(f"Generating section {i+1}/{len(all_sections)}: {toc_item.title}")
-            section = await generation_service.synthesize_section(
-                toc_item.title, 
-                rag_service, 
-                session_id=session_id,
-                document_id=document_id  # Pass document ID to track citations across sections
-            )
-            generated_sections.append(section)
-        
-        # Check if any section is already titled "References" - if so, don't add another one
-        existing_references_section = any(
-            section.title.lower().strip() == "references" 
-            for section in generated_sections
-        )
-        
-        # Generate References section automatically only if:
-        # 1. There are citations to reference
-        # 2. No section is already titled "References"
-        references_content = generation_service.generate_references_section(document_id)
-        
-        if references_content and not existing_references_section:
-            references_section = GeneratedSection(
-                title="References",
-                content=references_content,
-                source_count=0  # References don't have their own sources
-            )
-            generated_sections.append(references_section)
-            print(f"📖 Added document-level References section with {len(references_content)} characters")
-        elif existing_references_section:
-            print(f"📖 References section already exists in template - skipping auto-generation")
-        elif not references_content:
-            print(f"📖 No citations found - skipping References section generation")
-        
-        print(f"Generated document with {len(generated_sections)} sections (including References)")
-        
-        # Get citations from the citation tracker
-        print(f"🔍 Looking for citations in registry for document_id: {document_id}")
-        citations_registry = generation_service.citation_tracker.get_registry(document_id)
-        citations_data = []
-        
-        print(f"🔍 Citations registry found: {citations_registry is not None}")
-        if citations_registry:
-            print(f"🔍 Number of inline citations in registry: {len(citations_registry.inline_citations)}")
-        
-        if citations_registry and citations_registry.inline_citations:
-            print(f"🔗 Processing {len(citations_registry.inline_citations)} citations for response")
-            for inline_citation in citations_registry.inline_citations:
-                citation_data = {
-                    "id": inline_citation.citation_number,
-                    "citation_number": inline_citation.citation_number,
-                    "text": inline_citation.chunk_citation.text_excerpt,
-                    "source": inline_citation.chunk_citation.pdf_name,
-                    "page": inline_citation.chunk_citation.page_number,
-                    "hover_content": f"{inline_citation.chunk_citation.text_excerpt[:100]}... - {inline_citation.chunk_citation.pdf_name}, p. {inline_citation.chunk_citation.page_number}",
-                    "chunk_citation": {
-                        "chunk_id": inline_citation.chunk_citation.chunk_id,
-                        "pdf_name": inline_citation.chunk_citation.pdf_name,
-                        "page_number": inline_citation.chunk_citation.page_number,
-                        "text_excerpt": inline_citation.chunk_citation.text_excerpt,
-                        "authors": inline_citation.chunk_citation.authors or [],
-                        "external_link": inline_citation.chunk_citation.external_link
-                    }
-                }
-                citations_data.append(citation_data)
-        
-        print(f"Returning {len(citations_data)} citations with the document")
-        
-        doc = GeneratedDocument(
-            title=template.name,
-            template_id=template.id,
-            session_id=session_id,
-            sections=generated_sections,  # Return all sections separately including References
-            citations=citations_data  # Include actual citations from uploaded documents
-        )
-        return doc
+def _event_stream(run: GenerationRun, last_event_id: int) -> StreamingResponse:
+    async def events():
+        # Disconnecting only ends this stream; the run carries on for a later resume
+        async for event in run.stream(last_event_id):
+            yield event.to_sse() if event is not None else ": heartbeat\n\n"
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Generation failed: {e}")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/refine", response_model=dict)
 async def refine_section(request: RefinementRequest = Body(...)):
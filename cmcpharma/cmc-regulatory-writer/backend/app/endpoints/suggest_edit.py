@@ -2,8 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
 import logging
+import os
 from ..services.generation_service import GenerationService
-from ..services.rag_service import RAGService
+from ..services.file_manager import FileManager
+from ..services.rag_registry import rag_registry, ALL_UPLOADS_SCOPE
+from ..services.blob_store import unique_files
 from ..core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -125,37 +128,55 @@ Provide a simplified version that:
 async def get_generation_service():
     return generation_service
 
-async def get_rag_service():
-    """Get RAG service with all available documents"""
-    import os
-    upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "persistent_uploads")
+def get_all_document_files(upload_dir: str):
+    """Get all document files from the persistent uploads directory"""
+    document_files = []
+    supported_extensions = ['.txt', '.pdf', '.doc', '.docx', '.md']
     
-    def get_all_document_files(upload_dir: str):
-        """Get all document files from the persistent uploads directory"""
-        document_files = []
-        supported_extensions = ['.txt', '.pdf', '.doc', '.docx', '.md']
+    try:
+        if os.path.exists(upload_dir):
+            for root, dirs, files in os.walk(upload_dir):
+                # Hidden directories hold the blob store, caches and index snapshots
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    file_extension = os.path.splitext(file)[1].lower()
+                    if file_extension in supported_extensions:
+                        document_files.append(file_path)
+    except Exception as e:
+        print(f"Error scanning documents: {e}")
         
-        try:
-            if os.path.exists(upload_dir):
-                for root, dirs, files in os.walk(upload_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        file_extension = os.path.splitext(file)[1].lower()
-                        if file_extension in supported_extensions:
-                            document_files.append(file_path)
-        except Exception as e:
-            print(f"Error scanning documents: {e}")
-            
-        return document_files
+    # The same upload linked into several sessions is indexed once
+    return unique_files(document_files)
+
+async def retrieve_rag_context(session_id: str, query: str, top_k: int = 3):
+    """Retrieve context from the session's warm RAG index (all uploads if the session has none)"""
+    file_manager = FileManager(session_id)
+    scope = session_id
+    index_dir = file_manager.index_dir
+    version = file_manager.manifest_version
+    file_paths = file_manager.get_session_file_paths()
+    if not file_paths:
+        upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "persistent_uploads")
+        scope = ALL_UPLOADS_SCOPE
+        index_dir = None
+        version = None
+        file_paths = get_all_document_files(upload_dir)
+    if not file_paths:
+        return []
     
-    available_files = get_all_document_files(upload_dir)
-    return RAGService(file_paths=available_files)
+    # Don't block edits on ingestion; a partial index still gives useful context
+    async with rag_registry.lease(scope, file_paths, index_dir, version, wait=False) as rag_service:
+        return await rag_service.retrieve_relevant_content(
+            query=query,
+            file_paths=[],
+            top_k=top_k
+        )
 
 @router.post("/suggest-edit", response_model=SuggestEditResponse)
 async def suggest_edit(
     request: SuggestEditRequest,
-    gen_service: GenerationService = Depends(get_generation_service),
-    rag_service: RAGService = Depends(get_rag_service)
+    gen_service: GenerationService = Depends(get_generation_service)
 ):
     """
     Generate suggested edits for content based on presets or custom instructions
@@ -172,9 +193,9 @@ async def suggest_edit(
             rag_context = ""
             if request.use_rag and request.preset == "expand_detail":
                 try:
-                    relevant_docs = await rag_service.retrieve_relevant_content(
+                    relevant_docs = await retrieve_rag_context(
+                        request.session_id,
                         query=request.content[:200],  # Use first 200 chars as query
-                        file_paths=[],
                         top_k=3
                     )
                     
@@ -201,9 +222,9 @@ Use this additional information to enhance the content:"""
             rag_context = ""
             if request.use_rag:
                 try:
-                    relevant_docs = await rag_service.retrieve_relevant_content(
+                    relevant_docs = await retrieve_rag_context(
+                        request.session_id,
                         query=request.custom_instructions + " " + request.content[:100],
-                        file_paths=[],
                         top_k=3
                     )
                     
@@ -100,6 +100,13 @@ class DocumentCitationRegistry(BaseModel):
         print(f"📋 Created new citation [{self.citation_counter}] for {chunk_citation.pdf_name}, p. {chunk_citation.page_number}")
         return inline_citation
     
+    def merge(self, other: "DocumentCitationRegistry") -> Dict[int, int]:
+        """Add another registry's citations in its order; returns its citation numbers mapped to numbers in this registry"""
+        return {
+            inline_cite.citation_number: self.add_citation(inline_cite.chunk_citation).citation_number
+            for inline_cite in other.inline_citations
+        }
+    
     def _generate_hover_content(self, citation: ChunkCitation) -> str:
         """Generate hover tooltip content with PDF name and page number"""
         parts = []
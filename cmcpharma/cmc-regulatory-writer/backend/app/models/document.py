@@ -18,6 +18,27 @@ class GeneratedDocument(BaseModel):
     generated_at: datetime = Field(default_factory=datetime.now)
     citations: Optional[List[Dict[str, Any]]] = []
 
+class SectionProgress(BaseModel):
+    index: int
+    title: str
+    status: str = "pending"  # pending, running, completed
+    characters: int = 0  # generated so far
+    started_at: Optional[datetime] = None
+    seconds: Optional[float] = None  # generation time once completed
+
+class GenerationJobStatus(BaseModel):
+    job_id: str
+    session_id: str
+    title: str
+    status: str  # running, completed, failed, cancelled
+    sections_total: int
+    sections_completed: int
+    sections: List[SectionProgress]
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: float
+
 class RefinementRequest(BaseModel):
     section_title: str
     current_content: str
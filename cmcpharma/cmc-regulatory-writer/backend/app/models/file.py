@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Optional
 import uuid
 
 class FileItem(BaseModel):
@@ -8,3 +9,57 @@ class FileItem(BaseModel):
     size: int
     mime_type: str
     path: str # Relative path in storage for the session
+    sha256: Optional[str] = None # Content hash, computed while the upload streams to disk
+
+class UploadRecord(BaseModel):
+    """Cached metadata and ingestion state for one upload, kept in the session manifest"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    sha256: Optional[str] = None
+    size: int
+    mime_type: str
+    page_count: Optional[int] = None
+    chunk_count: Optional[int] = None
+    duplicate_chunk_count: Optional[int] = None  # chunks stored once under an earlier identical or near-identical chunk
+    parse_seconds: Optional[float] = None
+    index_state: str = "pending"  # pending, indexing, indexed, failed
+    uploaded_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+class UploadError(BaseModel):
+    name: str
+    detail: str
+
+class UploadManifest(BaseModel):
+    session_id: str
+    files: List[FileItem] = []
+    errors: List[UploadError] = []
+    total_bytes: int = 0
+
+class IngestionStatus(BaseModel):
+    file_name: str
+    status: str = "queued"  # queued, running, ready, failed, not_queued
+    error: Optional[str] = None
+    queued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    pages_done: Optional[int] = None  # pages parsed and chunked so far while running
+    page_count: Optional[int] = None  # total pages, when known up front (PDFs)
+
+class SessionIngestionStatus(BaseModel):
+    session_id: str
+    status: str  # idle, ingesting, ready, failed
+    files: List[IngestionStatus] = []
+
+class CacheMetrics(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    size: Optional[int] = None  # entries held, for process-wide caches
+
+class RetrievalCacheStats(BaseModel):
+    chunk_embeddings: CacheMetrics
+    query_embeddings: CacheMetrics
+    page_text: CacheMetrics
+    retrieval_results: CacheMetrics
+    index_registry: CacheMetrics
@@ -0,0 +1,106 @@
+"""
+Content-addressed store for uploads shared by every session.
+
+Each distinct file is kept once under persistent_uploads/.blobs/<aa>/<sha256><ext>
+and hardlinked into the sessions that uploaded it, so the same guideline or CoA
+uploaded into many sessions costs one copy on disk and hashes to the same
+content everywhere (embedding and parse caches are keyed by content).
+"""
+import os
+import shutil
+import uuid
+from typing import List, Optional, Set, Tuple
+
+BLOB_DIR_NAME = ".blobs"
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def blob_path(self, sha256: str, filename: str) -> str:
+        """Blobs keep the upload's extension so loaders can pick a parser by suffix"""
+        ext = os.path.splitext(filename)[1].lower()
+        return os.path.join(self.root, sha256[:2], f"{sha256}{ext}")
+
+    def temp_path(self) -> str:
+        """Scratch file on the same filesystem as the blobs, for streaming an upload"""
+        return os.path.join(self.root, f".{uuid.uuid4().hex}.part")
+
+    def put(self, temp_path: str, sha256: str, filename: str) -> Tuple[str, bool]:
+        """
+        Move a fully written temp file into the store.
+        Returns the blob path and whether the content was new.
+        """
+        path = self.blob_path(sha256, filename)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return path, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return path, True
+
+    def adopt(self, file_path: str, sha256: str) -> str:
+        """Bring an existing session file into the store, sharing an existing blob if there is one"""
+        path = self.blob_path(sha256, file_path)
+        if os.path.exists(path):
+            if not os.path.samefile(path, file_path):
+                self.link_into(path, file_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.link(file_path, path)
+            except OSError:
+                shutil.copy2(file_path, path)
+        return path
+
+    def link_into(self, blob_path: str, dest_path: str) -> None:
+        """Atomically place the blob at dest_path, replacing any previous file"""
+        temp_dest = os.path.join(os.path.dirname(dest_path), f".{os.path.basename(dest_path)}.{uuid.uuid4().hex}.part")
+        try:
+            os.link(blob_path, temp_dest)
+        except OSError:
+            # Different filesystem or no hardlink support: fall back to a private copy
+            shutil.copy2(blob_path, temp_dest)
+        os.replace(temp_dest, dest_path)
+
+    def release(self, sha256: str, filename: str) -> bool:
+        """Delete a blob once no session links to it any more"""
+        path = self.blob_path(sha256, filename)
+        try:
+            if os.stat(path).st_nlink > 1:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        print(f"🧹 Removed unreferenced upload blob {os.path.basename(path)}")
+        return True
+
+
+def unique_files(file_paths: List[str]) -> List[str]:
+    """Drop paths that are hardlinks to a file already listed (same upload in several sessions)"""
+    seen: Set[Tuple[int, int]] = set()
+    unique = []
+    for path in file_paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        key = (stat.st_dev, stat.st_ino)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store(upload_dir: str) -> BlobStore:
+    """Process-wide blob store under the uploads directory"""
+    global _blob_store
+    root = os.path.join(upload_dir, BLOB_DIR_NAME)
+    if _blob_store is None or _blob_store.root != root:
+        _blob_store = BlobStore(root)
+    return _blob_store
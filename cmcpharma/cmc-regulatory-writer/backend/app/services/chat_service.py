@@ -14,7 +14,11 @@ from app.models.chat import (
     ChatGenerationRequest, ChatSessionCreate, ChatSessionUpdate, ChatFeedback
 )
 from app.services.generation_service import GenerationService
-from app.services.rag_service import RAGService
+from app.services.rag_registry import rag_registry, ALL_UPLOADS_SCOPE
+from app.services.ingestion_service import ingestion_service
+from app.services.blob_store import unique_files
+from app.services.upload_manifest import SessionManifest
+from app.utils.helpers import hash_string
 from app.core.config import settings
 
 
@@ -38,6 +42,8 @@ class ChatService:
         
         # Initialize RAG service lazily to avoid blocking initialization
         self.rag_service = None  # Will be initialized on first use
+        self._rag_lock = asyncio.Lock()  # one lease swap at a time
+        self._rag_version: Optional[str] = None  # uploads version the held lease was taken for
         
         # Chat configuration
         self.max_history_length = 50
@@ -188,7 +194,7 @@ class ChatService:
         try:
             # Get relevant context if files specified
             context_content = []
-            if generation_request.context_files:
+            if generation_request.context_files and await self._ensure_rag_initialized():
                 context_content = await self.rag_service.retrieve_relevant_content(
                     generation_request.prompt,
                     generation_request.context_files,
@@ -358,21 +364,34 @@ class ChatService:
                 self.llm = "error"  # Mark as error to avoid repeated attempts
         return self.llm != "error"
 
-    def _ensure_rag_initialized(self):
-        """Lazy initialization of RAG service"""
-        if self.rag_service is None:
-            try:
-                print("🔄 Initializing RAG service...")
-                upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "persistent_uploads")
+    async def _ensure_rag_initialized(self):
+        """Lease the shared RAG index over all uploads, swapping it only when the uploads change"""
+        try:
+            upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "persistent_uploads")
+            async with self._rag_lock:
+                version = self._uploads_version(upload_dir)
+                if self.rag_service is not None and version == self._rag_version:
+                    return True
                 print(f"🔍 ChatService: Looking for documents in: {upload_dir}")
                 available_files = self._get_all_document_files(upload_dir)
-                print(f"🔍 ChatService: Found {len(available_files)} documents: {available_files}")
-                self.rag_service = RAGService(file_paths=available_files)
-                print("✅ RAG service initialized successfully")
-            except Exception as e:
-                print(f"❌ Failed to initialize RAG service: {e}")
-                self.rag_service = "error"  # Mark as error to avoid repeated attempts
-        return self.rag_service != "error"
+                if self.rag_service is not None:
+                    # Give up our lease first: the registry only extends indexes nobody holds,
+                    # so keeping it would turn every upload into a full rebuild
+                    rag_registry.release(self.rag_service)
+                try:
+                    # Answer from whatever is indexed so far rather than waiting on a large ingestion
+                    self.rag_service = await rag_registry.acquire(
+                        ALL_UPLOADS_SCOPE, available_files, version=version, wait=False
+                    )
+                    self._rag_version = version
+                except BaseException:
+                    self.rag_service = None
+                    self._rag_version = None
+                    raise
+            return True
+        except Exception as e:
+            print(f"❌ Failed to initialize RAG service: {e}")
+            return False
 
     async def _generate_ai_response(
         self,
@@ -417,7 +436,7 @@ class ChatService:
             if should_use_rag:
                 try:
                     # Ensure RAG service is initialized
-                    if self._ensure_rag_initialized():
+                    if await self._ensure_rag_initialized():
                         relevant_docs = await self.rag_service.retrieve_relevant_content(
                             query=user_message,
                             file_paths=[],
@@ -699,7 +718,7 @@ Provide a concise, expert response (max {max_tokens} tokens):"""
             if should_use_rag:
                 try:
                     # Ensure RAG service is initialized
-                    if self._ensure_rag_initialized():
+                    if await self._ensure_rag_initialized():
                         relevant_docs = await self.rag_service.retrieve_relevant_content(
                             query=chat_request.message,
                             file_paths=[],
@@ -899,6 +918,20 @@ RESPONSE GUIDELINES:
                 "error": f"Stream processing failed: {str(e)}"
             }
 
+    def _uploads_version(self, upload_dir: str) -> str:
+        """Tag that changes whenever any session's uploads change, from one stat per session"""
+        if not os.path.isdir(upload_dir):
+            return hash_string("")
+        parts = [str(os.stat(upload_dir).st_mtime_ns)]  # sessions or loose files added or removed
+        for entry in sorted(os.scandir(upload_dir), key=lambda entry: entry.name):
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            manifest = SessionManifest(entry.path)
+            # Sessions from before manifests are tracked by their directory listing
+            session_version = manifest.version if manifest.exists() else entry.stat().st_mtime_ns
+            parts.append(f"{entry.name}|{session_version}")
+        return hash_string("\n".join(parts))
+
     def _get_all_document_files(self, upload_dir: str) -> List[str]:
         """Get all document files from the persistent uploads directory"""
         document_files = []
@@ -906,8 +939,9 @@ RESPONSE GUIDELINES:
         
         try:
             if os.path.exists(upload_dir):
-                # Walk through all subdirectories
-                for root, _, files in os.walk(upload_dir):
+                # Walk through all subdirectories, skipping the blob store, caches and index snapshots
+                for root, dirs, files in os.walk(upload_dir):
+                    dirs[:] = [d for d in dirs if not d.startswith('.')]
                     for file in files:
                         file_path = os.path.join(root, file)
                         file_extension = os.path.splitext(file)[1].lower()
@@ -915,6 +949,8 @@ RESPONSE GUIDELINES:
                             document_files.append(file_path)
                             print(f"📄 Found document: {file_path}")
                 
+                # The same upload linked into several sessions is indexed once
+                document_files = unique_files(document_files)
                 if document_files:
                     print(f"✅ Loaded {len(document_files)} documents for RAG")
                 else:
@@ -1145,25 +1181,13 @@ Results determine shelf-life and storage conditions."""
         try:
             print(f"🔍 Processing data verification query: {user_message}")
             
-            # Initialize RAG service if needed
-            if not self.rag_service:
-                try:
-                    # Use session-specific documents or fallback to simple test document
-                    session_dir = f"persistent_uploads/session_1752682398021_yzbskt9de"
-                    if os.path.exists(session_dir):
-                        document_files = self._get_all_document_files(session_dir)
-                    else:
-                        # Fallback to the test document
-                        test_doc = "persistent_uploads/test_document.txt"
-                        document_files = [test_doc] if os.path.exists(test_doc) else []
-                    if not document_files:
-                        return "I don't have access to any uploaded documents to verify data from. Please upload some documents first, then I can help you verify specific claims and their sources."
-                    
-                    print(f"📚 Initializing RAG with {len(document_files)} documents for verification")
-                    self.rag_service = RAGService(file_paths=document_files)
-                except Exception as e:
-                    print(f"❌ Failed to initialize RAG service: {e}")
-                    return "I'm having trouble accessing the document repository. Please try again in a moment."
+            # Lease the shared RAG index if needed
+            if not await self._ensure_rag_initialized():
+                return "I'm having trouble accessing the document repository. Please try again in a moment."
+            if self.rag_service.index is None:
+                if rag_registry.building(ALL_UPLOADS_SCOPE) is not None or ingestion_service.is_ingesting():
+                    return "Your documents are still being indexed, so I can't verify data against them yet. Please try again in a moment."
+                return "I don't have access to any uploaded documents to verify data from. Please upload some documents first, then I can help you verify specific claims and their sources."
             
             # Extract the claim/data point from the query
             claim_to_verify = self._extract_claim_from_query(user_message)
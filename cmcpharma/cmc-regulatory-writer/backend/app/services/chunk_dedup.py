@@ -0,0 +1,169 @@
+"""
+Near-duplicate chunk detection for ingestion: word shingles, MinHash signatures
+and a banded LSH index.
+
+Dossiers repeat headers, footers, spec tables and whole sections across CoAs.
+A chunk that nearly matches one already indexed is not embedded again; the
+caller records its location against the earlier (canonical) chunk instead.
+"""
+import hashlib
+import json
+import os
+import re
+import zlib
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+SHINGLE_WORDS = 3   # words per shingle
+NUM_PERM = 64       # MinHash permutations
+BANDS = 8           # LSH bands of NUM_PERM // BANDS rows; pairs at Jaccard 0.9 collide in a band 99% of the time
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32; products of two residues still fit in uint64
+
+_rng = np.random.default_rng(0)
+_PERM_A = _rng.integers(1, int(_PRIME), NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_PRIME), NUM_PERM, dtype=np.uint64)
+
+ARRAYS_FILE = "dedup.{name}.npy"
+HEADER_FILE = "dedup.json"
+
+_WORD_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def shingles(text: str) -> np.ndarray:
+    """Distinct 32-bit hashes of the overlapping SHINGLE_WORDS-word windows of a text"""
+    words = _words(text)
+    if len(words) < SHINGLE_WORDS:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words))
+    # Polynomial combination of consecutive word hashes; uint64 arithmetic wraps
+    combined = np.zeros(len(words) - SHINGLE_WORDS + 1, dtype=np.uint64)
+    for offset in range(SHINGLE_WORDS):
+        combined = combined * np.uint64(1000003) + hashes[offset:len(hashes) - SHINGLE_WORDS + 1 + offset]
+    return np.unique((combined ^ (combined >> np.uint64(32))) % _PRIME)
+
+
+def minhash(shingle_hashes: np.ndarray) -> np.ndarray:
+    """NUM_PERM-value MinHash signature; equal positions estimate the Jaccard similarity of two shingle sets"""
+    permuted = (_PERM_A[:, None] * shingle_hashes[None, :] + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1)
+
+
+def _numbers(text: str) -> List[str]:
+    return _NUMBER_RE.findall(text)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_words(text))
+
+
+def _key(data: bytes) -> int:
+    """Signed 64-bit digest; unlike hash() it is the same in every process, so keys can be saved"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little", signed=True)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over the canonical chunks of one RAG index.
+
+    Candidates from shared LSH buckets are confirmed with the exact Jaccard
+    similarity of their shingle sets, re-read through text_of so the index
+    holds only bucket keys. Chunks whose numbers differ (batch results, lot
+    numbers, dates) are never merged, however similar the surrounding words.
+    The index lives as long as its RAG index and is saved with its snapshot,
+    so extending an index only hashes the new chunks.
+    """
+
+    def __init__(self, text_of: Callable[[int], str], threshold: float):
+        self.text_of = text_of
+        self.threshold = threshold
+        self.chunk_count = 0  # chunk ids below this have been added
+        self._exact: Dict[int, int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(self, chunk_id: int, text: str) -> Optional[int]:
+        """
+        The canonical chunk id text duplicates, or None after registering it
+        as a new canonical chunk under chunk_id.
+        """
+        self.chunk_count = max(self.chunk_count, chunk_id + 1)
+        exact_key = _key(_normalize(text).encode("utf-8"))
+        canonical = self._exact.get(exact_key)
+        if canonical is not None and _normalize(self.text_of(canonical)) == _normalize(text):
+            return canonical
+
+        shingle_hashes = shingles(text)
+        band_keys = []
+        if len(shingle_hashes):
+            # Too short for shingles (bare headers): exact matches only
+            signature = minhash(shingle_hashes)
+            band_keys = [_key(bytes([band]) + band_rows.tobytes()) for band, band_rows in enumerate(np.split(signature, BANDS))]
+            canonical = self._confirm(text, shingle_hashes, band_keys)
+            if canonical is not None:
+                return canonical
+
+        self._exact.setdefault(exact_key, chunk_id)
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(chunk_id)
+        return None
+
+    def _confirm(self, text: str, shingle_hashes: np.ndarray, band_keys: List[int]) -> Optional[int]:
+        candidates: Set[int] = set()
+        for key in band_keys:
+            candidates.update(self._buckets.get(key, ()))
+        numbers = None
+        for candidate in sorted(candidates):
+            candidate_text = self.text_of(candidate)
+            candidate_hashes = shingles(candidate_text)
+            shared = len(np.intersect1d(shingle_hashes, candidate_hashes, assume_unique=True))
+            jaccard = shared / (len(shingle_hashes) + len(candidate_hashes) - shared)
+            if jaccard < self.threshold:
+                continue
+            if numbers is None:
+                numbers = _numbers(text)
+            if _numbers(candidate_text) == numbers:
+                return candidate
+        return None
+
+    def save(self, directory: str) -> None:
+        """Write exact and bucket keys as flat arrays; each file is replaced atomically"""
+        os.makedirs(directory, exist_ok=True)
+
+        def write_array(name: str, values, dtype) -> None:
+            path = os.path.join(directory, ARRAYS_FILE.format(name=name))
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, np.asarray(values, dtype=dtype))
+            os.replace(path + ".tmp", path)
+
+        write_array("exact_keys", list(self._exact), np.int64)
+        write_array("exact_ids", list(self._exact.values()), np.int32)
+        write_array("bucket_keys", [key for key, ids in self._buckets.items() for _ in ids], np.int64)
+        write_array("bucket_ids", [chunk_id for ids in self._buckets.values() for chunk_id in ids], np.int32)
+        path = os.path.join(directory, HEADER_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"chunk_count": self.chunk_count}, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, directory: str, text_of: Callable[[int], str], threshold: float) -> "NearDuplicateIndex":
+        """Read a saved index back into memory"""
+        with open(os.path.join(directory, HEADER_FILE), "r", encoding="utf-8") as f:
+            header = json.load(f)
+
+        def read_array(name: str) -> List[int]:
+            return np.load(os.path.join(directory, ARRAYS_FILE.format(name=name))).tolist()
+
+        index = cls(text_of, threshold)
+        index.chunk_count = header["chunk_count"]
+        index._exact = dict(zip(read_array("exact_keys"), read_array("exact_ids")))
+        for key, chunk_id in zip(read_array("bucket_keys"), read_array("bucket_ids")):
+            index._buckets.setdefault(key, []).append(chunk_id)
+        return index
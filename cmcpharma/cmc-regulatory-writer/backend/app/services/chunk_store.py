@@ -0,0 +1,291 @@
+"""
+Compact, array-backed storage for RAG chunks.
+
+All chunk text lives in one UTF-8 buffer; per-chunk data is three packed
+integer arrays (text offsets, file ids, page numbers) plus an interned list of
+file paths, i.e. 16 bytes per chunk on top of its text. Near-duplicate chunks
+are stored once; their other locations are kept as aliases (chunk, file, page)
+so citations and filters still see every place the text occurs. Saved stores are
+memory-mapped back as NumPy arrays, optionally with zstd-compressed text. Metadata dicts and
+Documents are only built for the chunks a query actually returns.
+"""
+import json
+import os
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+TEXT_FILE = "chunks.txt"
+TEXT_ZSTD_FILE = "chunks.zst"
+ARRAYS_FILE = "chunks.{name}.npy"
+SOURCES_FILE = "chunks.json"
+
+# zstd-compressed stores are cut into blocks of this many chunks so a lookup
+# only decompresses the block it needs
+ZSTD_BLOCK_CHUNKS = 64
+ZSTD_CACHED_BLOCKS = 32
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+class ChunkStore:
+    def __init__(self):
+        self.file_paths: List[str] = []  # interned; chunks refer to them by index
+        self._file_ids_by_path: Dict[str, int] = {}
+        # Growable arrays while building; read-only NumPy memmaps once loaded from disk
+        self._text = bytearray()
+        self._offsets = array("q", [0])
+        self._file_ids = array("i")
+        self._pages = array("i")
+        # Further locations of chunks whose text also occurs elsewhere, one row per location
+        self._alias_chunks = array("i")
+        self._alias_file_ids = array("i")
+        self._alias_pages = array("i")
+        # Set when loaded from a zstd snapshot: compressed blocks plus a small LRU of decoded ones
+        self._blocks = None
+        self._block_offsets = None
+        self._block_cache: "OrderedDict[int, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._file_ids)
+
+    def _file_id(self, file_path: str) -> int:
+        file_id = self._file_ids_by_path.get(file_path)
+        if file_id is None:
+            file_id = len(self.file_paths)
+            self.file_paths.append(file_path)
+            self._file_ids_by_path[file_path] = file_id
+        return file_id
+
+    def extend(self, file_path: str, page: int, texts: Sequence[str]) -> None:
+        """Append the chunks of one page"""
+        if not texts:
+            return
+        self._make_writable()
+        file_id = self._file_id(file_path)
+        for text in texts:
+            self._text += text.encode("utf-8")
+            self._offsets.append(len(self._text))
+        self._file_ids.extend([file_id] * len(texts))
+        self._pages.extend([page] * len(texts))
+
+    def add_alias(self, chunk_id: int, file_path: str, page: int) -> None:
+        """Record another location of chunk_id's text"""
+        self._make_writable()
+        # Chunk ids go last: readers take len(_alias_chunks) rows of all three arrays
+        self._alias_file_ids.append(self._file_id(file_path))
+        self._alias_pages.append(page)
+        self._alias_chunks.append(chunk_id)
+
+    @property
+    def alias_count(self) -> int:
+        return len(self._alias_chunks)
+
+    def _make_writable(self) -> None:
+        """Copy memory-mapped or compressed data into memory before appending"""
+        if self._blocks is not None:
+            self._text = bytearray(b"".join(self._block(b) for b in range(len(self._block_offsets) - 1)))
+            self._blocks = self._block_offsets = None
+            self._block_cache.clear()
+        elif not isinstance(self._text, bytearray):
+            self._text = bytearray(self._text)
+        if isinstance(self._offsets, np.ndarray):
+            self._offsets = array("q", self._offsets.tobytes())
+            self._file_ids = array("i", self._file_ids.astype(np.int32).tobytes())
+            self._pages = array("i", self._pages.astype(np.int32).tobytes())
+        if isinstance(self._alias_chunks, np.ndarray):
+            self._alias_chunks = array("i", self._alias_chunks.astype(np.int32).tobytes())
+            self._alias_file_ids = array("i", self._alias_file_ids.astype(np.int32).tobytes())
+            self._alias_pages = array("i", self._alias_pages.astype(np.int32).tobytes())
+
+    def _block(self, block: int) -> bytes:
+        data = self._block_cache.get(block)
+        if data is None:
+            start, end = self._block_offsets[block], self._block_offsets[block + 1]
+            data = _zstd().ZstdDecompressor().decompress(bytes(self._blocks[start:end]))
+            self._block_cache[block] = data
+            if len(self._block_cache) > ZSTD_CACHED_BLOCKS:
+                self._block_cache.popitem(last=False)
+        else:
+            self._block_cache.move_to_end(block)
+        return data
+
+    def text(self, i: int) -> str:
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        if self._blocks is not None:
+            block = i // ZSTD_BLOCK_CHUNKS
+            base = int(self._offsets[block * ZSTD_BLOCK_CHUNKS])
+            return self._block(block)[start - base:end - base].decode("utf-8")
+        return bytes(self._text[start:end]).decode("utf-8")
+
+    def texts(self, start: int = 0, end: Optional[int] = None) -> List[str]:
+        return [self.text(i) for i in range(start, len(self) if end is None else end)]
+
+    def file_path(self, i: int) -> str:
+        return self.file_paths[self._file_ids[i]]
+
+    def page(self, i: int) -> int:
+        return int(self._pages[i])
+
+    def locations(self, i: int) -> List[Tuple[str, int]]:
+        """Distinct (file path, page) pairs chunk i's text occurs on, its own location first"""
+        # A page repeating the same boilerplate gives several aliases with one location
+        found = {(self.file_path(i), self.page(i)): None}
+        if len(self._alias_chunks):
+            for row in np.flatnonzero(_as_numpy(self._alias_chunks[:]) == i):
+                found[(self.file_paths[self._alias_file_ids[row]], int(self._alias_pages[row]))] = None
+        return list(found)
+
+    def metadata(self, i: int, file_matches: Optional[Callable[[str], bool]] = None,
+                 page_range: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """Source and page of chunk i; with a filter, of its first location that passes it (see mask)"""
+        locations = self.locations(i)
+        file_path, page = next(
+            ((path, page) for path, page in locations
+             if (file_matches is None or file_matches(path))
+             and (page_range is None or page_range[0] <= page <= page_range[1])),
+            locations[0]
+        )
+        metadata = {'source': os.path.basename(file_path), 'file_path': file_path, 'page': page}
+        if len(locations) > 1:
+            metadata['locations'] = [
+                {'source': os.path.basename(path), 'file_path': path, 'page': page} for path, page in locations
+            ]
+        return metadata
+
+    def document(self, i: int, file_matches: Optional[Callable[[str], bool]] = None,
+                 page_range: Optional[Tuple[int, int]] = None) -> Document:
+        return Document(page_content=self.text(i), metadata=self.metadata(i, file_matches, page_range))
+
+    def mask(self, count: int, file_matches: Optional[Callable[[str], bool]] = None,
+             page_range: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Boolean mask over the first count chunks: from a matching file and within the page range"""
+        # Slicing copies, so ingestion can keep appending to the live arrays meanwhile.
+        # A chunk passes when any of its locations does
+        allowed = self._location_mask(self._file_ids[:count], self._pages[:count], file_matches, page_range)
+        rows = len(self._alias_chunks)
+        if rows and (file_matches is not None or page_range is not None):
+            aliases = _as_numpy(self._alias_chunks[:rows])
+            alias_allowed = self._location_mask(self._alias_file_ids[:rows], self._alias_pages[:rows], file_matches, page_range)
+            alias_allowed &= aliases < count
+            allowed[aliases[alias_allowed]] = True
+        return allowed
+
+    def _location_mask(self, file_ids, pages, file_matches: Optional[Callable[[str], bool]],
+                       page_range: Optional[Tuple[int, int]]) -> np.ndarray:
+        allowed = np.ones(len(file_ids), dtype=bool)
+        if file_matches is not None:
+            matching = [file_id for file_id, path in enumerate(self.file_paths) if file_matches(path)]
+            allowed &= np.isin(_as_numpy(file_ids), matching)
+        if page_range is not None:
+            pages = _as_numpy(pages)
+            allowed &= (pages >= page_range[0]) & (pages <= page_range[1])
+        return allowed
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by text and per-chunk arrays (compressed size for zstd stores)"""
+        text_bytes = len(self._blocks) if self._blocks is not None else len(self._text)
+        return text_bytes + sum(
+            len(values) * values.itemsize for values in (
+                self._offsets, self._file_ids, self._pages, self._alias_chunks, self._alias_file_ids, self._alias_pages
+            )
+        )
+
+    def save(self, directory: str, compression: str = "none") -> None:
+        """Write the store as flat files; each file is replaced atomically"""
+        os.makedirs(directory, exist_ok=True)
+        zstd = _zstd() if compression == "zstd" else None
+        if compression == "zstd" and zstd is None:
+            print("Warning: zstandard is not installed, saving chunk text uncompressed")
+
+        def write(name: str, data: bytes) -> None:
+            path = os.path.join(directory, name)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+
+        def write_array(name: str, values, dtype) -> None:
+            path = os.path.join(directory, ARRAYS_FILE.format(name=name))
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, np.asarray(values, dtype=dtype))
+            os.replace(path + ".tmp", path)
+
+        if self._blocks is not None:
+            self._make_writable()
+        if zstd is not None:
+            compressor = zstd.ZstdCompressor(level=3)
+            blocks, block_offsets = [], [0]
+            for start in range(0, len(self), ZSTD_BLOCK_CHUNKS):
+                end = min(start + ZSTD_BLOCK_CHUNKS, len(self))
+                blocks.append(compressor.compress(bytes(self._text[self._offsets[start]:self._offsets[end]])))
+                block_offsets.append(block_offsets[-1] + len(blocks[-1]))
+            write(TEXT_ZSTD_FILE, b"".join(blocks))
+            write_array("blocks", block_offsets, np.int64)
+            text_file = TEXT_ZSTD_FILE
+        else:
+            write(TEXT_FILE, bytes(self._text))
+            text_file = TEXT_FILE
+        write_array("offsets", self._offsets, np.int64)
+        write_array("file_ids", self._file_ids, np.int32)
+        write_array("pages", self._pages, np.int32)
+        write_array("alias_chunks", self._alias_chunks, np.int32)
+        write_array("alias_file_ids", self._alias_file_ids, np.int32)
+        write_array("alias_pages", self._alias_pages, np.int32)
+        write(SOURCES_FILE, json.dumps({"text_file": text_file, "file_paths": self.file_paths}).encode("utf-8"))
+        # Drop text left over from a save with the other compression setting
+        stale_file = os.path.join(directory, TEXT_FILE if text_file == TEXT_ZSTD_FILE else TEXT_ZSTD_FILE)
+        if os.path.exists(stale_file):
+            os.remove(stale_file)
+
+    @classmethod
+    def load(cls, directory: str) -> "ChunkStore":
+        """Open a saved store with its arrays and text memory-mapped read-only"""
+        with open(os.path.join(directory, SOURCES_FILE), "r", encoding="utf-8") as f:
+            header = json.load(f)
+
+        def read_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, ARRAYS_FILE.format(name=name)), mmap_mode="r")
+
+        store = cls()
+        store.file_paths = header["file_paths"]
+        store._file_ids_by_path = {path: i for i, path in enumerate(store.file_paths)}
+        store._offsets = read_array("offsets")
+        store._file_ids = read_array("file_ids")
+        store._pages = read_array("pages")
+        store._alias_chunks = read_array("alias_chunks")
+        store._alias_file_ids = read_array("alias_file_ids")
+        store._alias_pages = read_array("alias_pages")
+
+        text_path = os.path.join(directory, header["text_file"])
+        if header["text_file"] == TEXT_ZSTD_FILE:
+            if _zstd() is None:
+                raise RuntimeError("Chunk store is zstd-compressed but zstandard is not installed")
+            store._blocks = _map_file(text_path)
+            store._block_offsets = read_array("blocks")
+        else:
+            store._text = _map_file(text_path)
+        return store
+
+
+def _as_numpy(values) -> np.ndarray:
+    """NumPy view of a packed array or memmap; pass slices of live arrays, which are copies"""
+    if isinstance(values, array):
+        return np.frombuffer(values, dtype=np.int32 if values.typecode == "i" else np.int64)
+    return np.asarray(values)
+
+
+def _map_file(path: str):
+    """Read-only memory map of a file (empty files can't be mapped)"""
+    if os.path.getsize(path) == 0:
+        return b""
+    return np.memmap(path, dtype=np.uint8, mode="r")
@@ -156,6 +156,17 @@ class CitationTracker:
         
         return modified_content
     
+    def renumber_citations(self, content: str, numbers: Dict[int, int]) -> str:
+        """Rewrite [n] markers in content through a number mapping such as DocumentCitationRegistry.merge() returns"""
+        if not numbers:
+            return content
+        # One pass, so a marker that was already renumbered is never mapped again
+        return re.sub(
+            r'\[(\d+)\]',
+            lambda match: f"[{numbers.get(int(match.group(1)), int(match.group(1)))}]",
+            content
+        )
+    
     def _detect_citation_points(self, content: str, num_citations: int) -> List[int]:
         """Automatically detect good points to insert citations"""
         # Find sentence endings
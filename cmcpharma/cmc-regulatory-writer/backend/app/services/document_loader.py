@@ -0,0 +1,291 @@
+"""
+Parallel, streaming document parsing for RAG ingestion.
+
+Files (and page ranges of large PDFs) are parsed in a process pool so CPU-bound
+PDF text extraction runs on every core instead of the request thread. Results
+are streamed back in page order with a bounded number of ranges in flight, so
+a 2,000-page report never has all of its pages in memory at once.
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from ..core.config import settings
+from .text_cache import file_content_hash, get_page_cache
+
+# Large PDFs are split into page ranges of this size so one file can use several workers
+PDF_PAGES_PER_TASK = 50
+
+# (page_content, metadata) pairs are cheaper to ship between processes than Documents
+RawPage = Tuple[str, Dict[str, Any]]
+ParseTask = Tuple[str, Optional[Tuple[int, int]]]
+
+
+@dataclass
+class ParsedFile:
+    """Pages parsed from one file plus how long parsing took"""
+    file_path: str
+    pages: List[Document] = field(default_factory=list)
+    parse_seconds: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False
+
+
+@dataclass
+class PageBatch:
+    """A run of consecutive pages from one file, freshly parsed or read from the page cache"""
+    file_path: str
+    pages: List[Document] = field(default_factory=list)
+    page_count: Optional[int] = None  # total pages in the file, when known up front
+    parse_seconds: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False
+    last: bool = False  # no more batches follow for this file
+
+
+def _load_with_langchain(file_path: str) -> List[RawPage]:
+    """Parse a whole file with the matching langchain loader"""
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader
+
+    # Determine file type and use appropriate loader
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == '.pdf':
+        loader = PyPDFLoader(file_path)
+    elif file_extension in ['.txt', '.md']:
+        loader = TextLoader(file_path, encoding='utf-8')
+    elif file_extension in ['.doc', '.docx']:
+        loader = UnstructuredWordDocumentLoader(file_path)
+    else:
+        # Try to load as text file as fallback
+        print(f"Unknown file type {file_extension}, trying as text file: {file_path}")
+        loader = TextLoader(file_path, encoding='utf-8')
+    return [(page.page_content, page.metadata) for page in loader.load()]
+
+
+def _load_pdf_pages(file_path: str, start: int, end: int) -> List[RawPage]:
+    """Parse pages [start, end) of a PDF, with the same metadata PyPDFLoader produces"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    return [
+        (reader.pages[index].extract_text(), {'source': file_path, 'page': index})
+        for index in range(start, min(end, len(reader.pages)))
+    ]
+
+
+def _parse_task(file_path: str, page_range: Optional[Tuple[int, int]]) -> Tuple[List[RawPage], float]:
+    """Worker entry point: parse a file or a page range and time it"""
+    started = time.perf_counter()
+    if page_range is None:
+        pages = _load_with_langchain(file_path)
+    else:
+        pages = _load_pdf_pages(file_path, *page_range)
+    return pages, time.perf_counter() - started
+
+
+def _pdf_page_count(file_path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(file_path).pages)
+
+
+def _plan_tasks(file_paths: List[str], pages_per_task: int) -> Tuple[List[ParseTask], Dict[str, int]]:
+    """One task per file, except large PDFs which get one task per page range; also returns PDF page counts"""
+    tasks = []
+    page_counts = {}
+    for file_path in file_paths:
+        page_count = 0
+        if os.path.splitext(file_path)[1].lower() == '.pdf':
+            try:
+                page_count = _pdf_page_count(file_path)
+                page_counts[file_path] = page_count
+            except Exception:
+                # Let the full-file task surface the parse error
+                page_count = 0
+        if page_count > pages_per_task:
+            for start in range(0, page_count, pages_per_task):
+                tasks.append((file_path, (start, start + pages_per_task)))
+        else:
+            tasks.append((file_path, None))
+    return tasks, page_counts
+
+
+_executor: Optional[Executor] = None
+
+
+def get_parse_executor() -> Executor:
+    """Process pool shared by all ingestion runs, created on first use"""
+    global _executor
+    if _executor is None:
+        # spawn avoids forking a process that already runs event-loop and worker threads
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.RAG_PARSE_WORKERS or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def stream_pages(file_paths: List[str], pages_per_task: int = PDF_PAGES_PER_TASK,
+                 max_in_flight: Optional[int] = None) -> Iterator[PageBatch]:
+    """
+    Yield pages file by file, in input order and page order, as they are parsed.
+    At most max_in_flight page ranges are parsed or buffered at a time. Files
+    parsed before (by content hash) are streamed from the page cache instead.
+    """
+    file_paths = list(dict.fromkeys(file_paths))
+    page_cache = get_page_cache()
+    file_hashes: Dict[str, str] = {}
+    cached: Dict[str, Iterator[RawPage]] = {}
+    to_parse = []
+    for file_path in file_paths:
+        try:
+            file_hashes[file_path] = file_content_hash(file_path)
+        except OSError:
+            # Let the parse task surface the error
+            to_parse.append(file_path)
+            continue
+        cached_pages = page_cache.open_pages(file_hashes[file_path])
+        if cached_pages is None:
+            to_parse.append(file_path)
+        else:
+            cached[file_path] = cached_pages
+
+    tasks, page_counts = _plan_tasks(to_parse, pages_per_task)
+    remaining = {path: 0 for path in to_parse}
+    for file_path, _ in tasks:
+        remaining[file_path] += 1
+    writers = {path: page_cache.writer(file_hashes[path]) for path in to_parse if path in file_hashes}
+    failed = set()
+
+    if len(tasks) <= 1:
+        # Not worth a round trip through the pool
+        outcomes = iter([(task, _run_inline(*task)) for task in tasks])
+    else:
+        if max_in_flight is None:
+            max_in_flight = 2 * (settings.RAG_PARSE_WORKERS or os.cpu_count() or 1)
+        outcomes = _ordered_outcomes(tasks, max_in_flight)
+
+    try:
+        for file_path in file_paths:
+            if file_path in cached:
+                yield from _stream_cached(file_path, cached.pop(file_path), pages_per_task)
+                continue
+            # Outcomes arrive in task order, which follows file order, so this file's are next
+            while remaining[file_path]:
+                _, (pages, seconds, error) = next(outcomes)
+                remaining[file_path] -= 1
+                if file_path in failed:
+                    continue
+                writer = writers.get(file_path)
+                if error:
+                    failed.add(file_path)
+                    if writer:
+                        writer.abort()
+                    yield PageBatch(file_path=file_path, parse_seconds=seconds, error=error, last=True)
+                    continue
+                last = remaining[file_path] == 0
+                if writer:
+                    writer.add(pages)
+                    if last:
+                        writer.commit()
+                yield PageBatch(
+                    file_path=file_path,
+                    pages=_to_documents(file_path, pages),
+                    page_count=page_counts.get(file_path),
+                    parse_seconds=seconds,
+                    last=last
+                )
+    finally:
+        # Consumer stopped early or a file failed: drop partial cache records
+        for writer in writers.values():
+            writer.abort()
+
+
+def _stream_cached(file_path: str, cached_pages: Iterator[RawPage], pages_per_task: int) -> Iterator[PageBatch]:
+    """Cached pages in batches of pages_per_task, reading one batch ahead to flag the last one"""
+    batches = iter(lambda: list(islice(cached_pages, pages_per_task)), [])
+    current = next(batches, [])
+    for following in batches:
+        yield PageBatch(file_path=file_path, pages=_to_documents(file_path, current), cached=True)
+        current = following
+    yield PageBatch(file_path=file_path, pages=_to_documents(file_path, current), cached=True, last=True)
+
+
+def iter_parsed_files(file_paths: List[str], pages_per_task: int = PDF_PAGES_PER_TASK) -> Iterator[ParsedFile]:
+    """Parse files in parallel and yield each one, in input order, once all of its pages are in"""
+    results: Dict[str, ParsedFile] = {}
+    for batch in stream_pages(file_paths, pages_per_task):
+        result = results.setdefault(batch.file_path, ParsedFile(file_path=batch.file_path, cached=batch.cached))
+        result.parse_seconds += batch.parse_seconds
+        if batch.error:
+            result.error = batch.error
+            result.pages = []
+        else:
+            result.pages.extend(batch.pages)
+        if batch.last:
+            yield results.pop(batch.file_path)
+
+
+def _to_documents(file_path: str, pages: List[RawPage]) -> List[Document]:
+    return [Document(page_content=text, metadata={**metadata, 'source': file_path}) for text, metadata in pages]
+
+
+def load_documents(file_paths: List[str], pages_per_task: int = PDF_PAGES_PER_TASK) -> List[ParsedFile]:
+    """Parse files in parallel and return them in input order"""
+    parsed = {result.file_path: result for result in iter_parsed_files(file_paths, pages_per_task)}
+    return [parsed[path] for path in dict.fromkeys(file_paths) if path in parsed]
+
+
+def _run_inline(file_path: str, page_range: Optional[Tuple[int, int]]) -> Tuple[List[RawPage], float, Optional[str]]:
+    try:
+        pages, seconds = _parse_task(file_path, page_range)
+        return pages, seconds, None
+    except Exception as e:
+        return [], 0.0, str(e)
+
+
+def _submit(task: ParseTask) -> Future:
+    global _executor
+    try:
+        return get_parse_executor().submit(_parse_task, *task)
+    except BrokenProcessPool:
+        _executor = None
+        return get_parse_executor().submit(_parse_task, *task)
+
+
+def _ordered_outcomes(tasks: List[ParseTask], max_in_flight: int):
+    """Run tasks on the pool, yielding results in task order with a bounded number in flight"""
+    pending: Deque[Tuple[ParseTask, Future]] = deque()
+    task_iter = iter(tasks)
+    for task in task_iter:
+        pending.append((task, _submit(task)))
+        if len(pending) >= max_in_flight:
+            break
+    while pending:
+        task, future = pending.popleft()
+        outcome = _future_result(future, task)
+        next_task = next(task_iter, None)
+        if next_task is not None:
+            pending.append((next_task, _submit(next_task)))
+        yield task, outcome
+
+
+def _future_result(future, task: ParseTask) -> Tuple[List[RawPage], float, Optional[str]]:
+    global _executor
+    try:
+        pages, seconds = future.result()
+        return pages, seconds, None
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time and parse this task here
+        print(f"Warning: Parse pool broke while loading {task[0]}, parsing in process")
+        _executor = None
+        return _run_inline(*task)
+    except Exception as e:
+        return [], 0.0, str(e)
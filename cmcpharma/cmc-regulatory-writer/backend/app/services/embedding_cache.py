@@ -0,0 +1,150 @@
+"""
+Persistent, content-addressed cache for chunk embeddings
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+from ..core.config import settings
+from ..utils.helpers import hash_string
+from .query_cache import CacheStats, LRUCache, query_embedding_cache
+
+
+class EmbeddingCache:
+    """
+    On-disk store of embedding vectors keyed by a hash of (model, chunk text).
+
+    Backed by a single SQLite file so it survives server restarts and can be
+    shared by every RAGService instance in the process.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or settings.RAG_CACHE_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.db_path = os.path.join(self.cache_dir, "embeddings.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        # Chunk lookups made through CachedEmbeddings, reported by the cache stats endpoint
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Content address for a chunk embedded with a given model"""
+        return hash_string(f"{model}\x00{text}")
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given keys (missing keys are omitted)"""
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well under SQLite's host parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        """Store vectors for the given keys"""
+        if not items:
+            return
+        rows = [
+            (key, model, len(vector), np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+# Process-wide cache shared by all RAG services
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, creating it on first use"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends chunks missing from the cache to the
+    underlying embedding model. Query embeddings go through an in-memory LRU.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: Optional[EmbeddingCache] = None,
+                 query_cache: Optional[LRUCache] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        # Not `cache or ...`: an empty cache is falsy
+        self.cache = cache if cache is not None else get_embedding_cache()
+        self.query_cache = query_cache if query_cache is not None else query_embedding_cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once, even if it repeats in the batch
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            # Round through float32 so fresh and cached vectors are identical
+            fresh = {
+                key: np.asarray(vector, dtype=np.float32).tolist()
+                for key, vector in zip(missing.keys(), vectors)
+            }
+            self.cache.put_many(self.model_name, fresh)
+            cached.update(fresh)
+
+        hits = len(texts) - len(missing)
+        self.cache.stats.hits += hits
+        self.cache.stats.misses += len(missing)
+        print(f"🧠 Embedding cache: {hits} hits, {len(missing)} misses ({len(texts)} chunks)")
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed queries missing from the LRU, all at once when the underlying model supports it"""
+        keys = [(self.model_name, text) for text in texts]
+        vectors = [self.query_cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            if hasattr(self.embeddings, "embed_queries"):
+                fresh = self.embeddings.embed_queries(missing)
+            else:
+                fresh = [self.embeddings.embed_query(text) for text in missing]
+            # Kept as float32 arrays: a quarter of the memory of float lists
+            embedded = {text: np.asarray(vector, dtype=np.float32) for text, vector in zip(missing, fresh)}
+            for text, vector in embedded.items():
+                self.query_cache.put((self.model_name, text), vector)
+            vectors = [embedded[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return [vector.tolist() for vector in vectors]
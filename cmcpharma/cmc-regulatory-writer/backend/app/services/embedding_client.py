@@ -0,0 +1,168 @@
+"""
+Embedding clients: batching, bounded concurrency and retries around any embedding model
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import httpx
+import requests
+from langchain.schema.embeddings import Embeddings
+
+from ..core.config import settings
+from ..utils.helpers import batch_items, retry_on_exception
+
+
+# Connection failures and timeouts are worth retrying; so are rate limits and server errors (below)
+TRANSPORT_ERRORS = (httpx.TransportError, requests.ConnectionError, requests.Timeout, TimeoutError)
+# langchain's NVIDIA clients raise plain Exceptions headed "[status] title"
+_STATUS_PREFIX = re.compile(r"\[(\d{3})\]")
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for errors a retry can fix; bad keys, bad requests and unknown models fail straight away"""
+    if isinstance(error, TRANSPORT_ERRORS):
+        return True
+    if isinstance(error, (httpx.HTTPStatusError, requests.HTTPError)) and error.response is not None:
+        status = error.response.status_code
+    else:
+        match = _STATUS_PREFIX.match(str(error))
+        if match is None:
+            return False
+        status = int(match.group(1))
+    return status == 429 or status >= 500
+
+
+class OpenAICompatibleEmbeddings(Embeddings):
+    """
+    Minimal client for OpenAI-style /embeddings endpoints (NVIDIA API Catalog,
+    self-hosted NIMs, or the local stand-in server in tools/embedding_server.py).
+    """
+
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None, timeout: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(headers=headers, timeout=timeout)
+
+    def _embed(self, texts: List[str], input_type: str) -> List[List[float]]:
+        response = self.client.post(
+            f"{self.base_url}/embeddings",
+            json={
+                "input": texts,
+                "model": self.model,
+                "input_type": input_type,  # required by NVIDIA retrieval models
+                "encoding_format": "float"
+            }
+        )
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "passage")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "query")
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Splits document embedding into fixed-size batches, sends up to
+    max_concurrency batches at once and retries batches that failed with a
+    transient error with exponential backoff.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, max_retries: Optional[int] = None,
+                 retry_delay: float = 1.0, query_embeddings: Optional[Embeddings] = None):
+        self.embeddings = embeddings
+        # Same model configured for query-side input, whose embed_documents embeds many queries per request
+        self.query_embeddings = query_embeddings
+        # Larger batches would be split again by the client and sent one after the other
+        self.batch_size = min(batch_size or settings.EMBEDDING_BATCH_SIZE,
+                              getattr(embeddings, "max_batch_size", None) or float("inf"))
+        self.max_concurrency = max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay = retry_delay
+        self.last_throughput = 0.0  # chunks/sec of the most recent embed_documents call
+
+    def _retrying(self, func):
+        return retry_on_exception(func, max_retries=self.max_retries, delay=self.retry_delay,
+                                  retry_if=is_transient_error)
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        return self._retrying(self.embeddings.embed_documents)(batch)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        batches = batch_items(texts, self.batch_size)
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                # map() keeps batch order, so vectors line up with the input texts
+                results = list(executor.map(self._embed_batch, batches))
+
+        elapsed = time.perf_counter() - started
+        self.last_throughput = len(texts) / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"⚡ Embedded {len(texts)} chunks in {len(batches)} batches "
+            f"({self.last_throughput:.1f} chunks/sec, concurrency {self.max_concurrency})"
+        )
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._retrying(self.embeddings.embed_query)(text)
+
+    def _embed_query_batch(self, batch: List[str]) -> List[List[float]]:
+        if self.query_embeddings is not None:
+            return self._retrying(self.query_embeddings.embed_documents)(batch)
+        if hasattr(self.embeddings, "embed_queries"):
+            return self._retrying(self.embeddings.embed_queries)(batch)
+        # No batch query call at all: one request per query
+        return [self.embed_query(text) for text in batch]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Query-side embeddings for many queries, in batch_size requests instead of one per query"""
+        if not texts:
+            return []
+        batches = batch_items(texts, self.batch_size)
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = [self._embed_query_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                results = list(executor.map(self._embed_query_batch, batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+
+def create_embedding_client() -> Embeddings:
+    """Embedding model configured for this deployment, wrapped for batched, concurrent calls"""
+    if settings.EMBEDDING_BASE_URL:
+        inner = OpenAICompatibleEmbeddings(
+            base_url=settings.EMBEDDING_BASE_URL,
+            model=settings.EMBEDDING_MODEL,
+            api_key=settings.NVIDIA_API_KEY
+        )
+        return BatchedEmbeddings(inner)
+
+    from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
+    inner = NVIDIAEmbeddings(
+        model=settings.EMBEDDING_MODEL,
+        api_key=settings.NVIDIA_API_KEY
+    )
+    # NVIDIAEmbeddings only embeds one query per request; a query-typed client's
+    # embed_documents sends a whole batch of queries at once
+    query_inner = NVIDIAEmbeddings(
+        model=settings.EMBEDDING_MODEL,
+        api_key=settings.NVIDIA_API_KEY,
+        model_type="query"
+    )
+    return BatchedEmbeddings(inner, query_embeddings=query_inner)
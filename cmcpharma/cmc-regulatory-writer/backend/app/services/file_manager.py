@@ -1,55 +1,147 @@
 import os
-import uuid
+import hashlib
+import aiofiles
 from fastapi import UploadFile
-from typing import List
-from ..models.file import FileItem
+from typing import List, Optional
+from ..core.config import settings
+from ..models.file import FileItem, UploadRecord
+from ..utils.helpers import calculate_file_hash
+from .blob_store import get_blob_store
+from .upload_manifest import SessionManifest
 
 UPLOAD_DIR = "persistent_uploads"
+INDEX_DIR_NAME = ".rag_index"
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Stream uploads to disk 1 MB at a time
+
+
+class FileTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+    pass
+
 
 class FileManager:
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.session_dir = os.path.join(UPLOAD_DIR, self.session_id)
+        # Persisted RAG index snapshot lives next to the uploads it was built from
+        self.index_dir = os.path.join(self.session_dir, INDEX_DIR_NAME)
         os.makedirs(self.session_dir, exist_ok=True)
+        self.blob_store = get_blob_store(UPLOAD_DIR)
+        self.manifest = SessionManifest(self.session_dir)
+        if not self.manifest.exists():
+            self._rebuild_manifest()
 
-    async def save_file(self, file: UploadFile) -> FileItem:
-        """Saves an uploaded file to the session directory."""
-        file_path = os.path.join(self.session_dir, file.filename)
+    async def save_file(self, file: UploadFile, max_bytes: Optional[int] = None) -> FileItem:
+        """
+        Streams an uploaded file to the shared blob store in chunks, hashing it
+        and enforcing the size limit on the way so large uploads are never held in memory.
+        The session gets a hardlink, so content already uploaded elsewhere is stored once.
+        """
+        if max_bytes is None:
+            max_bytes = settings.MAX_UPLOAD_MB * 1024 * 1024
+        filename = os.path.basename(file.filename)
+        file_path = os.path.join(self.session_dir, filename)
+        # Hidden temp name keeps partial uploads out of listings and indexing
+        temp_path = self.blob_store.temp_path()
         
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, "wb") as buffer:
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise FileTooLargeError(
+                            f"File '{filename}' exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+                        )
+                    hasher.update(chunk)
+                    await buffer.write(chunk)
+            sha256 = hasher.hexdigest()
+            blob_path, is_new = self.blob_store.put(temp_path, sha256, filename)
+            self.blob_store.link_into(blob_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if not is_new:
+            print(f"♻️ {filename} is already stored, linked into session {self.session_id}")
         
-        return FileItem(
-            name=file.filename,
-            size=file.size,
-            mime_type=file.content_type,
-            path=os.path.join(self.session_id, file.filename)
-        )
+        previous = self.manifest.get(filename)
+        if previous and previous.sha256 and previous.sha256 != sha256:
+            # The name now points at different content; drop the old blob if nothing else uses it
+            self.blob_store.release(previous.sha256, filename)
+        
+        record = self.manifest.upsert(UploadRecord(
+            name=filename,
+            sha256=sha256,
+            size=size,
+            mime_type=file.content_type or self._get_mime_type(filename)
+        ))
+        return self._to_file_item(record)
+
+    def delete_file(self, filename: str) -> bool:
+        """Removes an upload and its manifest entry; the blob goes too once no session links to it."""
+        filename = os.path.basename(filename)
+        file_path = os.path.join(self.session_dir, filename)
+        record = self.manifest.get(filename)
+        if record is None and not os.path.isfile(file_path):
+            return False
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+        self.manifest.remove(filename)
+        if record is not None and record.sha256:
+            self.blob_store.release(record.sha256, filename)
+        return True
 
     def get_session_file_paths(self) -> List[str]:
         """Returns a list of full file paths for a given session."""
-        if not os.path.isdir(self.session_dir):
-            return []
-        return [os.path.join(self.session_dir, f) for f in os.listdir(self.session_dir)]
+        return [os.path.join(self.session_dir, record.name) for record in self.manifest.records()]
 
     def get_session_files(self) -> List[FileItem]:
         """Returns a list of FileItem objects for all files in the session."""
-        files = []
-        if not os.path.isdir(self.session_dir):
-            return files
-        
-        for filename in os.listdir(self.session_dir):
-            file_path = os.path.join(self.session_dir, filename)
-            if os.path.isfile(file_path):
-                file_size = os.path.getsize(file_path)
-                files.append(FileItem(
+        return [self._to_file_item(record) for record in self.manifest.records()]
+
+    def get_upload_records(self) -> List[UploadRecord]:
+        """Full manifest records, including page/chunk counts and index state."""
+        return self.manifest.records()
+
+    @property
+    def manifest_version(self) -> str:
+        """Cheap tag that changes whenever the session's uploads change."""
+        return self.manifest.version
+
+    def _to_file_item(self, record: UploadRecord) -> FileItem:
+        return FileItem(
+            id=record.id,
+            name=record.name,
+            size=record.size,
+            mime_type=record.mime_type,
+            path=os.path.join(self.session_id, record.name),
+            sha256=record.sha256
+        )
+
+    def _rebuild_manifest(self):
+        """One-time scan for sessions uploaded before manifests existed."""
+        records = []
+        for filename in sorted(os.listdir(self.session_dir)):
+            if self._is_upload(filename):
+                file_path = os.path.join(self.session_dir, filename)
+                sha256 = calculate_file_hash(file_path)
+                # Share storage with identical uploads in other sessions
+                self.blob_store.adopt(file_path, sha256)
+                records.append(UploadRecord(
                     name=filename,
-                    size=file_size,
-                    mime_type=self._get_mime_type(filename),
-                    path=os.path.join(self.session_id, filename)
+                    sha256=sha256,
+                    size=os.path.getsize(file_path),
+                    mime_type=self._get_mime_type(filename)
                 ))
-        return files
+        self.manifest.replace_all(records)
+
+    def _is_upload(self, filename: str) -> bool:
+        """Uploaded files only; hidden entries hold index snapshots and other metadata"""
+        return not filename.startswith('.') and os.path.isfile(os.path.join(self.session_dir, filename))
 
     def _get_mime_type(self, filename: str) -> str:
         """Simple mime type detection based on file extension."""
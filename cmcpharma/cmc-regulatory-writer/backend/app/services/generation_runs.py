@@ -0,0 +1,281 @@
+"""
+Whole-document generation runs in the background with a replayable event log.
+
+A run outlives the request that started it, so a streaming client whose
+connection drops reconnects with Last-Event-ID and continues where it left off
+instead of restarting generation. Runs double as jobs: they can be polled for
+per-section progress, cancelled, and their document fetched later.
+"""
+import asyncio
+import bisect
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..core.config import settings
+from ..models.document import GeneratedDocument, GeneratedSection, GenerationJobStatus, SectionProgress
+from ..models.template import Template
+from .file_manager import FileManager
+from .generation_service import EventCallback, GenerationService, SECTION_TOP_K, citation_payload
+from .ingestion_service import ingestion_service
+from .rag_registry import rag_registry
+
+
+def _flatten_toc(toc_items) -> list:
+    """TOC items depth first, so nested sections follow their parent"""
+    flat_items = []
+    for item in toc_items:
+        flat_items.append(item)
+        if hasattr(item, 'children') and item.children:
+            flat_items.extend(_flatten_toc(item.children))
+    return flat_items
+
+
+async def generate_full_document(session_id: str, template: Template,
+                                 on_event: Optional[EventCallback] = None) -> GeneratedDocument:
+    """Generate every TOC section of a template from the session's uploads, plus a References section"""
+    file_manager = FileManager(session_id)
+    file_paths = file_manager.get_session_file_paths()
+    if not file_paths:
+        raise ValueError(f"No source files found for session '{session_id}'. Please upload files first.")
+
+    # Uploads are indexed in the background; only wait on runs still in flight
+    await ingestion_service.wait_for_session(session_id)
+    # Reuse a warm index for this session's files if one is already built
+    rag_service = await rag_registry.acquire(
+        session_id,
+        file_paths,
+        index_dir=file_manager.index_dir,
+        version=file_manager.manifest_version
+    )
+    try:
+        generation_service = GenerationService()
+        all_sections = _flatten_toc(template.toc)
+        print(f"Generating {len(all_sections)} sections from template: {[item.title for item in all_sections]}")
+
+        # Retrieve for every section up front: one embedding request and one index search
+        retrieved = await rag_service.retrieve_batch(
+            [toc_item.title for toc_item in all_sections],
+            top_k=SECTION_TOP_K
+        )
+
+        # Generate sections concurrently; citations are still numbered in TOC order
+        document_id = f"{session_id}-document"  # Create a document-level ID for citation tracking
+        generated_sections = await generation_service.synthesize_sections(
+            [toc_item.title for toc_item in all_sections],
+            rag_service,
+            session_id=session_id,
+            document_id=document_id,
+            retrieved=retrieved,
+            on_event=on_event
+        )
+    finally:
+        rag_registry.release(rag_service)
+
+    # Check if any section is already titled "References" - if so, don't add another one
+    existing_references_section = any(
+        section.title.lower().strip() == "references"
+        for section in generated_sections
+    )
+
+    # Generate References section automatically only if:
+    # 1. There are citations to reference
+    # 2. No section is already titled "References"
+    references_content = generation_service.generate_references_section(document_id)
+
+    if references_content and not existing_references_section:
+        references_section = GeneratedSection(
+            title="References",
+            content=references_content,
+            source_count=0  # References don't have their own sources
+        )
+        generated_sections.append(references_section)
+        print(f"📖 Added document-level References section with {len(references_content)} characters")
+    elif existing_references_section:
+        print(f"📖 References section already exists in template - skipping auto-generation")
+    elif not references_content:
+        print(f"📖 No citations found - skipping References section generation")
+
+    print(f"Generated document with {len(generated_sections)} sections (including References)")
+
+    # Get citations from the citation tracker
+    citations_registry = generation_service.citation_tracker.get_registry(document_id)
+    citations_data = []
+    if citations_registry and citations_registry.inline_citations:
+        print(f"🔗 Processing {len(citations_registry.inline_citations)} citations for response")
+        citations_data = [citation_payload(cite) for cite in citations_registry.inline_citations]
+
+    print(f"Returning {len(citations_data)} citations with the document")
+
+    return GeneratedDocument(
+        title=template.name,
+        template_id=template.id,
+        session_id=session_id,
+        sections=generated_sections,  # Return all sections separately including References
+        citations=citations_data  # Include actual citations from uploaded documents
+    )
+
+
+@dataclass
+class GenerationEvent:
+    id: int
+    event: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.event}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class GenerationRun:
+    """One document generation and the events it has published so far"""
+
+    def __init__(self, session_id: str, template: Template):
+        self.id = str(uuid.uuid4())
+        self.session_id = session_id
+        self.template = template
+        self.status = "running"  # running, completed, failed, cancelled
+        self.document: Optional[GeneratedDocument] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        self.sections = [SectionProgress(index=i, title=item.title) for i, item in enumerate(_flatten_toc(template.toc))]
+        self.events: List[GenerationEvent] = []
+        self._event_ids: List[int] = []
+        self._next_event_id = 1
+        # Replaced after every publish; waiters hold the old one, which is set
+        self._wakeup = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        self.events.append(GenerationEvent(self._next_event_id, event, data))
+        self._event_ids.append(self._next_event_id)
+        self._next_event_id += 1
+        self._track_progress(event, data)
+        if event == "section-completed":
+            # The completed section supersedes its token deltas; replaying them to a
+            # reconnecting client would only repeat text it is about to receive whole
+            self.events = [
+                e for e in self.events if e.event != "token-delta" or e.data["index"] != data["index"]
+            ]
+            self._event_ids = [e.id for e in self.events]
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def _track_progress(self, event: str, data: Dict[str, Any]) -> None:
+        if event == "section-started":
+            progress = self.sections[data["index"]]
+            progress.status = "running"
+            progress.started_at = datetime.now()
+        elif event == "token-delta":
+            self.sections[data["index"]].characters += len(data["delta"])
+        elif event == "section-completed":
+            progress = self.sections[data["index"]]
+            progress.status = "completed"
+            progress.characters = len(data["section"]["content"])
+            progress.seconds = data["seconds"]
+
+    def job_status(self) -> GenerationJobStatus:
+        return GenerationJobStatus(
+            job_id=self.id,
+            session_id=self.session_id,
+            title=self.template.name,
+            status=self.status,
+            sections_total=len(self.sections),
+            sections_completed=sum(1 for section in self.sections if section.status == "completed"),
+            sections=self.sections,
+            error=self.error,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            elapsed_seconds=((self.finished_at or datetime.now()) - self.created_at).total_seconds()
+        )
+
+    async def stream(self, last_event_id: int = 0) -> AsyncIterator[Optional[GenerationEvent]]:
+        """
+        Events after last_event_id, waiting for new ones until the run is done.
+        Yields None after GENERATION_HEARTBEAT_SECONDS without an event so idle
+        connections can be kept alive.
+        """
+        while True:
+            wakeup = self._wakeup
+            start = bisect.bisect_right(self._event_ids, last_event_id)
+            for event in self.events[start:]:
+                last_event_id = event.id
+                yield event
+            if self.done and (not self._event_ids or self._event_ids[-1] <= last_event_id):
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=settings.GENERATION_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+
+
+class GenerationRunService:
+    """
+    Starts generation runs as asyncio tasks and keeps them, finished ones for
+    GENERATION_RUN_RETENTION_MINUTES, so clients can reconnect or fetch results.
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, GenerationRun] = {}
+
+    def start(self, session_id: str, template: Template) -> GenerationRun:
+        self._prune()
+        run = GenerationRun(session_id, template)
+        self._runs[run.id] = run
+        run.task = asyncio.create_task(self._run(run))
+        print(f"🚀 Started generation run {run.id} for session {session_id}")
+        return run
+
+    def get(self, run_id: str) -> Optional[GenerationRun]:
+        return self._runs.get(run_id)
+
+    async def cancel(self, run: GenerationRun) -> GenerationRun:
+        """
+        Stop a run. Its in-flight LLM streams are closed, releasing their
+        connections and the index lease straight away; finished sections are discarded.
+        """
+        if not run.done and run.task is not None:
+            run.task.cancel()
+            # The run records its cancellation before the task ends
+            await asyncio.wait({run.task})
+            if not run.done:
+                # Cancelled before it ever started running
+                run.status = "cancelled"
+                run.finished_at = datetime.now()
+                run.publish("cancelled", {"run_id": run.id})
+        return run
+
+    async def _run(self, run: GenerationRun) -> None:
+        run.publish("run-started", {"run_id": run.id, "session_id": run.session_id, "title": run.template.name})
+        try:
+            run.document = await generate_full_document(run.session_id, run.template, on_event=run.publish)
+            run.status = "completed"
+            run.publish("document-completed", {"document": run.document.model_dump(mode="json")})
+        except asyncio.CancelledError:
+            print(f"🛑 Generation run {run.id} cancelled")
+            run.status = "cancelled"
+            run.publish("cancelled", {"run_id": run.id})
+        except Exception as e:
+            print(f"❌ Generation run {run.id} failed: {e}")
+            run.status = "failed"
+            run.error = str(e)
+            run.publish("error", {"detail": f"Generation failed: {e}"})
+        finally:
+            run.finished_at = datetime.now()
+
+    def _prune(self) -> None:
+        """Forget finished runs past their retention"""
+        cutoff = datetime.now() - timedelta(minutes=settings.GENERATION_RUN_RETENTION_MINUTES)
+        for run_id, run in list(self._runs.items()):
+            if run.finished_at is not None and run.finished_at < cutoff:
+                del self._runs[run_id]
+
+
+# Global instance shared by the generation endpoints
+generation_runs = GenerationRunService()
@@ -5,8 +5,15 @@ from ..core.config import settings
 from .citation_tracker import CitationTracker
 from ..models.citation_tracker import CitationConfig, ChunkCitation, InlineCitation
 from ..models.document import GeneratedSection, RefinementRequest
+from typing import Any, Callable, Dict, List, Optional
 import uuid
 import asyncio
+import time
+
+SECTION_TOP_K = 8  # Increased from 5 to get more context
+
+# Receives generation progress as (event name, JSON-serializable payload)
+EventCallback = Callable[[str, Dict[str, Any]], None]
 
 # Dynamic prompts based on context
 SECTION_SYNTHESIS_PROMPT = """You are an expert technical writer. Your task is to write a comprehensive section for "{section_title}" based EXCLUSIVELY on the retrieved content from uploaded source documents.
@@ -71,8 +78,11 @@ class GenerationService:
         self.citation_service = CitationService()
         self.citation_tracker = CitationTracker(CitationConfig())
 
-    async def synthesize_section(self, section_title: str, rag_service: RAGService, use_graph_mode: str = "local", session_id: str = "default", document_id: str = None) -> GeneratedSection:
-        """Generate a section using RAG and LLM"""
+    async def synthesize_section(self, section_title: str, rag_service: RAGService, use_graph_mode: str = "local", session_id: str = "default", document_id: str = None, retrieved_docs: Optional[List[dict]] = None, on_token: Optional[Callable[[str], None]] = None) -> GeneratedSection:
+        """
+        Generate a section using RAG and LLM; retrieved_docs skips retrieval when already fetched in a batch.
+        With on_token the LLM response is streamed and each text delta passed to it as it arrives.
+        """
         try:
             print(f"🔍 Generating section: '{section_title}'")
             
@@ -89,12 +99,13 @@ class GenerationService:
                 print(f"✅ Found existing citation registry with {len(citation_registry.inline_citations)} citations")
             
             # Get relevant content from uploaded documents with expanded search
-            retrieved_docs = await rag_service.retrieve_relevant_content(
-                query=section_title,
-                file_paths=[],  # RAG service already has the files
-                top_k=8,  # Increased from 5 to get more context
-                mode=use_graph_mode  # Pass GraphRAG mode (local/global)
-            )
+            if retrieved_docs is None:
+                retrieved_docs = await rag_service.retrieve_relevant_content(
+                    query=section_title,
+                    file_paths=[],  # RAG service already has the files
+                    top_k=SECTION_TOP_K,
+                    mode=use_graph_mode  # Pass GraphRAG mode (local/global)
+                )
             
             print(f"📄 Retrieved {len(retrieved_docs)} documents for '{section_title}'")
             
@@ -151,7 +162,15 @@ Once relevant source material is available, this section can be regenerated with
                 context_parts = []
                 for i, doc in enumerate(retrieved_docs):
                     content_preview = doc.get('content', '')[:200] + '...' if len(doc.get('content', '')) > 200 else doc.get('content', '')
-                    context_parts.append(f"""[Source {i+1}: {doc.get('source', 'Unknown')}]
+                    # Deduplicated chunks list every document and page the text appears on
+                    metadata = doc.get('metadata', {})
+                    cited = (metadata.get('file_path'), metadata.get('page'))
+                    also_in = "; ".join(
+                        f"{location['source']} p. {location['page']}" for location in metadata.get('locations', [])
+                        if (location['file_path'], location['page']) != cited
+                    )
+                    source_label = f"{doc.get('source', 'Unknown')} (also in {also_in})" if also_in else doc.get('source', 'Unknown')
+                    context_parts.append(f"""[Source {i+1}: {source_label}]
 {doc.get('content', '')}""")
                 
                 context_text = "\n\n" + "="*50 + "\n\n".join(context_parts)
@@ -165,13 +184,22 @@ Once relevant source material is available, this section can be regenerated with
                 )
                 
                 # Generate content using LLM
-                response = await asyncio.to_thread(self.llm.invoke, prompt)
-                
-                # Extract response text
-                if hasattr(response, 'content'):
-                    content = response.content
+                if on_token is not None:
+                    deltas = []
+                    async for chunk in self.llm.astream(prompt):
+                        delta = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                        if delta:
+                            deltas.append(delta)
+                            on_token(delta)
+                    content = "".join(deltas)
                 else:
-                    content = str(response)
+                    response = await asyncio.to_thread(self.llm.invoke, prompt)
+                    
+                    # Extract response text
+                    if hasattr(response, 'content'):
+                        content = response.content
+                    else:
+                        content = str(response)
                 
                 # Remove any References sections that the LLM might have generated
                 content = self._remove_references_from_content(content)
@@ -294,6 +322,72 @@ Please contact support if this error persists after following the recommended ac
                 source_count=0
             )
 
+    async def synthesize_sections(self, section_titles: List[str], rag_service: RAGService, session_id: str,
+                                  document_id: str, retrieved: List[List[dict]],
+                                  on_event: Optional[EventCallback] = None) -> List[GeneratedSection]:
+        """
+        Generate sections concurrently, at most GENERATION_MAX_CONCURRENCY at a time.
+        Each section cites into its own scratch registry, merged into the document
+        registry in TOC order with its [n] markers renumbered, so citation numbers
+        match sequential generation however sections finish.
+        
+        on_event receives section-started and token-delta events as they happen, and
+        section-completed and citations-updated once a section and every section
+        before it are done (that is when its citation numbers are final).
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.GENERATION_MAX_CONCURRENCY))
+        section_ids = [f"{document_id}-section-{uuid.uuid4()}" for _ in section_titles]
+        registry = self.citation_tracker.get_registry(document_id)
+        if not registry:
+            registry = self.citation_tracker.create_registry(document_id, session_id)
+        emit = on_event or (lambda event, data: None)
+        completed: Dict[int, GeneratedSection] = {}
+        seconds: Dict[int, float] = {}
+        merged = 0
+        
+        def merge_completed_prefix() -> None:
+            nonlocal merged
+            while merged in completed:
+                section = completed[merged]
+                section_registry = self.citation_tracker.get_registry(section_ids[merged])
+                known = len(registry.inline_citations)
+                if section_registry:
+                    numbers = registry.merge(section_registry)
+                    section.content = self.citation_tracker.renumber_citations(section.content, numbers)
+                emit("section-completed", {"index": merged, "section": section.model_dump(), "seconds": seconds[merged]})
+                if len(registry.inline_citations) > known:
+                    emit("citations-updated", {
+                        "citations": [citation_payload(cite) for cite in registry.inline_citations[known:]],
+                        "total": len(registry.inline_citations)
+                    })
+                merged += 1
+        
+        async def generate(i: int) -> GeneratedSection:
+            async with semaphore:
+                print(f"Generating section {i+1}/{len(section_titles)}: {section_titles[i]}")
+                emit("section-started", {"index": i, "title": section_titles[i]})
+                started = time.perf_counter()
+                section = await self.synthesize_section(
+                    section_titles[i],
+                    rag_service,
+                    session_id=session_id,
+                    document_id=section_ids[i],
+                    retrieved_docs=retrieved[i],
+                    on_token=(lambda delta: emit("token-delta", {"index": i, "delta": delta})) if on_event else None
+                )
+                seconds[i] = round(time.perf_counter() - started, 3)
+            completed[i] = section
+            merge_completed_prefix()
+            return section
+        
+        try:
+            sections = await asyncio.gather(*(generate(i) for i in range(len(section_titles))))
+            print(f"🔗 Merged citations of {len(sections)} sections: {len(registry.inline_citations)} in document registry")
+            return list(sections)
+        finally:
+            for section_id in section_ids:
+                self.citation_tracker.registries.pop(section_id, None)
+
     async def refine_section(self, request: RefinementRequest) -> str:
         """Refine a section based on user feedback"""
         try:
@@ -412,3 +506,24 @@ Please contact support if this error persists after following the recommended ac
             content = re.sub(pattern, '', content, flags=re.MULTILINE)
         
         return content.strip()
+
+
+def citation_payload(inline_citation: InlineCitation) -> Dict[str, Any]:
+    """API representation of a document citation, as returned with generated documents"""
+    chunk_citation = inline_citation.chunk_citation
+    return {
+        "id": inline_citation.citation_number,
+        "citation_number": inline_citation.citation_number,
+        "text": chunk_citation.text_excerpt,
+        "source": chunk_citation.pdf_name,
+        "page": chunk_citation.page_number,
+        "hover_content": f"{chunk_citation.text_excerpt[:100]}... - {chunk_citation.pdf_name}, p. {chunk_citation.page_number}",
+        "chunk_citation": {
+            "chunk_id": chunk_citation.chunk_id,
+            "pdf_name": chunk_citation.pdf_name,
+            "page_number": chunk_citation.page_number,
+            "text_excerpt": chunk_citation.text_excerpt,
+            "authors": chunk_citation.authors or [],
+            "external_link": chunk_citation.external_link
+        }
+    }
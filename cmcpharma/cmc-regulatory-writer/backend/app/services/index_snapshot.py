@@ -0,0 +1,147 @@
+"""
+On-disk snapshots of per-session FAISS indexes with a manifest for invalidation
+"""
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+
+from ..utils.helpers import calculate_file_hash
+from .chunk_dedup import NearDuplicateIndex
+from .chunk_store import ChunkStore
+from .lexical_index import LexicalIndex
+from .vector_index import configure_search
+
+INDEX_FILE = "index.faiss"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 3
+
+
+def build_file_entries(file_paths: List[str], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Describe each file by content hash, reusing hashes from a previous manifest
+    when size and mtime are unchanged so warm starts don't re-read every upload.
+    """
+    previous_files = (previous or {}).get("files", {})
+    entries = {}
+    for path in file_paths:
+        stat = os.stat(path)
+        name = os.path.basename(path)
+        old = previous_files.get(name)
+        if old and old.get("size") == stat.st_size and old.get("mtime_ns") == stat.st_mtime_ns:
+            file_hash = old["sha256"]
+        else:
+            file_hash = calculate_file_hash(path)
+        entries[name] = {"sha256": file_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return entries
+
+
+def build_manifest(file_paths: List[str], params: Dict[str, Any], ntotal: int,
+                   previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Manifest describing exactly what a snapshot was built from"""
+    return {
+        "version": MANIFEST_VERSION,
+        "files": build_file_entries(file_paths, previous),
+        "params": params,
+        "ntotal": ntotal,
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def manifest_matches(manifest: Optional[Dict[str, Any]], file_paths: List[str], params: Dict[str, Any]) -> bool:
+    """True when the snapshot was built from these exact files and parameters"""
+    if not manifest or manifest.get("version") != MANIFEST_VERSION or manifest.get("params") != params:
+        return False
+    try:
+        current = build_file_entries(file_paths, manifest)
+    except OSError:
+        return False
+    recorded = manifest.get("files", {})
+    if set(current) != set(recorded):
+        return False
+    return all(current[name]["sha256"] == recorded[name]["sha256"] for name in current)
+
+
+def save_snapshot(index_dir: str, index: faiss.Index, chunks: ChunkStore, lexical: LexicalIndex,
+                  file_paths: List[str], params: Dict[str, Any], compression: str = "none",
+                  duplicates: Optional[NearDuplicateIndex] = None) -> None:
+    """
+    Write index, chunk store, lexical index, near-duplicate index (when given)
+    and manifest; the manifest goes last and marks the snapshot valid
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    previous = read_manifest(index_dir)
+
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    faiss.write_index(index, index_path + ".tmp")
+    os.replace(index_path + ".tmp", index_path)
+
+    chunks.save(index_dir, compression)
+    lexical.save(index_dir)
+    if duplicates is not None:
+        duplicates.save(index_dir)
+
+    manifest = build_manifest(file_paths, params, index.ntotal, previous)
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    print(f"💾 Saved RAG index snapshot ({index.ntotal} vectors) to {index_dir}")
+
+
+def load_snapshot(index_dir: str, file_paths: List[str], params: Dict[str, Any]
+                  ) -> Optional[Tuple[faiss.Index, ChunkStore, LexicalIndex, Optional[NearDuplicateIndex]]]:
+    """
+    Load a snapshot if its manifest still matches the files, else None.
+    Index, chunk store and lexical index are memory-mapped read-only so large sessions start without copying.
+    The near-duplicate index is None when dedup is off or it wasn't saved; callers rebuild it on demand.
+    """
+    manifest = read_manifest(index_dir)
+    if not manifest_matches(manifest, file_paths, params):
+        if manifest:
+            print(f"♻️ RAG index snapshot in {index_dir} is stale, rebuilding")
+        return None
+
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    try:
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Older FAISS builds can't mmap every index type
+            index = faiss.read_index(index_path)
+        configure_search(index)
+        chunks = ChunkStore.load(index_dir)
+        lexical = LexicalIndex.load(index_dir)
+    except Exception as e:
+        print(f"Warning: Could not load RAG index snapshot from {index_dir}. Error: {e}")
+        return None
+
+    if index.ntotal != manifest.get("ntotal") or len(chunks) != index.ntotal or len(lexical) != index.ntotal:
+        print(f"♻️ RAG index snapshot in {index_dir} is incomplete, rebuilding")
+        return None
+
+    print(f"⚡ Loaded RAG index snapshot ({index.ntotal} vectors) from {index_dir}")
+    return index, chunks, lexical, _load_duplicates(index_dir, chunks, params)
+
+
+def _load_duplicates(index_dir: str, chunks: ChunkStore, params: Dict[str, Any]) -> Optional[NearDuplicateIndex]:
+    threshold = params.get("dedup_threshold")
+    if threshold is None:
+        return None
+    try:
+        duplicates = NearDuplicateIndex.load(index_dir, chunks.text, threshold)
+    except (OSError, ValueError, KeyError):
+        return None
+    # Left over from an earlier snapshot of different chunks
+    return duplicates if duplicates.chunk_count == len(chunks) else None
@@ -0,0 +1,157 @@
+"""
+Background ingestion of uploads (parse -> chunk -> embed -> index) into the session's RAG index
+"""
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from ..models.file import IngestionStatus, SessionIngestionStatus
+from .file_manager import FileManager
+from .rag_registry import rag_registry
+
+
+class IngestionService:
+    """
+    Runs ingestion as asyncio tasks so uploads return immediately.
+
+    Runs are serialized per session: each run indexes every file currently in
+    the session, so uploads that arrive while a run is in flight are picked up
+    together by the next one.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, IngestionStatus]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: Dict[str, Set[asyncio.Task]] = {}
+
+    def enqueue(self, session_id: str, file_name: str) -> IngestionStatus:
+        """Queue a freshly uploaded file for ingestion and return its status record"""
+        job = IngestionStatus(file_name=file_name, queued_at=datetime.now())
+        self._jobs.setdefault(session_id, {})[file_name] = job
+
+        task = asyncio.create_task(self._run(session_id))
+        tasks = self._tasks.setdefault(session_id, set())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        print(f"📥 Queued ingestion of {file_name} for session {session_id}")
+        return job
+
+    async def wait_for_session(self, session_id: str) -> None:
+        """Wait until every queued or running ingestion for the session has finished"""
+        pending = list(self._tasks.get(session_id, ()))
+        if pending:
+            print(f"⏳ Waiting on {len(pending)} in-flight ingestion runs for session {session_id}")
+            # Shielded: a cancelled waiter (e.g. a cancelled generation job) must not cancel
+            # ingestion runs that other requests share
+            await asyncio.shield(asyncio.gather(*pending, return_exceptions=True))
+
+    def is_ingesting(self) -> bool:
+        """Whether any session has an ingestion run queued or in flight"""
+        return any(self._tasks.values())
+
+    def get_file_status(self, session_id: str, file_name: str) -> Optional[IngestionStatus]:
+        job = self._jobs.get(session_id, {}).get(file_name)
+        if job is not None:
+            return self._with_progress(session_id, job)
+        file_manager = FileManager(session_id)
+        if os.path.basename(file_name) in [os.path.basename(p) for p in file_manager.get_session_file_paths()]:
+            # Uploaded before this process started; it is indexed on first use
+            return IngestionStatus(file_name=file_name, status="not_queued")
+        return None
+
+    def get_session_status(self, session_id: str) -> SessionIngestionStatus:
+        jobs = self._jobs.get(session_id, {})
+        files: List[IngestionStatus] = []
+        for path in FileManager(session_id).get_session_file_paths():
+            file_name = os.path.basename(path)
+            job = jobs.get(file_name)
+            files.append(self._with_progress(session_id, job) if job else IngestionStatus(file_name=file_name, status="not_queued"))
+
+        states = {job.status for job in files}
+        if states & {"queued", "running"}:
+            status = "ingesting"
+        elif "failed" in states:
+            status = "failed"
+        elif "ready" in states:
+            status = "ready"
+        else:
+            status = "idle"
+        return SessionIngestionStatus(session_id=session_id, status=status, files=files)
+
+    def _with_progress(self, session_id: str, job: IngestionStatus) -> IngestionStatus:
+        """Fill in per-page progress from the index that is being built for a running job"""
+        if job.status != "running":
+            return job
+        rag_service = rag_registry.building(session_id)
+        if rag_service is None:
+            return job
+        for file_path, progress in rag_service.progress.items():
+            if os.path.basename(file_path) == job.file_name:
+                return job.model_copy(update=progress)
+        return job
+
+    async def _run(self, session_id: str) -> None:
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            jobs = [job for job in self._jobs.get(session_id, {}).values() if job.status == "queued"]
+            if not jobs:
+                # An earlier run already covered these files
+                return
+
+            started_at = datetime.now()
+            for job in jobs:
+                job.status = "running"
+                job.started_at = started_at
+
+            file_manager = FileManager(session_id)
+            for job in jobs:
+                file_manager.manifest.update(job.file_name, index_state="indexing")
+            try:
+                # Building through the registry leaves a warm, persisted index behind
+                async with rag_registry.lease(
+                    session_id,
+                    file_manager.get_session_file_paths(),
+                    index_dir=file_manager.index_dir,
+                    version=file_manager.manifest_version
+                ) as rag_service:
+                    self._record_index_state(file_manager, rag_service)
+                status, error = "ready", None
+                print(f"✅ Ingested {len(jobs)} files for session {session_id}")
+            except Exception as e:
+                status, error = "failed", str(e)
+                for job in jobs:
+                    file_manager.manifest.update(job.file_name, index_state="failed")
+                print(f"❌ Ingestion failed for session {session_id}: {e}")
+            except asyncio.CancelledError:
+                # Finish the jobs before the task ends, or they would show as running forever
+                finished_at = datetime.now()
+                for job in jobs:
+                    file_manager.manifest.update(job.file_name, index_state="failed")
+                    job.status = "failed"
+                    job.error = "Ingestion was cancelled"
+                    job.finished_at = finished_at
+                print(f"🛑 Ingestion cancelled for session {session_id}")
+                raise
+
+            finished_at = datetime.now()
+            for job in jobs:
+                job.status = status
+                job.error = error
+                job.finished_at = finished_at
+
+    def _record_index_state(self, file_manager: FileManager, rag_service) -> None:
+        """Copy per-file page/chunk counts and parse times into the session manifest"""
+        for file_path in file_manager.get_session_file_paths():
+            name = os.path.basename(file_path)
+            if file_path in rag_service.file_errors:
+                file_manager.manifest.update(name, index_state="failed")
+            elif file_path in rag_service.file_stats:
+                file_manager.manifest.update(name, index_state="indexed", **rag_service.file_stats[file_path])
+            else:
+                # Already indexed by an earlier run or loaded from a snapshot
+                file_manager.manifest.update(name, index_state="indexed")
+
+
+# Global ingestion service shared by the upload and generation endpoints
+ingestion_service = IngestionService()
@@ -0,0 +1,215 @@
+"""
+BM25 inverted index over RAG chunks, built alongside the vector index.
+
+Embeddings blur exact identifiers (batch and CAS numbers, impurity names,
+method IDs); a lexical ranking keeps them findable. Postings are packed arrays
+of chunk ids and term frequencies, saved next to the chunk store and
+memory-mapped back like it.
+"""
+import json
+import math
+import os
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ARRAYS_FILE = "lexical.{name}.npy"
+TERMS_FILE = "lexical.json"
+
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+MAX_TF = 65535  # term frequencies are stored as uint16
+
+# Identifiers stay whole ("3.2.s.4.1", "7732-18-5", "b-2023/001"); their parts
+# are indexed as well so "impurity b" still matches "impurity-b"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+_TOKEN_PARTS = re.compile(r"[-./]")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in _TOKEN_PARTS.split(token) if part)
+    return tokens
+
+
+class LexicalIndex:
+    def __init__(self):
+        # Growable postings while building: term -> (chunk ids, term frequencies)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_lengths = array("i")
+        self._total_length = 0
+        # Set when loaded from disk: term ids into flat, memory-mapped posting arrays
+        self._term_ids: Optional[Dict[str, int]] = None
+        self._offsets = None
+        self._docs = None
+        self._tfs = None
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, texts: Sequence[str]) -> None:
+        """Index chunks; they get consecutive ids after the ones already indexed"""
+        self._make_writable()
+        for text in texts:
+            doc = len(self._doc_lengths)
+            counts: Dict[str, int] = {}
+            tokens = tokenize(text)
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, count in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("i"), array("H"))
+                postings[0].append(doc)
+                postings[1].append(min(count, MAX_TF))
+            self._doc_lengths.append(len(tokens))
+            self._total_length += len(tokens)
+
+    def _make_writable(self) -> None:
+        """Unpack memory-mapped postings into per-term arrays before adding"""
+        if self._term_ids is None:
+            return
+        postings = {}
+        for term, term_id in self._term_ids.items():
+            start, end = int(self._offsets[term_id]), int(self._offsets[term_id + 1])
+            postings[term] = (
+                array("i", self._docs[start:end].astype(np.int32).tobytes()),
+                array("H", self._tfs[start:end].astype(np.uint16).tobytes())
+            )
+        self._postings = postings
+        self._doc_lengths = array("i", np.asarray(self._doc_lengths, dtype=np.int32).tobytes())
+        self._term_ids = self._offsets = self._docs = self._tfs = None
+
+    def _term_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if self._term_ids is not None:
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                return None
+            start, end = int(self._offsets[term_id]), int(self._offsets[term_id + 1])
+            return self._docs[start:end], self._tfs[start:end]
+        postings = self._postings.get(term)
+        if postings is None:
+            return None
+        return np.frombuffer(postings[0], dtype=np.int32), np.frombuffer(postings[1], dtype=np.uint16)
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> List[int]:
+        """Ids of the k chunks with the highest BM25 score for the query, best first, only from allowed chunks if given"""
+        count = len(self)
+        if not count or k <= 0:
+            return []
+        doc_lengths = self._doc_lengths
+        if not isinstance(doc_lengths, np.ndarray):
+            doc_lengths = np.frombuffer(doc_lengths, dtype=np.int32)
+        average_length = max(self._total_length / count, 1.0)
+
+        matched_docs, matched_scores = [], []
+        for term in set(tokenize(query)):
+            postings = self._term_postings(term)
+            if postings is None:
+                continue
+            docs, tfs = postings
+            # IDF comes from the whole corpus so scores don't depend on the filter
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            if allowed is not None:
+                keep = allowed[docs]
+                docs, tfs = docs[keep], tfs[keep]
+                if not len(docs):
+                    continue
+            tfs = tfs.astype(np.float32)
+            norms = K1 * (1 - B + B * doc_lengths[docs].astype(np.float32) / average_length)
+            matched_docs.append(docs)
+            matched_scores.append(idf * tfs * (K1 + 1) / (tfs + norms))
+        if not matched_docs:
+            return []
+
+        docs, positions = np.unique(np.concatenate(matched_docs), return_inverse=True)
+        scores = np.bincount(positions, weights=np.concatenate(matched_scores))
+        if len(docs) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(docs))
+        # Ties keep chunk order so results are deterministic
+        top = top[np.lexsort((docs[top], -scores[top]))]
+        return [int(doc) for doc in docs[top]]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by postings and document lengths"""
+        if self._term_ids is not None:
+            posting_bytes = self._offsets.nbytes + self._docs.nbytes + self._tfs.nbytes
+        else:
+            posting_bytes = sum(
+                len(docs) * docs.itemsize + len(tfs) * tfs.itemsize for docs, tfs in self._postings.values()
+            )
+        return posting_bytes + len(self._doc_lengths) * 4
+
+    def save(self, directory: str) -> None:
+        """Write postings as flat arrays plus the term list; each file is replaced atomically"""
+        os.makedirs(directory, exist_ok=True)
+        self._make_writable()
+        terms = sorted(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self._postings[term][0]) for term in terms])
+
+        def write_array(name: str, values: np.ndarray) -> None:
+            path = os.path.join(directory, ARRAYS_FILE.format(name=name))
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, values)
+            os.replace(path + ".tmp", path)
+
+        def concatenated(position: int, dtype) -> np.ndarray:
+            parts = [np.frombuffer(self._postings[term][position], dtype=dtype) for term in terms]
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        write_array("offsets", offsets)
+        write_array("docs", concatenated(0, np.int32))
+        write_array("tfs", concatenated(1, np.uint16))
+        write_array("lengths", np.frombuffer(self._doc_lengths, dtype=np.int32))
+        path = os.path.join(directory, TERMS_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"total_length": self._total_length, "terms": terms}, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, directory: str) -> "LexicalIndex":
+        """Open a saved index with its posting arrays memory-mapped read-only"""
+        with open(os.path.join(directory, TERMS_FILE), "r", encoding="utf-8") as f:
+            header = json.load(f)
+
+        def read_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, ARRAYS_FILE.format(name=name)), mmap_mode="r")
+
+        index = cls()
+        index._term_ids = {term: i for i, term in enumerate(header["terms"])}
+        index._total_length = header["total_length"]
+        index._offsets = read_array("offsets")
+        index._docs = read_array("docs")
+        index._tfs = read_array("tfs")
+        index._doc_lengths = read_array("lengths")
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[int]], k: int, constant: int = 60) -> List[int]:
+    """
+    Merge ranked id lists by summing 1 / (constant + rank) per id.
+
+    Args:
+        rankings: Id lists, each ordered best first
+        k: Number of ids to return
+        constant: Damping for top ranks; 60 is the value from the original RRF paper
+
+    Returns:
+        The k ids with the highest fused score, best first
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (constant + rank + 1)
+    # Sort is stable, so ties keep the order of the first ranking they appear in
+    return sorted(scores, key=scores.get, reverse=True)[:k]
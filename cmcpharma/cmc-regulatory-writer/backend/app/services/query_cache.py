@@ -0,0 +1,67 @@
+"""
+In-memory LRU caches for repeated retrieval queries, with hit-rate counters
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+from ..core.config import settings
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used map of bounded size.
+
+    Several caches may share one CacheStats so per-index caches report a
+    single process-wide hit rate.
+    """
+
+    def __init__(self, capacity: int, stats: Optional[CacheStats] = None):
+        self.capacity = capacity
+        self.stats = stats or CacheStats()
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.stats.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+# Query embeddings depend only on model and text, so one cache serves every index
+query_embedding_cache = LRUCache(settings.RAG_QUERY_CACHE_SIZE)
+# Each RAGService keeps its own result cache; they all count into these stats
+retrieval_result_stats = CacheStats()
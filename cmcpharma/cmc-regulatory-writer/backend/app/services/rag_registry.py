@@ -0,0 +1,226 @@
+"""
+Process-wide registry of built RAG indexes shared by generation, chat and suggest-edit
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from ..core.config import settings
+from ..utils.helpers import hash_string
+from .rag_service import RAGService
+
+# Scope used by callers that search every upload rather than a single session
+ALL_UPLOADS_SCOPE = "__all_uploads__"
+
+
+def file_signature(path: str) -> str:
+    """Cheap change marker for a single file based on path, size and mtime"""
+    try:
+        stat = os.stat(path)
+        return f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+    except OSError:
+        return f"{path}|missing"
+
+
+def file_set_version(file_paths: List[str]) -> str:
+    """Cheap version tag for a set of files"""
+    return hash_string("\n".join(file_signature(path) for path in sorted(file_paths)))
+
+
+@dataclass
+class _RegistryEntry:
+    service: RAGService
+    signatures: Set[str]
+    refcount: int = 0
+    stale: bool = False
+    # Ingestion still running in a worker thread; the service is queryable meanwhile
+    build_task: Optional[asyncio.Task] = None
+
+    @property
+    def building(self) -> bool:
+        return self.build_task is not None and not self.build_task.done()
+
+
+@dataclass
+class RegistryStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class RAGIndexRegistry:
+    """
+    Keeps built RAGService instances keyed by (scope, file-set version).
+
+    Entries are reference counted while in use and evicted least-recently-used
+    first once the estimated memory of idle entries exceeds the budget.
+    """
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None):
+        if memory_budget_bytes is None:
+            memory_budget_bytes = settings.RAG_INDEX_MEMORY_BUDGET_MB * 1024 * 1024
+        self.memory_budget_bytes = memory_budget_bytes
+        self._entries: "OrderedDict[Tuple[str, str], _RegistryEntry]" = OrderedDict()
+        self._build_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.stats = RegistryStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        # Measured live so indexes that are still growing count against the budget
+        return sum(entry.service.memory_bytes() for entry in self._entries.values())
+
+    async def acquire(self, scope: str, file_paths: List[str], index_dir: Optional[str] = None,
+                      version: Optional[str] = None, wait: bool = True) -> RAGService:
+        """
+        Return a warm index for the files, building it if needed. Pair with release().
+        With index_dir, builds are persisted there and later loaded instead of re-embedded.
+        version (e.g. a session manifest version) saves stat-ing every file to key the index.
+        With wait=False an index that is still ingesting is returned straight away and
+        answers from the pages embedded so far.
+        """
+        key = (scope, version or file_set_version(file_paths))
+
+        entry = self._entries.get(key)
+        if entry is None:
+            lock = self._build_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                # Another request may have finished building while we waited
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.stats.misses += 1
+                    entry = await self._extend_or_build(scope, file_paths, index_dir)
+                    self._mark_older_versions_stale(key)
+                    self._entries[key] = entry
+                else:
+                    self.stats.hits += 1
+            self._build_locks.pop(key, None)
+        else:
+            self.stats.hits += 1
+
+        entry.refcount += 1
+        self._entries.move_to_end(key)
+        if wait and entry.building:
+            try:
+                # Shielded so one caller giving up doesn't cancel ingestion for everyone
+                await asyncio.shield(entry.build_task)
+            except BaseException:
+                entry.refcount -= 1
+                raise
+        self._evict()
+        return entry.service
+
+    def building(self, scope: str) -> Optional[RAGService]:
+        """The index for a scope that is still ingesting, if any (for progress reporting)"""
+        for key, entry in self._entries.items():
+            if key[0] == scope and entry.building:
+                return entry.service
+        return None
+
+    async def _extend_or_build(self, scope: str, file_paths: List[str], index_dir: Optional[str]) -> _RegistryEntry:
+        """
+        Grow an idle index for the same scope when only new files were added, else start a
+        new one. Ingestion runs in a background task; the entry is usable immediately.
+        """
+        signatures = {file_signature(path) for path in file_paths}
+        for key, entry in list(self._entries.items()):
+            if key[0] == scope and entry.refcount == 0 and not entry.building and entry.signatures <= signatures:
+                new_paths = [path for path in file_paths if path not in entry.service.file_paths]
+                print(f"➕ Extending RAG index for scope '{scope}' with {len(new_paths)} new files")
+                # Re-keyed by the caller; the old file-set version no longer describes it
+                del self._entries[key]
+                entry.signatures = signatures
+                entry.build_task = self._start_ingestion(scope, entry, entry.service.add_documents, new_paths)
+                return entry
+        
+        print(f"🏗️ Building RAG index for scope '{scope}' ({len(file_paths)} files)")
+        # Only loads a matching snapshot; ingestion, if needed, runs in the background
+        service = await asyncio.to_thread(RAGService, file_paths=list(file_paths), index_dir=index_dir, build=False)
+        entry = _RegistryEntry(service=service, signatures=signatures)
+        if not service.is_ready:
+            entry.build_task = self._start_ingestion(scope, entry, service.build)
+        return entry
+
+    def _start_ingestion(self, scope: str, entry: _RegistryEntry, run, *args) -> asyncio.Task:
+        async def ingest():
+            try:
+                await asyncio.to_thread(run, *args)
+            except Exception as e:
+                print(f"❌ RAG ingestion failed for scope '{scope}': {e}")
+                # Never hand out a half-built index that will not finish
+                for key, candidate in list(self._entries.items()):
+                    if candidate is entry:
+                        del self._entries[key]
+                raise
+            finally:
+                self._evict()
+
+        task = asyncio.create_task(ingest())
+        # Waiters see the exception; this only stops asyncio warning when nobody waited
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    def release(self, service: RAGService) -> None:
+        """Drop one reference to a service obtained from acquire()"""
+        for key, entry in list(self._entries.items()):
+            if entry.service is service:
+                entry.refcount = max(0, entry.refcount - 1)
+                if entry.stale and entry.refcount == 0:
+                    del self._entries[key]
+                    self.stats.evictions += 1
+                break
+        self._evict()
+
+    @asynccontextmanager
+    async def lease(self, scope: str, file_paths: List[str], index_dir: Optional[str] = None,
+                    version: Optional[str] = None, wait: bool = True) -> AsyncIterator[RAGService]:
+        """Context manager around acquire()/release()"""
+        service = await self.acquire(scope, file_paths, index_dir, version, wait)
+        try:
+            yield service
+        finally:
+            self.release(service)
+
+    def invalidate(self, scope: str) -> None:
+        """Forget every index for a scope (in-use entries go once released)"""
+        for key, entry in list(self._entries.items()):
+            if key[0] != scope:
+                continue
+            if entry.refcount == 0:
+                del self._entries[key]
+                self.stats.evictions += 1
+            else:
+                entry.stale = True
+
+    def _mark_older_versions_stale(self, new_key: Tuple[str, str]) -> None:
+        """A new file-set version supersedes older indexes for the same scope"""
+        for key, entry in list(self._entries.items()):
+            if key[0] == new_key[0] and key != new_key:
+                if entry.refcount == 0:
+                    del self._entries[key]
+                    self.stats.evictions += 1
+                else:
+                    entry.stale = True
+
+    def _evict(self) -> None:
+        """Evict idle entries, least recently used first, until under budget"""
+        while self.total_bytes > self.memory_budget_bytes:
+            victim = next(
+                (key for key, entry in self._entries.items() if entry.refcount == 0 and not entry.building),
+                None
+            )
+            if victim is None:
+                # Everything left is in use or ingesting; it will be reconsidered on release
+                break
+            print(f"♻️ Evicting RAG index for scope '{victim[0]}' to stay within memory budget")
+            del self._entries[victim]
+            self.stats.evictions += 1
+
+
+# Global registry storage to share warm indexes across requests and services
+rag_registry = RAGIndexRegistry()
@@ -1,139 +1,333 @@
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, field
-from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import replace
 from langchain.schema import Document
-from langchain_community.vectorstores import FAISS
 from ..core.config import settings
+from .embedding_cache import CachedEmbeddings
+from .embedding_client import create_embedding_client
+from .index_snapshot import load_snapshot, save_snapshot
+from .chunk_store import ChunkStore
+from .chunk_dedup import NearDuplicateIndex
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .query_cache import LRUCache, retrieval_result_stats
+from .vector_index import bytes_per_vector, rebuild_for_size, reconstruct, search, to_memory
+from .retrieval_filter import RetrievalFilter
+from .reranker import cosine_scores, keyword_boost, rerank
+from .document_loader import stream_pages
+from ..utils.chunker import chunk_text
 import os
 import asyncio
+import faiss
+import numpy as np
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# FASTER document splitting - smaller chunks for speed
+CHUNK_SIZE = 600      # FURTHER REDUCED for faster processing
+CHUNK_OVERLAP = 50    # FURTHER REDUCED for speed
+CHUNKER = "offset-v1"  # Changing chunk boundaries invalidates saved index snapshots
+RETRIEVER_K = 5       # Further reduced for speed
+CANDIDATE_POOL = 20   # Taken from each of the vector and BM25 rankings, fused, then reranked down to k
+# (chunk id, similarity score); score is None when the index can't give back the chunk's vector
+ScoredChunk = Tuple[int, Optional[float]]
+# Chunks are embedded and added to the index in groups of this size while pages stream in
+EMBED_FLUSH_CHUNKS = settings.EMBEDDING_BATCH_SIZE * settings.EMBEDDING_MAX_CONCURRENCY
+
 class RAGService:
-    def __init__(self, file_paths: List[str]):
-        if not settings.NVIDIA_API_KEY:
+    def __init__(self, file_paths: List[str], index_dir: Optional[str] = None, build: bool = True):
+        """
+        Load the index from a snapshot in index_dir when it still matches the files,
+        otherwise ingest them. With build=False ingestion is left to build(), so the
+        caller can share the instance (and query the partial index) while it runs.
+        """
+        if not settings.NVIDIA_API_KEY and not settings.EMBEDDING_BASE_URL:
             raise ValueError("NVIDIA_API_KEY is not set in the environment.")
         
         print("🚀 Initializing RAG with SPEED optimizations...")
         self.file_paths = file_paths
         
-        # Try FASTER embedding model
-        self.embeddings = NVIDIAEmbeddings(
-            model="nvidia/nv-embedqa-e5-v5",  # Try different model
-            api_key=settings.NVIDIA_API_KEY
+        # Try FASTER embedding model, batched and concurrent, behind a persistent
+        # cache so unchanged chunks are never sent to the embedding API twice
+        self.embeddings = CachedEmbeddings(
+            create_embedding_client(),
+            model_name=settings.EMBEDDING_MODEL
         )
-        self.documents = self._load_and_split_docs()
-        self.vector_store = self._create_vector_store()
-        # OPTIMIZED retriever settings for speed
-        self.retriever = self.vector_store.as_retriever(
-            search_type="similarity",  # Changed from "mmr" for speed
-            search_kwargs={"k": 5, "fetch_k": 8}  # Further reduced for speed
-        ) if self.vector_store else None
         
+        # Per-file ingestion stats and page progress for files parsed by this instance
+        self.file_stats: Dict[str, Dict[str, Any]] = {}
+        self.file_errors: Dict[str, str] = {}
+        self.progress: Dict[str, Dict[str, Optional[int]]] = {}
+        # Guards the FAISS index, which is searched while ingestion appends to it
+        self._index_lock = threading.Lock()
+        # Bumped on every index change; cached results from older versions are never served
+        self.index_version = 0
+        self._result_cache = LRUCache(settings.RAG_RESULT_CACHE_SIZE, stats=retrieval_result_stats)
+        
+        # Warm start from a persisted snapshot when the session's files are unchanged
+        self.index_dir = index_dir
+        snapshot = load_snapshot(self.index_dir, self.file_paths, self.index_params) if self.index_dir else None
+        
+        self._index_mapped = snapshot is not None
+        # Near-duplicate LSH index, created on the first ingestion unless the snapshot had one
+        self._duplicates: Optional[NearDuplicateIndex] = None
+        self.is_ready = snapshot is not None
+        if snapshot:
+            self.index, self.chunks, self.lexical, self._duplicates = snapshot
+            print("✅ RAG initialized successfully")
+        else:
+            self.index = None
+            self.chunks = ChunkStore()
+            self.lexical = LexicalIndex()
+            if build:
+                self.build()
+
+    def build(self):
+        """Ingest every file; the index answers queries for the pages embedded so far while this runs"""
+        self._ingest(self.file_paths)
+        self._resize_index()
+        self._save_snapshot()
+        self.is_ready = True
         print("✅ RAG initialized successfully")
 
-    def _load_and_split_docs(self) -> List[Document]:
-        all_pages = []
-        for file_path in self.file_paths:
-            try:
-                # Determine file type and use appropriate loader
-                file_extension = os.path.splitext(file_path)[1].lower()
-                
-                if file_extension == '.pdf':
-                    loader = PyPDFLoader(file_path)
-                elif file_extension in ['.txt', '.md']:
-                    loader = TextLoader(file_path, encoding='utf-8')
-                elif file_extension in ['.doc', '.docx']:
-                    loader = UnstructuredWordDocumentLoader(file_path)
+    @property
+    def index_params(self) -> Dict[str, Any]:
+        """Everything besides the files themselves that determines the index contents"""
+        return {
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "chunker": CHUNKER,
+            "index_backend": settings.RAG_INDEX_BACKEND,
+            "dedup_threshold": settings.RAG_DEDUP_THRESHOLD if settings.RAG_DEDUP else None
+        }
+
+    def _save_snapshot(self):
+        if not self.index_dir or self.index is None:
+            return
+        try:
+            save_snapshot(
+                self.index_dir,
+                self.index,
+                self.chunks,
+                self.lexical,
+                # Files that failed to load stay out of the manifest, so the next load sees
+                # the snapshot as stale and retries them instead of treating them as indexed
+                [path for path in self.file_paths if path not in self.file_errors],
+                self.index_params,
+                compression=settings.RAG_CHUNK_COMPRESSION,
+                duplicates=self._duplicate_index()
+            )
+        except Exception as e:
+            print(f"Warning: Could not save RAG index snapshot to {self.index_dir}. Error: {e}")
+
+    def _ingest(self, file_paths: List[str]):
+        """
+        Stream pages in, chunk each page as it arrives and embed every EMBED_FLUSH_CHUNKS
+        chunks, so page text is never held for a whole file and progress is visible per page
+        """
+        embedded = len(self.chunks)
+        pages_loaded = 0
+        duplicates = self._duplicate_index()
+        # Files and page ranges of large PDFs are parsed across a process pool
+        for batch in stream_pages(file_paths):
+            file_path = batch.file_path
+            if batch.error:
+                print(f"Warning: Could not load {file_path}. Error: {batch.error}")
+                self.file_errors[file_path] = batch.error
+                continue
+            
+            stats = self.file_stats.setdefault(
+                file_path, {'page_count': 0, 'chunk_count': 0, 'duplicate_chunk_count': 0, 'parse_seconds': 0.0}
+            )
+            for page in batch.pages:
+                # One pass per page; chunk text goes straight into the compact store
+                text = page.page_content
+                page_number = _page_number(page.metadata)
+                spans = chunk_text(text, CHUNK_SIZE, CHUNK_OVERLAP)
+                if duplicates is None:
+                    self.chunks.extend(file_path, page_number, [text[start:end] for start, end in spans])
+                else:
+                    for start, end in spans:
+                        # Repeated boilerplate is stored and embedded once; this location becomes an alias
+                        canonical = duplicates.add(len(self.chunks), text[start:end])
+                        if canonical is None:
+                            self.chunks.extend(file_path, page_number, [text[start:end]])
+                        else:
+                            self.chunks.add_alias(canonical, file_path, page_number)
+                            stats['duplicate_chunk_count'] += 1
+                stats['chunk_count'] += len(spans)
+            stats['page_count'] += len(batch.pages)
+            stats['parse_seconds'] += batch.parse_seconds
+            pages_loaded += len(batch.pages)
+            self.progress[file_path] = {'pages_done': stats['page_count'], 'page_count': batch.page_count}
+            
+            if batch.last:
+                if batch.cached:
+                    print(f"Successfully loaded {stats['page_count']} pages from {os.path.basename(file_path)} (page cache)")
                 else:
-                    # Try to load as text file as fallback
-                    print(f"Unknown file type {file_extension}, trying as text file: {file_path}")
-                    loader = TextLoader(file_path, encoding='utf-8')
-                
-                pages = loader.load()
-                
-                # Add source metadata while preserving existing metadata
-                for page in pages:
-                    # Preserve original metadata (especially page numbers from PDF)
-                    original_metadata = page.metadata.copy()
-                    page.metadata['source'] = os.path.basename(file_path)
-                    page.metadata['file_path'] = file_path
-                    
-                    # Ensure page number is preserved from PDF loader
-                    if 'page' in original_metadata:
-                        page.metadata['page'] = original_metadata['page']
-                    elif hasattr(page, 'page_number'):
-                        page.metadata['page'] = page.page_number
-                    else:
-                        # Try to extract from source metadata if available
-                        page_num = original_metadata.get('page_number', 1)
-                        page.metadata['page'] = page_num
-                
-                all_pages.extend(pages)
-                print(f"Successfully loaded {len(pages)} pages from {os.path.basename(file_path)}")
-                
-            except Exception as e:
-                print(f"Warning: Could not load {file_path}. Error: {e}")
+                    print(f"Successfully loaded {stats['page_count']} pages from {os.path.basename(file_path)} in {stats['parse_seconds']:.2f}s")
+            
+            if len(self.chunks) - embedded >= EMBED_FLUSH_CHUNKS:
+                self._embed_new_chunks(embedded)
+                embedded = len(self.chunks)
         
-        if not all_pages:
+        if not pages_loaded:
             print("Warning: No documents were successfully loaded.")
-            return []
-        
-        print(f"Total documents loaded: {len(all_pages)}")
-        
-        # FASTER document splitting - smaller chunks for speed
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=600,      # FURTHER REDUCED for faster processing
-            chunk_overlap=50     # FURTHER REDUCED for speed
-        )
-        split_docs = splitter.split_documents(all_pages)
-        
-        print(f"⚡ Fast-split documents into {len(split_docs)} chunks")
-        return split_docs
+        else:
+            print(f"Total documents loaded: {pages_loaded}")
+        if self.chunks.alias_count:
+            print(f"♻️ {self.chunks.alias_count} near-duplicate chunks share the text of {len(self.chunks)} indexed chunks")
+        self._embed_new_chunks(embedded)
 
-    def _create_vector_store(self):
-        if not self.documents:
-            print("Warning: No documents were loaded. RAG functionality will be disabled.")
+    def _duplicate_index(self) -> Optional[NearDuplicateIndex]:
+        """
+        LSH index over the chunks stored so far, or None with dedup disabled. Kept
+        for the life of the service and saved with its snapshot; only snapshots
+        saved without one have their chunks re-hashed, once.
+        """
+        if not settings.RAG_DEDUP:
             return None
-        return FAISS.from_documents(self.documents, self.embeddings)
+        if self._duplicates is None:
+            duplicates = NearDuplicateIndex(self.chunks.text, settings.RAG_DEDUP_THRESHOLD)
+            for chunk_id in range(len(self.chunks)):
+                duplicates.add(chunk_id, self.chunks.text(chunk_id))
+            self._duplicates = duplicates
+        return self._duplicates
+
+    def _embed_new_chunks(self, start: int):
+        """Embed chunks[start:] and add them to the vector and lexical indexes, creating the vector index on first use"""
+        if start >= len(self.chunks):
+            if self.index is None:
+                print("Warning: No documents were loaded. RAG functionality will be disabled.")
+            return
+        end = len(self.chunks)
+        texts = self.chunks.texts(start, end)
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        with self._index_lock:
+            if self.index is None:
+                # Exact L2 search, as langchain's FAISS wrapper used
+                self.index = faiss.IndexFlatL2(vectors.shape[1])
+            self.index.add(vectors)
+            # Both indexes always cover the same chunks, so partial results fuse consistently
+            self.lexical.add(texts)
+            self._index_changed()
+        print(f"🧩 Indexed {self.index.ntotal} chunks so far")
+
+    def _resize_index(self):
+        """Ingestion appends to an exact index; once complete, switch to the backend suited to its size"""
+        if self.index is None:
+            return
+        resized = rebuild_for_size(self.index)
+        if resized is self.index:
+            return
+        with self._index_lock:
+            self.index = resized
+            self._index_changed()
+
+    def _index_changed(self):
+        """Call with the index lock held after changing the index"""
+        self.index_version += 1
+        self._result_cache.clear()
+
+    def _search_batch(self, queries: List[str], k: int,
+                      filters: Optional[RetrievalFilter] = None) -> List[List[ScoredChunk]]:
+        """
+        Up to k best (chunk id, score) pairs per query, best first, with one embedding
+        round trip and one matrix search. Vector and BM25 rankings are fused by
+        reciprocal rank, so exact identifiers (batch, CAS and method numbers) that
+        embeddings miss still reach the top k.
+        """
+        if self.index is None or self.index.ntotal == 0 or not queries:
+            return [[] for _ in queries]
+        # Repeat queries are answered from the result cache for the current index version
+        version = self.index_version
+        ranked = {}
+        for query in dict.fromkeys(queries):
+            chunk_ids = self._result_cache.get((version, query, k, filters))
+            if chunk_ids is not None:
+                ranked[query] = chunk_ids
+        # Templates repeat titles ("Stability" under both S and P); embed and search each once
+        missing = [query for query in dict.fromkeys(queries) if query not in ranked]
+        if missing:
+            vectors = np.asarray(self.embeddings.embed_queries(missing), dtype=np.float32)
+            for query, chunk_ids in zip(missing, self._rank(missing, vectors, k, filters)):
+                self._result_cache.put((version, query, k, filters), tuple(chunk_ids))
+                ranked[query] = chunk_ids
+        return [list(ranked[query]) for query in queries]
+
+    def _rank(self, queries: List[str], vectors: np.ndarray, k: int,
+              filters: Optional[RetrievalFilter] = None) -> List[List[ScoredChunk]]:
+        """
+        Per query: fuse vector and BM25 candidates, rerank them by cosine similarity
+        (with a keyword bonus) and MMR diversity, then cut to the relevant results
+        """
+        candidates = max(k, CANDIDATE_POOL)
+        results = []
+        with self._index_lock:
+            # Filters become a chunk mask applied inside both index scans, not a post-filter
+            allowed = self._allowed_chunks(filters) if filters else None
+            ids = search(self.index, vectors, min(candidates, self.index.ntotal), allowed)
+            for query, vector, row in zip(queries, vectors, ids):
+                vector_ids = [int(i) for i in row if i != -1]
+                keyword_ids = self.lexical.search(query, candidates, allowed) if settings.RAG_HYBRID_SEARCH else []
+                pool = reciprocal_rank_fusion([vector_ids, keyword_ids], candidates) if keyword_ids else vector_ids
+                # Keyword-only hits have no search distance, so every candidate is scored from its stored vector
+                stored = reconstruct(self.index, pool)
+                if stored is None:
+                    scored = [(chunk_id, None) for chunk_id in pool[:k]]
+                else:
+                    cosines, unit_vectors = cosine_scores(vector, stored)
+                    relevance = cosines + keyword_boost(pool, keyword_ids, settings.RAG_KEYWORD_BOOST)
+                    picks = rerank(relevance, unit_vectors, k, settings.RAG_MMR_LAMBDA)
+                    scored = [(pool[i], float(cosines[i])) for i in picks]
+                results.append(_adaptive_cut(scored, keyword_ids[:1]) if settings.RAG_ADAPTIVE_K else scored)
+        return results
+
+    def _allowed_chunks(self, filters: RetrievalFilter) -> np.ndarray:
+        """Mask over indexed chunks that pass the filter; call with the index lock held"""
+        return self.chunks.mask(self.index.ntotal, filters.file_matcher(), filters.page_range)
+
+    def memory_bytes(self) -> int:
+        """Rough estimate of the memory held by the vectors, chunk text and postings"""
+        if self.index is None:
+            return 0
+        return int(self.index.ntotal * bytes_per_vector(self.index)) + self.chunks.nbytes + self.lexical.nbytes
 
-    def get_relevant_chunks(self, query: str, mode: str = "local") -> List[Document]:
-        if self.retriever:
-            return self.retriever.get_relevant_documents(query)
+    def get_relevant_chunks(self, query: str, mode: str = "local",
+                            filters: Optional[RetrievalFilter] = None) -> List[Document]:
+        if self.index is not None:
+            documents = []
+            file_matches, page_range = _location_filter(filters)
+            for chunk_id, score in self._search_batch([query], RETRIEVER_K, filters)[0]:
+                document = self.chunks.document(chunk_id, file_matches, page_range)
+                document.metadata['score'] = score
+                documents.append(document)
+            return documents
         else:
             print("Warning: No retriever available. RAG is disabled.")
             return []
     
-    async def retrieve_relevant_content(self, query: str, file_paths: List[str] = None, top_k: int = 5, mode: str = "local") -> List[dict]:
+    async def retrieve_relevant_content(self, query: str, file_paths: List[str] = None, top_k: int = 5, mode: str = "local",
+                                        filters: Optional[RetrievalFilter] = None) -> List[dict]:
         """
         Retrieve relevant content for document generation.
         Returns a list of dictionaries with content and source information.
         
         Args:
             query: The search query
-            file_paths: Optional filter by file paths (not used)
-            top_k: Number of results to return
+            file_paths: Only search these files (names or paths); empty or None searches all
+            top_k: Most results to return; fewer when scores fall off (see _adaptive_cut)
             mode: Ignored (was used for GraphRAG)
+            filters: Further session, page range or document type restrictions
         """
         try:
-            if self.retriever:
-                # Use traditional RAG
-                docs = self.retriever.get_relevant_documents(query)
-                results = []
-                for i, doc in enumerate(docs[:top_k]):
-                    # Extract page number from metadata
-                    page_num = doc.metadata.get('page', doc.metadata.get('page_number', 1))
-                    
-                    results.append({
-                        'content': doc.page_content,
-                        'source': doc.metadata.get('source', f'Document {i+1}'),
-                        'page': page_num,
-                        'metadata': doc.metadata
-                    })
-                    print(f"📄 Retrieved from {doc.metadata.get('source', 'Unknown')}, page {page_num}: {doc.page_content[:100]}...")
+            if self.index is not None:
+                filters = _with_files(filters, file_paths)
+                # Use traditional RAG; chunk text and metadata are only materialized for hits
+                results = self._results(self._search_batch([query], top_k, filters)[0], filters)
+                for result in results:
+                    print(f"📄 Retrieved from {result['source']}, page {result['page']} (score {_format_score(result['score'])}): {result['content'][:100]}...")
                 return results
             else:
                 print("Warning: No retriever available. RAG is disabled.")
@@ -142,14 +336,116 @@ class RAGService:
             print(f"Error retrieving content: {e}")
             return []
     
+    async def retrieve_batch(self, queries: List[str], top_k: int = 5,
+                             filters: Optional[RetrievalFilter] = None) -> List[List[dict]]:
+        """
+        retrieve_relevant_content for a whole template at once: every query is
+        embedded in one request and searched in one FAISS call.
+        Returns one result list per query, in query order.
+        """
+        try:
+            if self.index is None:
+                print("Warning: No retriever available. RAG is disabled.")
+                return [[] for _ in queries]
+            ranked = await asyncio.to_thread(self._search_batch, queries, top_k, filters)
+            print(f"📄 Retrieved {sum(len(hits) for hits in ranked)} chunks for {len(queries)} queries in one batch")
+            return [self._results(hits, filters) for hits in ranked]
+        except Exception as e:
+            print(f"Error retrieving content: {e}")
+            return [[] for _ in queries]
+
+    def _results(self, hits: List[ScoredChunk], filters: Optional[RetrievalFilter] = None) -> List[dict]:
+        """Retrieval results for scored chunk ids; chunk text and metadata are only materialized here"""
+        results = []
+        file_matches, page_range = _location_filter(filters)
+        for i, (chunk_id, score) in enumerate(hits):
+            # A chunk admitted through an alias location cites that location, not its canonical one
+            metadata = self.chunks.metadata(chunk_id, file_matches, page_range)
+            results.append({
+                'content': self.chunks.text(chunk_id),
+                'source': metadata.get('source', f'Document {i+1}'),
+                'page': metadata['page'],
+                'score': score,
+                'metadata': metadata
+            })
+        return results
+    
     def add_documents(self, new_file_paths: List[str]):
-        """Add new documents to the RAG system"""
-        # For traditional RAG, we need to reload everything
+        """Incrementally index new files, appending their vectors to the existing store"""
+        new_file_paths = [path for path in new_file_paths if path not in self.file_paths]
+        if not new_file_paths:
+            return
+        
+        # Only the new files are parsed, split and embedded
+        if self._index_mapped:
+            # A memory-mapped snapshot is read-only; copy it into memory before appending
+            with self._index_lock:
+                self.index = to_memory(self.index)
+            self._index_mapped = False
+        start, aliases = len(self.chunks), self.chunks.alias_count
         self.file_paths.extend(new_file_paths)
-        if self.embeddings:
-            self.documents = self._load_and_split_docs()
-            self.vector_store = self._create_vector_store()
-            self.retriever = self.vector_store.as_retriever(
-                search_type="mmr",
-                search_kwargs={"k": 20, "fetch_k": 40}
-            ) if self.vector_store else None
\ No newline at end of file
+        self._ingest(new_file_paths)
+        if self.chunks.alias_count != aliases:
+            # New alias locations change what filters match without adding a vector
+            with self._index_lock:
+                self._index_changed()
+        
+        self._resize_index()
+        # Saved even when every new chunk was a duplicate: the manifest must list the new files
+        self._save_snapshot()
+        print(f"➕ Added {len(self.chunks) - start} chunks and {self.chunks.alias_count - aliases} "
+              f"duplicate locations from {len(new_file_paths)} new files")
+
+
+def _adaptive_cut(hits: List[ScoredChunk], protected: List[int]) -> List[ScoredChunk]:
+    """
+    Drop hits scoring below RAG_MIN_SCORE or more than RAG_SCORE_FALLOFF below the
+    best hit, so narrow queries return only what is relevant while broad ones keep
+    all k. The top keyword hit is kept regardless: exact identifiers often embed poorly.
+    """
+    scores = [score for _, score in hits if score is not None]
+    if not scores:
+        return hits
+    floor = max(settings.RAG_MIN_SCORE, max(scores) - settings.RAG_SCORE_FALLOFF)
+    kept = [(chunk_id, score) for chunk_id, score in hits
+            if score is None or score >= floor or chunk_id in protected]
+    if len(kept) < settings.RAG_MIN_RESULTS:
+        # Never cut below the minimum; the best-ranked hits make it up
+        kept = hits[:settings.RAG_MIN_RESULTS]
+    return kept
+
+
+def _with_files(filters: Optional[RetrievalFilter], file_paths: Optional[List[str]]) -> Optional[RetrievalFilter]:
+    """
+    Add a file restriction to a filter; callers pass file_paths=[] to mean every file.
+    Files the filter already allows are narrowed, never widened: with no file in
+    both, nothing matches.
+    """
+    if not file_paths:
+        return filters
+    file_filter = RetrievalFilter.create(file_paths=file_paths)
+    if filters is None:
+        return file_filter
+    file_names = file_filter.file_names
+    if filters.file_names is not None:
+        file_names = filters.file_names & file_names
+    return replace(filters, file_names=file_names)
+
+
+def _location_filter(filters: Optional[RetrievalFilter]):
+    """ChunkStore file predicate and page range for a filter, both None without one"""
+    if filters is None:
+        return None, None
+    return filters.file_matcher(), filters.page_range
+
+
+def _format_score(score: Optional[float]) -> str:
+    return "n/a" if score is None else f"{score:.3f}"
+
+
+def _page_number(metadata: Dict[str, Any]) -> int:
+    """Page number from loader metadata; loaders report pages as ints, numeric strings or not at all"""
+    try:
+        return int(metadata.get('page', metadata.get('page_number', 1)))
+    except (TypeError, ValueError):
+        return 1
@@ -0,0 +1,68 @@
+"""
+Reranking and maximal marginal relevance (MMR) over stored chunk vectors.
+
+Works on the candidate pool of one query at a time with a single similarity
+matrix; the only Python loop is over the k picks, never over candidates.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+
+def cosine_scores(query_vector: np.ndarray, candidate_vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Cosine similarity of each candidate to the query, plus the unit-length candidate vectors"""
+    norms = np.linalg.norm(candidate_vectors, axis=1, keepdims=True)
+    candidates = candidate_vectors / np.maximum(norms, 1e-12)
+    query = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+    return candidates @ query, candidates
+
+
+def rerank(relevance: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Pick k candidates by MMR: lambda_mult * relevance minus (1 - lambda_mult)
+    times the highest similarity to anything already picked.
+
+    Args:
+        relevance: Relevance score per candidate
+        candidates: Unit-length candidate vectors, one row per candidate
+        k: Number of candidates to pick
+        lambda_mult: 1 ranks by relevance alone; lower values push
+            near-duplicates of earlier picks further down (same meaning as langchain's MMR)
+
+    Returns:
+        Positions into the candidate arrays, in pick order
+    """
+    count = len(relevance)
+    k = min(k, count)
+    if k == 0:
+        return []
+    if lambda_mult >= 1:
+        return [int(i) for i in np.argsort(-relevance, kind="stable")[:k]]
+
+    similarity = candidates @ candidates.T
+    redundancy = np.full(count, -np.inf, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+    picks = []
+    for _ in range(k):
+        # The first pick has nothing to be redundant with
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        objective = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * penalty, -np.inf)
+        pick = int(np.argmax(objective))
+        picks.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, similarity[pick])
+    return picks
+
+
+def keyword_boost(candidate_ids: List[int], keyword_ids: List[int], weight: float) -> np.ndarray:
+    """Relevance bonus for candidates ranked by BM25, decaying with their keyword rank"""
+    boost = np.zeros(len(candidate_ids), dtype=np.float32)
+    if not keyword_ids or not candidate_ids:
+        return boost
+    keywords = np.asarray(keyword_ids)
+    order = np.argsort(keywords)
+    candidates = np.asarray(candidate_ids)
+    positions = np.minimum(np.searchsorted(keywords[order], candidates), len(keywords) - 1)
+    found = keywords[order][positions] == candidates
+    boost[found] = weight / (1 + order[positions[found]])
+    return boost
@@ -0,0 +1,71 @@
+"""
+Metadata filters for retrieval. A filter is resolved to a per-chunk mask that
+the vector and lexical searches apply while scanning, so scoped queries still
+return a full k from the allowed chunks.
+"""
+import os
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Optional, Set, Tuple
+
+from .file_manager import UPLOAD_DIR
+
+
+@dataclass(frozen=True)
+class RetrievalFilter:
+    file_names: Optional[FrozenSet[str]] = None  # base names of the allowed files
+    session_id: Optional[str] = None  # only files uploaded to this session
+    page_range: Optional[Tuple[int, int]] = None  # inclusive first and last page
+    document_types: Optional[FrozenSet[str]] = None  # extensions without the dot, e.g. "pdf"
+
+    @classmethod
+    def create(cls, file_paths: Optional[Iterable[str]] = None, session_id: Optional[str] = None,
+               page_range: Optional[Tuple[int, int]] = None,
+               document_types: Optional[Iterable[str]] = None) -> Optional["RetrievalFilter"]:
+        """Filter from loosely typed arguments; None when nothing would be filtered"""
+        file_names = frozenset(os.path.basename(path) for path in file_paths or [] if path)
+        types = frozenset(t.lower().lstrip(".") for t in document_types or [] if t)
+        retrieval_filter = cls(
+            file_names=file_names or None,
+            session_id=session_id or None,
+            page_range=tuple(page_range) if page_range else None,
+            document_types=types or None
+        )
+        return None if retrieval_filter == cls() else retrieval_filter
+
+    def file_matcher(self):
+        """Predicate over file paths for the file, session and type parts of the filter"""
+        session_files = _session_file_keys(self.session_id) if self.session_id else None
+
+        def matches(path: str) -> bool:
+            if self.file_names is not None and os.path.basename(path) not in self.file_names:
+                return False
+            if self.document_types is not None:
+                if os.path.splitext(path)[1].lower().lstrip(".") not in self.document_types:
+                    return False
+            if session_files is not None and _file_key(path) not in session_files:
+                return False
+            return True
+
+        return matches
+
+
+def _file_key(path: str):
+    """Identity of a file on disk; uploads shared between sessions are hardlinks to one blob"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _session_file_keys(session_id: str) -> Set[Tuple[int, int]]:
+    session_dir = os.path.join(UPLOAD_DIR, session_id)
+    if not os.path.isdir(session_dir):
+        return set()
+    keys = set()
+    for name in os.listdir(session_dir):
+        if not name.startswith("."):
+            key = _file_key(os.path.join(session_dir, name))
+            if key is not None:
+                keys.add(key)
+    return keys
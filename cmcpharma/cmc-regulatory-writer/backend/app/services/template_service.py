@@ -6,7 +6,8 @@ import os
 from pathlib import Path
 
 # Add document processing imports
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredWordDocumentLoader
+from .document_loader import load_documents
+import asyncio
 import re
 
 class TemplateService:
@@ -122,21 +123,12 @@ class TemplateService:
     
     async def _extract_content_from_file(self, file_path: str) -> str:
         """Extract text content from various file types"""
-        file_extension = os.path.splitext(file_path)[1].lower()
-        
         try:
-            if file_extension == '.pdf':
-                loader = PyPDFLoader(file_path)
-            elif file_extension in ['.txt', '.md']:
-                loader = TextLoader(file_path, encoding='utf-8')
-            elif file_extension in ['.doc', '.docx']:
-                loader = UnstructuredWordDocumentLoader(file_path)
-            else:
-                # Fallback to text loader
-                loader = TextLoader(file_path, encoding='utf-8')
-            
-            documents = loader.load()
-            content = "\n\n".join([doc.page_content for doc in documents])
+            # Shares parsed pages with RAG ingestion through the page text cache
+            parsed = await asyncio.to_thread(load_documents, [file_path])
+            if not parsed or parsed[0].error:
+                raise Exception(parsed[0].error if parsed else "no content could be parsed")
+            content = "\n\n".join([doc.page_content for doc in parsed[0].pages])
             return content
             
         except Exception as e:
@@ -0,0 +1,161 @@
+"""
+Persistent cache of extracted page text, keyed by file content hash
+"""
+import json
+import os
+import threading
+import uuid
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..core.config import settings
+from ..utils.helpers import calculate_file_hash
+from .query_cache import CacheStats
+
+# Bump when loaders change in a way that alters extracted text
+PAGE_CACHE_VERSION = 2
+READ_BLOCK_SIZE = 64 * 1024
+
+CachedPage = Tuple[str, Dict[str, Any]]
+
+# sha256 of files already hashed in this process, keyed by (path, size, mtime_ns)
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_hash_lock = threading.Lock()
+
+
+def file_content_hash(file_path: str) -> str:
+    """sha256 of a file, re-reading it only when its size or mtime changed"""
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        cached = _hash_memo.get(key)
+    if cached:
+        return cached
+    file_hash = calculate_file_hash(file_path)
+    with _hash_lock:
+        _hash_memo[key] = file_hash
+    return file_hash
+
+
+class PageTextCache:
+    """
+    One zlib-compressed JSON-lines record per distinct file: a header line,
+    then one line per page with its text and loader metadata. Records are
+    written and read page by page, so very large files never need all their
+    pages in memory. Identical files share a record whatever their name or
+    session, so each is parsed once for RAG ingestion and template extraction alike.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.root = os.path.join(cache_dir or settings.RAG_CACHE_DIR, "pages")
+        os.makedirs(self.root, exist_ok=True)
+        self.stats = CacheStats()
+
+    def _path(self, file_hash: str) -> str:
+        return os.path.join(self.root, file_hash[:2], f"{file_hash}.jsonl.z")
+
+    def open_pages(self, file_hash: str) -> Optional[Iterator[CachedPage]]:
+        """Lazily iterate the cached pages of a file, or None if it hasn't been parsed yet"""
+        try:
+            f = open(self._path(file_hash), "rb")
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+        lines = _decompressed_lines(f)
+        try:
+            header = json.loads(next(lines))
+        except (StopIteration, zlib.error, ValueError) as e:
+            f.close()
+            print(f"Warning: Ignoring unreadable page cache record {file_hash}. Error: {e}")
+            self.stats.misses += 1
+            return None
+        if header.get("version") != PAGE_CACHE_VERSION:
+            f.close()
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return (tuple(json.loads(line)) for line in lines)
+
+    def writer(self, file_hash: str) -> "PageCacheWriter":
+        return PageCacheWriter(self._path(file_hash))
+
+
+class PageCacheWriter:
+    """Appends pages to a temp record that only becomes visible on commit()"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self._compressor = zlib.compressobj(6)
+        self._file = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = open(self.temp_path, "wb")
+            self._write({"version": PAGE_CACHE_VERSION})
+        except OSError as e:
+            self._fail(e)
+
+    def _write(self, value: Any) -> None:
+        line = json.dumps(value, default=str) + "\n"
+        self._file.write(self._compressor.compress(line.encode("utf-8")))
+
+    def add(self, pages: List[CachedPage]) -> None:
+        """Add pages; 'source' is dropped since it names whichever copy was parsed"""
+        if self._file is None:
+            return
+        try:
+            for text, metadata in pages:
+                self._write([text, {key: value for key, value in metadata.items() if key != "source"}])
+        except OSError as e:
+            self._fail(e)
+
+    def commit(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.write(self._compressor.flush())
+            self._file.close()
+            self._file = None
+            os.replace(self.temp_path, self.path)
+        except OSError as e:
+            self._fail(e)
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def _fail(self, error: Exception) -> None:
+        print(f"Warning: Could not write page cache record {os.path.basename(self.path)}. Error: {error}")
+        self.abort()
+
+
+def _decompressed_lines(f) -> Iterator[str]:
+    """Decode a zlib stream of text lines incrementally, closing the file at the end"""
+    decompressor = zlib.decompressobj()
+    pending = b""
+    try:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            data = decompressor.decompress(block) if block else decompressor.flush()
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.decode("utf-8")
+            if not block:
+                break
+    finally:
+        f.close()
+
+
+# Process-wide cache shared by RAG ingestion and template extraction
+_page_cache: Optional[PageTextCache] = None
+
+
+def get_page_cache() -> PageTextCache:
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = PageTextCache()
+    return _page_cache
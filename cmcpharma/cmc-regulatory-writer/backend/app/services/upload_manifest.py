@@ -0,0 +1,114 @@
+"""
+Durable per-session manifest of uploads (hash, size, page/chunk counts, index state)
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..models.file import UploadRecord
+from ..utils.helpers import hash_string
+
+MANIFEST_FILE = ".uploads.jsonl"
+COMPACT_AFTER_LINES = 200
+
+# Parsed manifests keyed by path, reused while the file's (mtime, size) is unchanged
+_manifest_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, UploadRecord], int]] = {}
+_manifest_lock = threading.Lock()
+
+
+class SessionManifest:
+    """
+    JSON-lines log of UploadRecord snapshots, one line per change.
+
+    The last line for a file name wins and a tombstone line removes it. The log
+    is compacted to one line per file once it grows past COMPACT_AFTER_LINES.
+    """
+
+    def __init__(self, session_dir: str):
+        self.path = os.path.join(session_dir, MANIFEST_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _load(self) -> Tuple[Dict[str, UploadRecord], int]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return {}, 0
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = _manifest_cache.get(self.path)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+
+        records: Dict[str, UploadRecord] = {}
+        line_count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                line_count += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash loses only that change
+                    continue
+                if entry.get("deleted"):
+                    records.pop(entry.get("name"), None)
+                else:
+                    records[entry["name"]] = UploadRecord(**entry)
+        _manifest_cache[self.path] = (signature, records, line_count)
+        return records, line_count
+
+    def records(self) -> List[UploadRecord]:
+        with _manifest_lock:
+            records, _ = self._load()
+            return sorted(records.values(), key=lambda record: record.uploaded_at)
+
+    def get(self, name: str) -> Optional[UploadRecord]:
+        with _manifest_lock:
+            records, _ = self._load()
+            return records.get(name)
+
+    def upsert(self, record: UploadRecord) -> UploadRecord:
+        record.updated_at = datetime.now()
+        self._append(record.model_dump_json())
+        return record
+
+    def update(self, name: str, **fields) -> Optional[UploadRecord]:
+        """Change fields of an existing record; unknown names are ignored"""
+        record = self.get(name)
+        if record is None:
+            return None
+        return self.upsert(record.model_copy(update=fields))
+
+    def remove(self, name: str) -> None:
+        self._append(json.dumps({"name": name, "deleted": True}))
+
+    def replace_all(self, records: List[UploadRecord]) -> None:
+        """Rewrite the log with exactly these records"""
+        with _manifest_lock:
+            self._write_compacted({record.name: record for record in records})
+
+    @property
+    def version(self) -> str:
+        """Changes whenever a file is added, replaced or removed"""
+        records = self.records()
+        return hash_string("\n".join(f"{r.name}|{r.sha256}|{r.size}" for r in sorted(records, key=lambda r: r.name)))
+
+    def _append(self, line: str) -> None:
+        with _manifest_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            records, line_count = self._load()
+            if line_count > COMPACT_AFTER_LINES and line_count > 2 * len(records):
+                self._write_compacted(records)
+
+    def _write_compacted(self, records: Dict[str, UploadRecord]) -> None:
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in records.values():
+                f.write(record.model_dump_json() + "\n")
+        os.replace(temp_path, self.path)
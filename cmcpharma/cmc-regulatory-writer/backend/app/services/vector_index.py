@@ -0,0 +1,187 @@
+"""
+FAISS index backends sized to the corpus: exact search for small sessions,
+HNSW over int8 vectors or IVF-PQ for large and cross-session corpora.
+"""
+import math
+from typing import List, Optional
+
+import faiss
+import numpy as np
+
+from ..core.config import settings
+
+FLAT = "flat"
+HNSW = "hnsw"
+IVFPQ = "ivfpq"
+BACKENDS = (FLAT, HNSW, IVFPQ)
+
+HNSW_M = 32             # graph neighbours per node
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 96
+IVF_NPROBE = 16         # inverted lists scanned per query
+PQ_BITS = 8             # one byte per sub-quantizer code
+TRAIN_SAMPLE = 100_000  # vectors used to train quantizers
+# Below this many vectors PQ codebooks (256 centroids each) can't be trained
+IVFPQ_MIN_TRAIN = 39 * (1 << PQ_BITS)
+# Filtered queries allowing at most this many vectors are scored exhaustively:
+# graph and list traversal can't reach enough of a tiny allowed set
+EXHAUSTIVE_FILTER_MAX = 4096
+
+
+def choose_backend(ntotal: int, requested: Optional[str] = None) -> str:
+    """The configured backend, or with "auto" the cheapest one that stays accurate for ntotal vectors"""
+    requested = requested or settings.RAG_INDEX_BACKEND
+    if requested in BACKENDS:
+        backend = requested
+    elif ntotal >= settings.RAG_IVFPQ_MIN_VECTORS:
+        backend = IVFPQ
+    elif ntotal >= settings.RAG_HNSW_MIN_VECTORS:
+        backend = HNSW
+    else:
+        backend = FLAT
+    if backend == IVFPQ and ntotal < IVFPQ_MIN_TRAIN:
+        # Too few vectors to train PQ codebooks; exact search is cheap at this size anyway
+        backend = FLAT
+    return backend
+
+
+def backend_of(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return HNSW
+    if isinstance(index, faiss.IndexIVF):
+        return IVFPQ
+    return FLAT
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Most sub-quantizers (up to 64) whose sub-vectors are a multiple of 4 dimensions (1024-d -> 64-byte codes)"""
+    # Other sub-vector sizes miss FAISS's SIMD kernels and train an order of magnitude slower
+    for m in range(min(64, dim // 4), 0, -1):
+        if dim % m == 0 and (dim // m) % 4 == 0:
+            return m
+    return 1
+
+
+def build_index(vectors: np.ndarray, backend: str) -> faiss.Index:
+    """Create an index of the given backend, train it if needed and add the vectors"""
+    ntotal, dim = vectors.shape
+    if backend == HNSW:
+        # int8 scalar quantization: a quarter of the memory of float32 vectors
+        index = faiss.index_factory(dim, f"HNSW{HNSW_M},SQ8")
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif backend == IVFPQ:
+        nlist = max(1, min(int(4 * math.sqrt(ntotal)), ntotal // 39))
+        index = faiss.index_factory(dim, f"IVF{nlist},PQ{_pq_subquantizers(dim)}x{PQ_BITS}")
+        # Polysemous codes are never used at query time and dominate training time
+        faiss.downcast_index(index).do_polysemous_training = False
+    else:
+        index = faiss.IndexFlatL2(dim)
+
+    if not index.is_trained:
+        sample = vectors
+        if ntotal > TRAIN_SAMPLE:
+            rows = np.random.default_rng(0).choice(ntotal, TRAIN_SAMPLE, replace=False)
+            sample = vectors[np.sort(rows)]
+        index.train(sample)
+    index.add(vectors)
+    if backend == IVFPQ:
+        # Lets reconstruct() find a vector's list entry to score keyword-only hits
+        faiss.extract_index_ivf(index).make_direct_map()
+    configure_search(index)
+    return index
+
+
+def configure_search(index: faiss.Index) -> None:
+    """Set query-time accuracy knobs, which are not reliably restored from disk"""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = IVF_NPROBE
+
+
+def rebuild_for_size(index: faiss.Index) -> faiss.Index:
+    """Move the vectors of an exact index to the backend suited to its current size"""
+    backend = choose_backend(index.ntotal)
+    if backend == backend_of(index) or not isinstance(index, faiss.IndexFlat):
+        # Compressed indexes can't give back exact vectors; they keep their backend
+        return index
+    print(f"🔀 Rebuilding RAG index of {index.ntotal} vectors as {backend}")
+    return build_index(index.reconstruct_n(0, index.ntotal), backend)
+
+
+def to_memory(index: faiss.Index) -> faiss.Index:
+    """Writable in-memory copy of an index read from a memory-mapped snapshot"""
+    if isinstance(index, faiss.IndexIVF):
+        # Mapped IVF lists are OnDiskInvertedLists, which clone_index can't copy
+        ivf = faiss.extract_index_ivf(index)
+        mapped = ivf.invlists
+        lists = faiss.ArrayInvertedLists(mapped.nlist, mapped.code_size)
+        for list_no in range(mapped.nlist):
+            size = mapped.list_size(list_no)
+            if size:
+                ids, codes = mapped.get_ids(list_no), mapped.get_codes(list_no)
+                lists.add_entries(list_no, size, ids, codes)
+                mapped.release_ids(list_no, ids)
+                mapped.release_codes(list_no, codes)
+        ivf.replace_invlists(lists, True)
+        lists.this.disown()  # now owned by the index
+    return faiss.clone_index(index)
+
+
+def search(index: faiss.Index, vectors: np.ndarray, k: int, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Ids of the k nearest vectors for each query row, -1 padded. With a boolean
+    allowed mask only those ids are considered, inside the index scan, so the k
+    results all come from the allowed subset.
+    """
+    if allowed is None:
+        _, ids = index.search(vectors, k)
+        return ids
+    allowed_ids = np.flatnonzero(allowed[:index.ntotal])
+    if not len(allowed_ids):
+        return np.full((len(vectors), k), -1, dtype=np.int64)
+    if len(allowed_ids) <= EXHAUSTIVE_FILTER_MAX and not isinstance(index, faiss.IndexFlat):
+        stored = reconstruct(index, allowed_ids.tolist())
+        if stored is not None:
+            distances = (vectors ** 2).sum(axis=1)[:, None] - 2 * vectors @ stored.T + (stored ** 2).sum(axis=1)[None, :]
+            top = np.argsort(distances, axis=1, kind="stable")[:, :k]
+            ids = np.full((len(vectors), k), -1, dtype=np.int64)
+            ids[:, :top.shape[1]] = allowed_ids[top]
+            return ids
+
+    if allowed_ids[-1] - allowed_ids[0] + 1 == len(allowed_ids):
+        # Chunks of one file are contiguous, so single-file filters are a plain id range
+        selector = faiss.IDSelectorRange(int(allowed_ids[0]), int(allowed_ids[-1]) + 1)
+    else:
+        bitmap = np.packbits(allowed[:index.ntotal], bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))  # length in bytes
+    if isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(HNSW_EF_SEARCH, k))
+    elif isinstance(index, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=IVF_NPROBE)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    _, ids = index.search(vectors, k, params=params)
+    return ids
+
+
+def reconstruct(index: faiss.Index, ids: List[int]) -> Optional[np.ndarray]:
+    """Stored vectors for ids (decoded approximations for compressed backends), or None if unsupported"""
+    if not ids:
+        return np.zeros((0, index.d), dtype=np.float32)
+    try:
+        return index.reconstruct_batch(np.asarray(ids, dtype=np.int64))
+    except RuntimeError:
+        return None
+
+
+def bytes_per_vector(index: faiss.Index) -> float:
+    """Estimated memory per stored vector, including graph links and list ids"""
+    dim = index.d
+    if isinstance(index, faiss.IndexHNSW):
+        return dim + 2 * HNSW_M * 4
+    if isinstance(index, faiss.IndexIVF):
+        code_size = faiss.extract_index_ivf(index).code_size
+        centroids = index.nlist * dim * 4 / max(1, index.ntotal)
+        return code_size + 8 + 8 + centroids  # list ids and direct map
+    return dim * 4
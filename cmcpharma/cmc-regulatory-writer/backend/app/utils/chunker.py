@@ -0,0 +1,122 @@
+"""
+Single-pass text chunker that emits offsets instead of copied strings
+"""
+import re
+from bisect import bisect_right
+from typing import List, Tuple
+
+# Headings and paragraph breaks are rare, so their positions are collected up
+# front in one scan. Weaker breaks (sentence, line, word) are common and only
+# looked for inside the current window.
+_STRONG_BREAKS = re.compile(
+    r"(?m)"
+    r"(?P<heading>^[ \t]*(?:#{1,6}[ \t]+\S|\d+(?:\.[A-Z0-9]+)*\.?[ \t]+[A-Z]|[A-Z][A-Z0-9 ,&/()-]{3,}$))"
+    r"|(?P<paragraph>\n[ \t]*\n\s*)"
+)
+_SENTENCE_END = re.compile(r"[.!?;:][\"')\]]*\s")
+
+
+def _strong_breaks(text: str) -> Tuple[List[int], List[int]]:
+    """Sorted start positions of headings and of text after paragraph breaks"""
+    headings: List[int] = []
+    paragraphs: List[int] = []
+    for match in _STRONG_BREAKS.finditer(text):
+        if match.lastgroup == "heading":
+            headings.append(match.start())
+        else:
+            paragraphs.append(match.end())
+    return headings, paragraphs
+
+
+def _last_break(points: List[int], low: int, high: int) -> int:
+    """Largest break position in (low, high], or -1"""
+    index = bisect_right(points, high) - 1
+    if index >= 0 and points[index] > low:
+        return points[index]
+    return -1
+
+
+def _last_weak_break(text: str, low: int, high: int) -> int:
+    """Start of the last sentence, else line, else word beginning in (low, high], or -1"""
+    last_sentence = -1
+    for match in _SENTENCE_END.finditer(text, low, high):
+        last_sentence = match.end()
+    if last_sentence != -1:
+        return last_sentence
+    newline = text.rfind("\n", low, high)
+    if newline != -1:
+        return newline + 1
+    space = max(text.rfind(" ", low, high), text.rfind("\t", low, high))
+    if space != -1:
+        return space + 1
+    return -1
+
+
+def _skip_space(text: str, position: int) -> int:
+    while position < len(text) and text[position].isspace():
+        position += 1
+    return position
+
+
+def _trim_end(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def chunk_text(text: str, chunk_size: int = 600, chunk_overlap: int = 50) -> List[Tuple[int, int]]:
+    """
+    Split text into [start, end) spans of at most chunk_size characters.
+
+    Args:
+        text: Text to split
+        chunk_size: Maximum characters per chunk
+        chunk_overlap: Characters repeated from the end of the previous chunk,
+            except when a chunk starts at a heading
+
+    Returns:
+        List of (start, end) offsets, whitespace-trimmed, in text order
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+
+    headings, paragraphs = _strong_breaks(text)
+    # A heading may end a chunk early; weaker breaks only once it is half full
+    min_heading_fill = max(1, chunk_size // 10)
+    min_fill = chunk_size // 2
+    spans: List[Tuple[int, int]] = []
+    start = _skip_space(text, 0)
+    length = len(text)
+
+    while start < length:
+        limit = start + chunk_size
+        at_heading = False
+        if limit >= length:
+            cut = length
+        else:
+            cut = _last_break(headings, start + min_heading_fill, limit)
+            at_heading = cut != -1
+            if cut == -1:
+                cut = _last_break(paragraphs, start + min_fill, limit)
+            if cut == -1:
+                cut = _last_weak_break(text, start + min_fill, limit)
+            if cut == -1:
+                # No break anywhere in the window (e.g. a long table row): hard cut
+                cut = limit
+
+        end = _trim_end(text, start, cut)
+        if end > start:
+            spans.append((start, end))
+        if cut >= length:
+            break
+
+        next_start = cut
+        if not at_heading and chunk_overlap:
+            # Back up by the overlap, then forward to the next word so no word is split
+            next_start = max(end - chunk_overlap, start + 1)
+            space = text.find(" ", next_start - 1, end)
+            if space != -1:
+                next_start = space + 1
+        start = _skip_space(text, max(next_start, start + 1))
+
+    return spans
@@ -5,7 +5,7 @@ import hashlib
 import secrets
 import string
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 import json
 
 
@@ -252,7 +252,8 @@ def batch_items(items: List[Any], batch_size: int) -> List[List[Any]]:
     return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
 
 
-def retry_on_exception(func, max_retries: int = 3, delay: float = 1.0, exceptions: tuple = (Exception,)):
+def retry_on_exception(func, max_retries: int = 3, delay: float = 1.0, exceptions: tuple = (Exception,),
+                       retry_if: Optional[Callable[[Exception], bool]] = None):
     """
     Decorator to retry function on exception
     
@@ -261,6 +262,7 @@ def retry_on_exception(func, max_retries: int = 3, delay: float = 1.0, exception
         max_retries: Maximum number of retries
         delay: Delay between retries in seconds
         exceptions: Tuple of exceptions to catch
+        retry_if: Further narrows the caught exceptions; others are raised at once
         
     Returns:
         Decorated function
@@ -275,6 +277,8 @@ def retry_on_exception(func, max_retries: int = 3, delay: float = 1.0, exception
                 return func(*args, **kwargs)
             except exceptions as e:
                 last_exception = e
+                if retry_if is not None and not retry_if(e):
+                    raise
                 if attempt < max_retries:
                     time.sleep(delay * (2 ** attempt))  # Exponential backoff
                 else:
@@ -0,0 +1,54 @@
+"""
+Shared test setup: dummy API keys, caches in a temporary directory and a
+deterministic offline embedding model in place of the NVIDIA client.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("NVIDIA_API_KEY", "test-key")
+os.environ.setdefault("LLM_API_KEY", "test-key")
+os.environ.setdefault("RAG_CACHE_DIR", tempfile.mkdtemp(prefix="rag-cache-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema.embeddings import Embeddings  # noqa: E402
+
+from app.services import rag_service  # noqa: E402
+
+
+class HashEmbeddings(Embeddings):
+    """Unit vectors seeded from a hash of the text: stable across runs, no network"""
+
+    dim = 32
+
+    def _vector(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+@pytest.fixture(autouse=True)
+def offline_embeddings(monkeypatch):
+    monkeypatch.setattr(rag_service, "create_embedding_client", HashEmbeddings)
+
+
+def write_document(directory, name: str, paragraphs: int, seed: int = 0) -> str:
+    """Plain-text upload of varied vocabulary, long enough for several chunks"""
+    rng = np.random.default_rng(seed)
+    words = ["assay", "impurity", "stability", "humidity", "tablet", "dissolution", "specification",
+             "method", "batch", "container", "closure", "excipient", "validation", "storage", "HPLC"]
+    text = "\n\n".join(" ".join(rng.choice(words, 80)) + "." for _ in range(paragraphs))
+    path = os.path.join(str(directory), name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
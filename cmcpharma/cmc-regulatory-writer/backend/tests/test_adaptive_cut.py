@@ -0,0 +1,26 @@
+import asyncio
+
+from app.core.config import settings
+from app.services.rag_service import RAGService, _adaptive_cut
+
+from conftest import write_document
+
+
+def test_scores_below_the_floor_are_cut(monkeypatch):
+    monkeypatch.setattr(settings, "RAG_MIN_SCORE", 0.2)
+    monkeypatch.setattr(settings, "RAG_SCORE_FALLOFF", 0.15)
+    monkeypatch.setattr(settings, "RAG_MIN_RESULTS", 1)
+    hits = [(0, 0.8), (1, 0.7), (2, 0.6), (3, 0.3)]
+
+    assert _adaptive_cut(hits, protected=[]) == [(0, 0.8), (1, 0.7)]
+    assert _adaptive_cut(hits, protected=[3]) == [(0, 0.8), (1, 0.7), (3, 0.3)]
+    assert _adaptive_cut([(0, 0.1), (1, 0.05)], protected=[]) == [(0, 0.1)]
+
+
+def test_results_carry_similarity_scores(tmp_path):
+    service = RAGService([write_document(tmp_path, "spec.txt", 6, seed=31)])
+
+    results = asyncio.run(service.retrieve_relevant_content("assay validation", [], top_k=5))
+
+    assert 1 <= len(results) <= 5
+    assert all(-1.0 <= result["score"] <= 1.0 for result in results)
@@ -0,0 +1,38 @@
+from app.services.chunk_dedup import NearDuplicateIndex
+
+SPEC = ("The drug substance is tested for appearance, identification by IR, assay by HPLC, related "
+        "substances, residual solvents by GC, water content by Karl Fischer titration, heavy metals, "
+        "sulphated ash and particle size distribution by laser diffraction against the specification "
+        "limits in Table 3, using validated methods and qualified reference standards throughout.")
+
+
+def _index(texts):
+    return NearDuplicateIndex(texts.__getitem__, threshold=0.8)
+
+
+def test_exact_and_near_duplicates_map_to_the_first_chunk():
+    texts = [SPEC, "  " + SPEC.upper(), SPEC.replace("throughout", "in every case")]
+    index = _index(texts)
+
+    assert [index.add(i, text) for i, text in enumerate(texts)] == [None, 0, 0]
+    assert len(index) == 1
+
+
+def test_chunks_with_different_numbers_or_words_stay_distinct():
+    texts = [SPEC, SPEC.replace("Table 3", "Table 4"), "Tablets are packed in HDPE bottles with a desiccant canister."]
+    index = _index(texts)
+
+    assert [index.add(i, text) for i, text in enumerate(texts)] == [None, None, None]
+
+
+def test_saved_index_keeps_detecting_duplicates(tmp_path):
+    texts = [SPEC, "Tablets are packed in HDPE bottles with a desiccant canister.", SPEC.replace("throughout", "always")]
+    index = _index(texts)
+    index.add(0, texts[0])
+    index.add(1, texts[1])
+    index.save(str(tmp_path))
+
+    loaded = NearDuplicateIndex.load(str(tmp_path), texts.__getitem__, threshold=0.8)
+
+    assert loaded.chunk_count == 2
+    assert loaded.add(2, texts[2]) == 0
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.chunk_store import ChunkStore
+
+
+def test_filtered_metadata_cites_the_matching_alias():
+    store = ChunkStore()
+    store.extend("/uploads/f0.txt", 1, ["Store below 25 C."])
+    store.add_alias(0, "/uploads/f1.txt", 4)
+
+    def in_f1(path):
+        return path.endswith("f1.txt")
+
+    assert store.mask(1, in_f1).tolist() == [True]
+    metadata = store.metadata(0, in_f1)
+    assert (metadata["source"], metadata["page"]) == ("f1.txt", 4)
+    assert store.metadata(0, page_range=(3, 5))["page"] == 4
+    assert store.metadata(0)["source"] == "f0.txt"
+
+
+def test_locations_are_distinct():
+    store = ChunkStore()
+    store.extend("/uploads/f0.txt", 1, ["Store below 25 C."])
+    store.add_alias(0, "/uploads/f0.txt", 1)
+    store.add_alias(0, "/uploads/f0.txt", 1)
+    store.add_alias(0, "/uploads/f1.txt", 2)
+
+    assert store.locations(0) == [("/uploads/f0.txt", 1), ("/uploads/f1.txt", 2)]
+
+
+@pytest.mark.parametrize("compression", ["none", "zstd"])
+def test_saved_store_reloads_memory_mapped_and_stays_extendable(tmp_path, compression):
+    store = ChunkStore()
+    store.extend("/uploads/f0.txt", 1, ["Assay 98.0-102.0%.", "Water NMT 0.5% — Karl Fischer."])
+    store.extend("/uploads/f0.txt", 2, ["Store below 25 C."])
+    store.add_alias(2, "/uploads/f1.txt", 7)
+    store.save(str(tmp_path), compression=compression)
+
+    loaded = ChunkStore.load(str(tmp_path))
+
+    assert len(loaded) == 3
+    assert loaded.texts() == store.texts()
+    assert [loaded.page(i) for i in range(3)] == [1, 1, 2]
+    assert loaded.locations(2) == [("/uploads/f0.txt", 2), ("/uploads/f1.txt", 7)]
+    loaded.extend("/uploads/f2.txt", 1, ["Tablets in HDPE bottles."])
+    assert (loaded.text(3), loaded.file_path(3)) == ("Tablets in HDPE bottles.", "/uploads/f2.txt")
+    assert loaded.mask(4, lambda path: path.endswith("f0.txt")).tolist() == [True, True, True, False]
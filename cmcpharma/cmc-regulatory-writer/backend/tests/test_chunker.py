@@ -0,0 +1,30 @@
+import pytest
+
+from app.utils.chunker import chunk_text
+
+
+def test_spans_fit_the_chunk_size_and_cover_every_word():
+    text = " ".join(f"word{i}." if i % 9 == 8 else f"word{i}" for i in range(600))
+    spans = chunk_text(text, chunk_size=200, chunk_overlap=30)
+
+    assert all(0 < end - start <= 200 for start, end in spans)
+    assert [start for start, _ in spans] == sorted(start for start, _ in spans)
+    words = set(text.split())
+    covered = set(" ".join(text[start:end] for start, end in spans).split())
+    assert covered == words
+
+
+def test_chunks_start_at_headings_without_overlap():
+    body = "The assay is performed by HPLC on each batch. " * 6
+    text = f"3.2.S.4.1 Specification\n{body}\n3.2.S.4.2 Analytical Procedures\n{body}"
+    spans = chunk_text(text, chunk_size=400, chunk_overlap=50)
+
+    starts = [text[start:end].splitlines()[0] for start, end in spans]
+    assert "3.2.S.4.2 Analytical Procedures" in starts
+    second = text.index("3.2.S.4.2")
+    assert all(end <= second or start >= second for start, end in spans)
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        chunk_text("text", chunk_size=50, chunk_overlap=50)
@@ -0,0 +1,60 @@
+import asyncio
+import os
+
+from pypdf import PdfWriter
+
+from app.endpoints.files import get_retrieval_cache_stats
+from app.services.document_loader import _plan_tasks, load_documents, stream_pages
+from app.services.text_cache import get_page_cache
+
+from conftest import write_document
+
+
+def test_large_pdfs_are_split_into_page_range_tasks(tmp_path):
+    pdf_path = os.path.join(str(tmp_path), "report.pdf")
+    writer = PdfWriter()
+    for _ in range(120):
+        writer.add_blank_page(width=612, height=792)
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+    text_path = write_document(tmp_path, "notes.txt", 1)
+
+    tasks, page_counts = _plan_tasks([pdf_path, text_path], pages_per_task=50)
+
+    assert tasks == [(pdf_path, (0, 50)), (pdf_path, (50, 100)), (pdf_path, (100, 150)), (text_path, None)]
+    assert page_counts == {pdf_path: 120}
+
+
+def test_parse_failures_stay_with_their_file(tmp_path):
+    paths = [write_document(tmp_path, f"p{i}.txt", 2, seed=40 + i) for i in range(2)]
+    missing = os.path.join(str(tmp_path), "missing.txt")
+
+    parsed = load_documents([paths[0], missing, paths[1]])
+
+    assert [result.file_path for result in parsed] == [paths[0], missing, paths[1]]
+    assert [bool(result.pages) for result in parsed] == [True, False, True]
+    assert parsed[1].error and not parsed[0].error
+
+
+def test_cached_files_keep_input_order(tmp_path):
+    paths = [write_document(tmp_path, f"f{i}.txt", 2, seed=i) for i in range(3)]
+    # Warm the page cache for the middle file only
+    list(stream_pages([paths[1]]))
+
+    batches = list(stream_pages(paths))
+    assert [batch.file_path for batch in batches if batch.last] == paths
+    assert [batch.cached for batch in batches if batch.last] == [False, True, False]
+
+
+def test_page_cache_lookups_are_reported(tmp_path):
+    # Content no other test writes, so the first read misses
+    path = write_document(tmp_path, "spec.txt", 4, seed=11)
+    stats = get_page_cache().stats
+    hits, misses = stats.hits, stats.misses
+
+    list(stream_pages([path]))
+    list(stream_pages([path]))
+
+    assert (stats.hits - hits, stats.misses - misses) == (1, 1)
+    report = asyncio.run(get_retrieval_cache_stats())
+    assert (report.page_text.hits, report.page_text.misses) == (stats.hits, stats.misses)
@@ -0,0 +1,14 @@
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+from conftest import HashEmbeddings
+
+
+def test_chunk_lookups_count_into_cache_stats(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    embeddings = CachedEmbeddings(HashEmbeddings(), "test-model", cache=cache)
+
+    first = embeddings.embed_documents(["assay", "impurity"])
+    second = embeddings.embed_documents(["assay", "impurity"])
+
+    assert first == second
+    assert (cache.stats.hits, cache.stats.misses) == (2, 2)
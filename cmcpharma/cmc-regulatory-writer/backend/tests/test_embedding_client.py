@@ -0,0 +1,93 @@
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.embedding_client import BatchedEmbeddings, create_embedding_client, is_transient_error
+
+from conftest import HashEmbeddings
+
+
+class FlakyEmbeddings(HashEmbeddings):
+    """Fails the first `failures` calls with `error`"""
+
+    max_batch_size = 50
+
+    def __init__(self, error, failures=1):
+        self.error = error
+        self.failures = failures
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        if len(self.calls) <= self.failures:
+            raise self.error
+        return super().embed_documents(texts)
+
+
+def _status_error(status):
+    request = httpx.Request("POST", "http://embeddings/v1/embeddings")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+def test_transient_errors_are_retried():
+    inner = FlakyEmbeddings(_status_error(429))
+    vectors = BatchedEmbeddings(inner, retry_delay=0).embed_documents(["assay"])
+    assert len(vectors) == 1 and inner.calls == [1, 1]
+
+
+def test_permanent_errors_fail_immediately():
+    inner = FlakyEmbeddings(Exception("[401] Unauthorized\nPlease check or regenerate your API key."))
+    with pytest.raises(Exception, match="401"):
+        BatchedEmbeddings(inner, retry_delay=0).embed_documents(["assay"])
+    assert inner.calls == [1]
+
+
+def test_error_classification():
+    assert is_transient_error(httpx.ConnectError("refused"))
+    assert is_transient_error(_status_error(503))
+    assert is_transient_error(Exception("[500] Internal Server Error"))
+    assert not is_transient_error(_status_error(400))
+    assert not is_transient_error(ValueError("Unknown model"))
+
+
+def test_batch_size_is_capped_at_the_client_limit():
+    inner = FlakyEmbeddings(None, failures=0)
+    BatchedEmbeddings(inner, batch_size=64, max_concurrency=1).embed_documents([str(i) for i in range(120)])
+    assert inner.calls == [50, 50, 20]
+
+
+class RecordingEmbeddings(HashEmbeddings):
+    max_batch_size = 50
+
+    def __init__(self):
+        self.document_calls = []
+        self.query_calls = 0
+
+    def embed_documents(self, texts):
+        self.document_calls.append(len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+def test_queries_are_embedded_in_batches_by_the_query_side_client():
+    inner, query_inner = RecordingEmbeddings(), RecordingEmbeddings()
+    embeddings = BatchedEmbeddings(inner, max_concurrency=1, query_embeddings=query_inner)
+    titles = [f"Section {i}" for i in range(60)]
+
+    vectors = embeddings.embed_queries(titles)
+
+    assert vectors == HashEmbeddings().embed_documents(titles)
+    assert query_inner.document_calls == [50, 10]
+    assert inner.document_calls == [] and inner.query_calls == 0 and query_inner.query_calls == 0
+
+
+def test_nvidia_client_gets_a_query_side_model(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BASE_URL", None)
+    monkeypatch.setattr(settings, "NVIDIA_API_KEY", "nvapi-test")
+    client = create_embedding_client()
+    assert client.embeddings.model_type is None
+    assert client.query_embeddings.model_type == "query"
+    assert client.query_embeddings.model == client.embeddings.model
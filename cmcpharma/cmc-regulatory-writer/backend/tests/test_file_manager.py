@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.services import blob_store
+from app.services.blob_store import BLOB_DIR_NAME
+from app.services.file_manager import UPLOAD_DIR, FileManager, FileTooLargeError
+
+from conftest import write_document
+
+
+@pytest.fixture(autouse=True)
+def fresh_blob_store(monkeypatch):
+    # The store is cached under a relative root; each test works in its own directory
+    monkeypatch.setattr(blob_store, "_blob_store", None)
+
+
+def _blobs(root):
+    return [name for _, _, names in os.walk(os.path.join(root, BLOB_DIR_NAME)) for name in names]
+
+
+def _upload(file_manager, name, data, max_bytes=None):
+    upload = UploadFile(io.BytesIO(data), filename=name)
+    return asyncio.run(file_manager.save_file(upload, max_bytes=max_bytes))
+
+
+def test_save_file_streams_hashes_and_enforces_the_size_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("app.services.file_manager.UPLOAD_CHUNK_SIZE", 1000)
+    file_manager = FileManager("session")
+    data = os.urandom(4500)
+
+    _upload(file_manager, "spec.pdf", data)
+
+    [record] = file_manager.get_upload_records()
+    assert (record.name, record.size, record.sha256) == ("spec.pdf", 4500, hashlib.sha256(data).hexdigest())
+    with open(os.path.join(UPLOAD_DIR, "session", "spec.pdf"), "rb") as f:
+        assert f.read() == data
+
+    with pytest.raises(FileTooLargeError):
+        _upload(file_manager, "large.pdf", data, max_bytes=4000)
+    assert [record.name for record in file_manager.get_upload_records()] == ["spec.pdf"]
+    assert not os.path.exists(os.path.join(UPLOAD_DIR, "session", "large.pdf"))
+    assert len(_blobs(UPLOAD_DIR)) == 1
+
+
+def test_delete_file_updates_manifest_and_releases_blob(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join(UPLOAD_DIR, "session"))
+    write_document(os.path.join(UPLOAD_DIR, "session"), "spec.txt", 2)
+    file_manager = FileManager("session")
+    assert [record.name for record in file_manager.get_upload_records()] == ["spec.txt"]
+    assert len(_blobs(UPLOAD_DIR)) == 1
+
+    assert file_manager.delete_file("spec.txt")
+
+    assert FileManager("session").get_upload_records() == []
+    assert not os.path.exists(os.path.join(UPLOAD_DIR, "session", "spec.txt"))
+    assert _blobs(UPLOAD_DIR) == []
+    assert not file_manager.delete_file("spec.txt")
+
+
+def test_sessions_share_one_blob_until_the_last_one_deletes_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = b"Certificate of analysis for batch B-2023/001."
+    first, second = FileManager("first"), FileManager("second")
+    _upload(first, "coa.txt", data)
+    _upload(second, "coa.txt", data)
+
+    paths = [manager.get_session_file_paths()[0] for manager in (first, second)]
+    assert os.path.samefile(*paths)
+    assert len(_blobs(UPLOAD_DIR)) == 1
+
+    assert first.delete_file("coa.txt")
+    assert len(_blobs(UPLOAD_DIR)) == 1
+    assert second.delete_file("coa.txt")
+    assert _blobs(UPLOAD_DIR) == []
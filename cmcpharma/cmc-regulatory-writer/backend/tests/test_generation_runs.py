@@ -0,0 +1,67 @@
+import asyncio
+
+from app.models.template import Template, TOCItem
+from app.services import generation_runs as generation_runs_module
+from app.services.generation_runs import GenerationRun, GenerationRunService
+
+TEMPLATE = Template(name="Module 3", toc=[
+    TOCItem(title="Specification", level=1, children=[TOCItem(title="Impurities", level=2)]),
+])
+
+
+def _collect(run, last_event_id):
+    async def scenario():
+        return [event async for event in run.stream(last_event_id)]
+
+    return asyncio.run(scenario())
+
+
+def test_reconnecting_client_resumes_after_its_last_event():
+    run = GenerationRun("session", TEMPLATE)
+    run.publish("section-started", {"index": 1})
+    run.publish("token-delta", {"index": 1, "delta": "Impurities are "})
+    run.publish("token-delta", {"index": 1, "delta": "controlled."})
+    run.status = "completed"
+
+    assert [event.id for event in _collect(run, 0)] == [1, 2, 3]
+    assert [event.data["delta"] for event in _collect(run, 2)] == ["controlled."]
+    assert _collect(run, 3) == []
+    assert run.sections[1].characters == len("Impurities are controlled.")
+
+
+def test_completed_section_replaces_its_token_deltas_in_the_replay():
+    run = GenerationRun("session", TEMPLATE)
+    run.publish("section-started", {"index": 0})
+    run.publish("token-delta", {"index": 0, "delta": "Limits"})
+    run.publish("section-completed", {"index": 0, "seconds": 1.5, "section": {"content": "Limits apply."}})
+    run.status = "completed"
+
+    assert [event.event for event in _collect(run, 0)] == ["section-started", "section-completed"]
+    assert [event.event for event in _collect(run, 1)] == ["section-completed"]
+    assert run.job_status().sections_completed == 1
+
+
+def test_cancelled_job_stops_generation_and_reports_it(monkeypatch):
+    started = []
+
+    async def generate_full_document(session_id, template, on_event=None):
+        on_event("section-started", {"index": 0})
+        started.append(session_id)
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(generation_runs_module, "generate_full_document", generate_full_document)
+
+    async def scenario():
+        service = GenerationRunService()
+        run = service.start("session", TEMPLATE)
+        while not started:
+            await asyncio.sleep(0)
+        await service.cancel(run)
+        return run
+
+    run = asyncio.run(scenario())
+
+    status = run.job_status()
+    assert (status.status, status.sections_completed) == ("cancelled", 0)
+    assert status.finished_at is not None
+    assert [event.event for event in _collect(run, 0)] == ["run-started", "section-started", "cancelled"]
@@ -0,0 +1,36 @@
+import asyncio
+
+from app.models.document import GeneratedSection
+from app.services.generation_service import GenerationService
+
+TITLES = ["Specification", "Impurities", "Stability"]
+
+
+def test_citations_are_numbered_in_toc_order_however_sections_finish(monkeypatch):
+    service = GenerationService()
+    events = []
+
+    async def synthesize_section(section_title, rag_service, session_id="default", document_id=None,
+                                 retrieved_docs=None, on_token=None):
+        index = TITLES.index(section_title)
+        # Later sections finish first
+        await asyncio.sleep(0.01 * (len(TITLES) - index))
+        service.citation_tracker.create_registry(document_id, session_id)
+        for source in retrieved_docs:
+            service.citation_tracker.track_chunk_citation(section_title, {"source": source, "page": 1},
+                                                          document_id=document_id)
+        markers = "".join(f" [{n + 1}]" for n in range(len(retrieved_docs)))
+        return GeneratedSection(title=section_title, content=f"{section_title}{markers}", source_count=len(retrieved_docs))
+
+    monkeypatch.setattr(service, "synthesize_section", synthesize_section)
+    retrieved = [["spec.pdf"], ["impurities.pdf", "spec.pdf"], ["stability.pdf"]]
+
+    sections = asyncio.run(service.synthesize_sections(
+        TITLES, rag_service=None, session_id="session", document_id="toc-order-document",
+        retrieved=retrieved, on_event=lambda event, data: events.append((event, data.get("index")))
+    ))
+
+    assert [section.content for section in sections] == ["Specification [1]", "Impurities [2] [1]", "Stability [3]"]
+    registry = service.citation_tracker.get_registry("toc-order-document")
+    assert [cite.chunk_citation.pdf_name for cite in registry.inline_citations] == ["spec.pdf", "impurities.pdf", "stability.pdf"]
+    assert [index for event, index in events if event == "section-completed"] == [0, 1, 2]
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+from app.services.chunk_dedup import NearDuplicateIndex
+from app.services.rag_service import RAGService
+
+from conftest import HashEmbeddings, write_document
+
+
+def test_snapshot_warm_start_skips_parsing_and_embedding(tmp_path, monkeypatch):
+    path = write_document(tmp_path, "spec.txt", 4, seed=51)
+    index_dir = os.path.join(str(tmp_path), ".rag_index")
+    built = RAGService([path], index_dir=index_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("snapshot was rebuilt")
+
+    monkeypatch.setattr(HashEmbeddings, "embed_documents", fail)
+    monkeypatch.setattr(RAGService, "_ingest", fail)
+    reloaded = RAGService([path], index_dir=index_dir, build=False)
+
+    assert reloaded.is_ready
+    assert reloaded.index.ntotal == built.index.ntotal
+    assert reloaded.chunks.texts() == built.chunks.texts()
+    assert asyncio.run(reloaded.retrieve_relevant_content("tablet dissolution", [], top_k=2))
+
+
+def test_failed_files_are_retried_after_restart(tmp_path):
+    good = write_document(tmp_path, "good.txt", 3)
+    broken = os.path.join(str(tmp_path), "broken.pdf")
+    with open(broken, "wb") as f:
+        f.write(b"not a pdf")
+    index_dir = os.path.join(str(tmp_path), ".rag_index")
+
+    first = RAGService([good, broken], index_dir=index_dir)
+    assert broken in first.file_errors
+
+    # A snapshot recording broken.pdf as indexed would be loaded without retrying it
+    second = RAGService([good, broken], index_dir=index_dir, build=False)
+    assert not second.is_ready
+
+
+def test_extending_reloaded_index_keeps_near_duplicate_index(tmp_path, monkeypatch):
+    first = write_document(tmp_path, "first.txt", 6)
+    # Same paragraphs as first.txt: every chunk is a duplicate
+    repeat = write_document(tmp_path, "repeat.txt", 6)
+    index_dir = os.path.join(str(tmp_path), ".rag_index")
+    RAGService([first], index_dir=index_dir)
+
+    reloaded = RAGService([first], index_dir=index_dir, build=False)
+    assert reloaded._duplicates is not None and reloaded._duplicates.chunk_count == len(reloaded.chunks)
+
+    def rehash(self):
+        raise AssertionError("existing chunks were re-hashed")
+
+    monkeypatch.setattr(NearDuplicateIndex, "__init__", rehash)
+    chunk_count = len(reloaded.chunks)
+    reloaded.add_documents([repeat])
+    assert len(reloaded.chunks) == chunk_count
+    assert reloaded.file_stats[repeat]["duplicate_chunk_count"] == reloaded.file_stats[repeat]["chunk_count"]
+
+
+def test_adding_an_all_duplicate_file_updates_snapshot_and_results(tmp_path):
+    first = write_document(tmp_path, "first.txt", 6)
+    repeat = write_document(tmp_path, "repeat.txt", 6)
+    index_dir = os.path.join(str(tmp_path), ".rag_index")
+    service = RAGService([first], index_dir=index_dir)
+
+    def retrieve_from_repeat():
+        return asyncio.run(service.retrieve_relevant_content("assay stability", [repeat]))
+
+    assert retrieve_from_repeat() == []  # cached for the current index version
+    chunk_count = len(service.chunks)
+    service.add_documents([repeat])
+
+    assert len(service.chunks) == chunk_count
+    results = retrieve_from_repeat()
+    assert results and {result["source"] for result in results} == {"repeat.txt"}
+    assert RAGService([first, repeat], index_dir=index_dir, build=False).is_ready
@@ -0,0 +1,68 @@
+import asyncio
+import os
+
+import pytest
+
+from app.services import ingestion_service as ingestion_service_module
+from app.services.file_manager import UPLOAD_DIR, FileManager
+from app.services.ingestion_service import IngestionService
+from app.services.rag_registry import RAGIndexRegistry
+
+from conftest import write_document
+
+SESSION_ID = "ingestion-test"
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # Uploads live under the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingestion_service_module, "rag_registry", RAGIndexRegistry())
+    session_dir = os.path.join(UPLOAD_DIR, SESSION_ID)
+    os.makedirs(session_dir)
+    write_document(session_dir, "spec.txt", 3)
+    return IngestionService()
+
+
+def test_cancelled_waiter_leaves_ingestion_running(service):
+    async def scenario():
+        service.enqueue(SESSION_ID, "spec.txt")
+        waiter = asyncio.create_task(service.wait_for_session(SESSION_ID))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await service.wait_for_session(SESSION_ID)
+
+    asyncio.run(scenario())
+    assert service.get_file_status(SESSION_ID, "spec.txt").status == "ready"
+
+
+def test_cancelled_ingestion_is_marked_failed(service):
+    async def scenario():
+        job = service.enqueue(SESSION_ID, "spec.txt")
+        task = next(iter(service._tasks[SESSION_ID]))
+        while job.status != "running":
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert service.get_file_status(SESSION_ID, "spec.txt").status == "failed"
+    assert FileManager(SESSION_ID).manifest.get("spec.txt").index_state == "failed"
+
+
+def test_session_status_follows_background_ingestion(service):
+    async def scenario():
+        assert service.get_session_status(SESSION_ID).status == "idle"
+        service.enqueue(SESSION_ID, "spec.txt")
+        status = service.get_session_status(SESSION_ID)
+        ingesting = (status.status, [job.status for job in status.files])
+        await service.wait_for_session(SESSION_ID)
+        return ingesting
+
+    assert asyncio.run(scenario()) == ("ingesting", ["queued"])
+    status = service.get_session_status(SESSION_ID)
+    assert status.status == "ready"
+    assert FileManager(SESSION_ID).manifest.get("spec.txt").index_state == "indexed"
@@ -0,0 +1,52 @@
+import asyncio
+import os
+
+import numpy as np
+
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+from app.services.rag_service import RAGService
+
+from conftest import write_document
+
+TEXTS = [
+    "Water for injection, CAS 7732-18-5, is used as the solvent.",
+    "Impurity-B is controlled at NMT 0.15% by HPLC method AM-0042.",
+    "Tablets are stored below 25 C in HDPE bottles.",
+    "Impurity A and impurity B are reported in the stability tables.",
+]
+
+
+def test_identifiers_are_indexed_whole_and_by_part():
+    assert tokenize("Impurity-B per 3.2.S.4.1") == ["impurity-b", "impurity", "b", "per", "3.2.s.4.1", "3", "2", "s", "4", "1"]
+
+
+def test_search_ranks_identifiers_filters_and_survives_reload(tmp_path):
+    index = LexicalIndex()
+    index.add(TEXTS)
+
+    assert index.search("7732-18-5", k=2) == [0]
+    assert index.search("impurity-b", k=4)[0] == 1
+    allowed = np.array([True, False, True, True])
+    assert 1 not in index.search("impurity b", k=4, allowed=allowed)
+
+    index.save(str(tmp_path))
+    loaded = LexicalIndex.load(str(tmp_path))
+    assert loaded.search("impurity b", k=4) == index.search("impurity b", k=4)
+    loaded.add(["Method AM-0042 is validated."])
+    assert set(loaded.search("am-0042", k=2)) == {1, 4}
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=3) == [1, 3, 2]
+
+
+def test_hybrid_retrieval_finds_an_identifier_embeddings_miss(tmp_path):
+    path = write_document(tmp_path, "spec.txt", 12, seed=3)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n\nResidual solvent limits for batch B-2023/001 are tabulated below.")
+    service = RAGService([path])
+
+    results = asyncio.run(service.retrieve_relevant_content("batch B-2023/001", [], top_k=3))
+
+    assert any("B-2023/001" in result["content"] for result in results)
+    assert os.path.basename(path) == results[0]["source"]
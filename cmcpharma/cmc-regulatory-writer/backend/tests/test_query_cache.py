@@ -0,0 +1,43 @@
+import asyncio
+
+from app.services.query_cache import LRUCache
+from app.services.rag_service import RAGService
+
+from conftest import write_document
+
+
+def test_lru_cache_evicts_the_least_recently_used_entry():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert (cache.stats.hits, cache.stats.misses) == (3, 1)
+    assert len(cache) == 2
+
+
+def test_repeat_queries_skip_embedding_until_the_index_changes(tmp_path, monkeypatch):
+    first = write_document(tmp_path, "first.txt", 4, seed=21)
+    service = RAGService([first])
+    embedded = []
+    embed_queries = service.embeddings.embed_queries
+
+    def counting_embed_queries(texts):
+        embedded.extend(texts)
+        return embed_queries(texts)
+
+    monkeypatch.setattr(service.embeddings, "embed_queries", counting_embed_queries)
+
+    def retrieve():
+        return asyncio.run(service.retrieve_relevant_content("humidity storage", [], top_k=3))
+
+    before = retrieve()
+    assert retrieve() == before
+    assert embedded == ["humidity storage"]
+
+    service.add_documents([write_document(tmp_path, "second.txt", 4, seed=22)])
+    retrieve()
+    assert embedded == ["humidity storage", "humidity storage"]
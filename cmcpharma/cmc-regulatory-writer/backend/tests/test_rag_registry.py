@@ -0,0 +1,156 @@
+import asyncio
+import os
+import threading
+
+from app.services import chat_service as chat_service_module
+from app.services.chat_service import ChatService
+from app.services.file_manager import UPLOAD_DIR, FileManager
+from app.services.rag_registry import ALL_UPLOADS_SCOPE, RAGIndexRegistry
+from app.services.rag_service import RAGService
+
+from conftest import write_document
+
+
+async def _wait_for_ingestion(registry: RAGIndexRegistry) -> None:
+    while registry.building(ALL_UPLOADS_SCOPE) is not None:
+        await asyncio.sleep(0.01)
+
+
+def test_chat_extends_all_uploads_index_on_new_upload(tmp_path, monkeypatch):
+    registry = RAGIndexRegistry()
+    monkeypatch.setattr(chat_service_module, "rag_registry", registry)
+    calls = []
+    original_build, original_add = RAGService.build, RAGService.add_documents
+
+    def build(self):
+        calls.append("build")
+        original_build(self)
+
+    def add_documents(self, new_file_paths):
+        calls.append("add_documents")
+        original_add(self, new_file_paths)
+
+    monkeypatch.setattr(RAGService, "build", build)
+    monkeypatch.setattr(RAGService, "add_documents", add_documents)
+
+    uploads = [write_document(tmp_path, "first.txt", 3)]
+    service = ChatService()
+    monkeypatch.setattr(service, "_get_all_document_files", lambda upload_dir: list(uploads))
+    monkeypatch.setattr(service, "_uploads_version", lambda upload_dir: str(len(uploads)))
+
+    async def scenario():
+        assert await service._ensure_rag_initialized()
+        await _wait_for_ingestion(registry)
+        first = service.rag_service
+
+        uploads.append(write_document(tmp_path, "second.txt", 3, seed=1))
+        assert await service._ensure_rag_initialized()
+        await _wait_for_ingestion(registry)
+        return first, service.rag_service
+
+    first, second = asyncio.run(scenario())
+
+    assert calls == ["build", "add_documents"]
+    assert second is first
+    assert set(second.file_paths) == set(uploads)
+    assert len(registry) == 1
+
+
+def test_chat_keeps_its_lease_while_uploads_are_unchanged(tmp_path, monkeypatch):
+    registry = RAGIndexRegistry()
+    monkeypatch.setattr(chat_service_module, "rag_registry", registry)
+    uploads = [write_document(tmp_path, "first.txt", 3)]
+    scans = []
+    service = ChatService()
+    monkeypatch.setattr(service, "_get_all_document_files", lambda upload_dir: scans.append(upload_dir) or list(uploads))
+    monkeypatch.setattr(service, "_uploads_version", lambda upload_dir: str(len(uploads)))
+
+    async def scenario():
+        for _ in range(3):
+            assert await service._ensure_rag_initialized()
+        await _wait_for_ingestion(registry)
+
+    asyncio.run(scenario())
+
+    assert len(scans) == 1
+    assert [entry.refcount for entry in registry._entries.values()] == [1]
+
+
+def test_verification_reports_documents_still_being_indexed(tmp_path, monkeypatch):
+    registry = RAGIndexRegistry()
+    monkeypatch.setattr(chat_service_module, "rag_registry", registry)
+    release_build = threading.Event()
+    original_build = RAGService.build
+
+    def build(self):
+        release_build.wait()
+        original_build(self)
+
+    monkeypatch.setattr(RAGService, "build", build)
+    uploads = [write_document(tmp_path, "first.txt", 3)]
+    service = ChatService()
+    monkeypatch.setattr(service, "_get_all_document_files", lambda upload_dir: list(uploads))
+    monkeypatch.setattr(service, "_uploads_version", lambda upload_dir: "1")
+
+    async def scenario():
+        try:
+            return await service._handle_data_verification_query("verify the assay limit", session=None)
+        finally:
+            release_build.set()
+            await _wait_for_ingestion(registry)
+
+    reply = asyncio.run(scenario())
+
+    assert "still being indexed" in reply
+
+
+def test_warm_indexes_are_shared_and_idle_ones_evicted_over_budget(tmp_path):
+    registry = RAGIndexRegistry(memory_budget_bytes=1)
+    first = [write_document(tmp_path, "first.txt", 3)]
+    second = [write_document(tmp_path, "second.txt", 3, seed=1)]
+
+    async def scenario():
+        service = await registry.acquire("a", first)
+        assert await registry.acquire("a", first) is service
+        registry.release(service)
+        # Still held once, so over budget but kept
+        assert len(registry) == 1
+        registry.release(service)
+        held = await registry.acquire("b", second)
+        return held
+
+    held = asyncio.run(scenario())
+
+    assert (registry.stats.hits, registry.stats.misses, registry.stats.evictions) == (1, 2, 1)
+    assert [entry.service for entry in registry._entries.values()] == [held]
+
+
+def test_invalidate_drops_idle_indexes_and_marks_held_ones_stale(tmp_path):
+    registry = RAGIndexRegistry()
+    files = [write_document(tmp_path, "first.txt", 3)]
+
+    async def scenario():
+        held = await registry.acquire("held", files)
+        idle = await registry.acquire("idle", files)
+        registry.release(idle)
+        registry.invalidate("held")
+        registry.invalidate("idle")
+        assert len(registry) == 1
+        registry.release(held)
+
+    asyncio.run(scenario())
+    assert len(registry) == 0
+
+
+def test_uploads_version_follows_session_manifests(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = ChatService()
+    session_dir = os.path.join(UPLOAD_DIR, "session")
+    os.makedirs(session_dir)
+    write_document(session_dir, "first.txt", 2)
+    file_manager = FileManager("session")
+    before = service._uploads_version(UPLOAD_DIR)
+    assert service._uploads_version(UPLOAD_DIR) == before
+
+    file_manager.delete_file("first.txt")
+    assert service._uploads_version(UPLOAD_DIR) != before
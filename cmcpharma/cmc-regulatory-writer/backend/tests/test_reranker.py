@@ -0,0 +1,19 @@
+import numpy as np
+
+from app.services.reranker import cosine_scores, keyword_boost, rerank
+
+
+def test_mmr_passes_over_near_duplicates_of_earlier_picks():
+    vectors = np.array([[1.0, 0.0], [0.99, 0.14], [0.6, 0.8]], dtype=np.float32)
+    relevance, candidates = cosine_scores(np.array([1.0, 0.0], dtype=np.float32), vectors)
+
+    assert rerank(relevance, candidates, k=2, lambda_mult=1.0) == [0, 1]
+    assert rerank(relevance, candidates, k=2, lambda_mult=0.3) == [0, 2]
+    assert rerank(relevance, candidates, k=5, lambda_mult=0.3) == [0, 2, 1]
+    assert rerank(relevance[:0], candidates[:0], k=3, lambda_mult=0.3) == []
+
+
+def test_keyword_boost_decays_with_keyword_rank():
+    boost = keyword_boost([7, 3, 9], keyword_ids=[3, 9], weight=0.1)
+
+    assert np.allclose(boost, [0.0, 0.1, 0.05])
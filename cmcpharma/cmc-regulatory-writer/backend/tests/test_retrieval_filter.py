@@ -0,0 +1,28 @@
+import asyncio
+
+from app.services.rag_service import RAGService, _with_files
+from app.services.retrieval_filter import RetrievalFilter
+
+from conftest import write_document
+
+
+def test_context_files_narrow_the_callers_file_filter():
+    filters = RetrievalFilter.create(file_paths=["a.txt", "b.txt"], page_range=(1, 3))
+    narrowed = _with_files(filters, ["/uploads/b.txt", "/uploads/c.txt"])
+    assert narrowed.file_names == frozenset({"b.txt"})
+    assert narrowed.page_range == (1, 3)
+    assert _with_files(None, ["c.txt"]).file_names == frozenset({"c.txt"})
+    assert _with_files(filters, []) is filters
+
+
+def test_disjoint_file_filters_retrieve_nothing(tmp_path):
+    first = write_document(tmp_path, "first.txt", 3)
+    second = write_document(tmp_path, "second.txt", 3, seed=1)
+    service = RAGService([first, second])
+    filters = RetrievalFilter.create(file_paths=[first])
+
+    async def retrieve(file_paths):
+        return await service.retrieve_relevant_content("assay stability", file_paths, filters=filters)
+
+    assert {result["source"] for result in asyncio.run(retrieve([first, second]))} == {"first.txt"}
+    assert asyncio.run(retrieve([second])) == []
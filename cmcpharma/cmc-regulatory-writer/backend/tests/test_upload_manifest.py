@@ -0,0 +1,44 @@
+from app.models.file import UploadRecord
+from app.services import upload_manifest
+from app.services.upload_manifest import SessionManifest
+
+
+def _record(name, sha256, size=100):
+    return UploadRecord(name=name, sha256=sha256, size=size, mime_type="application/pdf")
+
+
+def test_last_line_wins_and_tombstones_remove(tmp_path):
+    manifest = SessionManifest(str(tmp_path))
+    manifest.upsert(_record("spec.pdf", "a"))
+    manifest.upsert(_record("coa.pdf", "b"))
+    manifest.update("spec.pdf", index_state="indexed", chunk_count=12)
+    manifest.remove("coa.pdf")
+    with open(manifest.path, "a", encoding="utf-8") as f:
+        f.write('{"name": "torn"')
+
+    [record] = SessionManifest(str(tmp_path)).records()
+    assert (record.name, record.index_state, record.chunk_count) == ("spec.pdf", "indexed", 12)
+    assert manifest.update("missing.pdf", index_state="failed") is None
+
+
+def test_version_tracks_content_not_index_state(tmp_path):
+    manifest = SessionManifest(str(tmp_path))
+    manifest.upsert(_record("spec.pdf", "a"))
+    version = manifest.version
+
+    manifest.update("spec.pdf", index_state="indexed")
+    assert manifest.version == version
+    manifest.upsert(_record("spec.pdf", "c"))
+    assert manifest.version != version
+
+
+def test_log_is_compacted_once_it_outgrows_the_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_manifest, "COMPACT_AFTER_LINES", 10)
+    manifest = SessionManifest(str(tmp_path))
+    manifest.upsert(_record("spec.pdf", "a"))
+    for page_count in range(20):
+        manifest.update("spec.pdf", page_count=page_count)
+
+    with open(manifest.path, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) <= 10
+    assert manifest.get("spec.pdf").page_count == 19
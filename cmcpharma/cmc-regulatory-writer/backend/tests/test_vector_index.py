@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import vector_index
+from app.services.rag_service import RAGService
+
+from conftest import write_document
+
+
+def test_auto_backend_follows_corpus_size(monkeypatch):
+    monkeypatch.setattr(settings, "RAG_INDEX_BACKEND", "auto")
+    monkeypatch.setattr(settings, "RAG_HNSW_MIN_VECTORS", 20_000)
+    monkeypatch.setattr(settings, "RAG_IVFPQ_MIN_VECTORS", 500_000)
+
+    assert vector_index.choose_backend(1_000) == vector_index.FLAT
+    assert vector_index.choose_backend(20_000) == vector_index.HNSW
+    assert vector_index.choose_backend(500_000) == vector_index.IVFPQ
+    # Too few vectors to train PQ codebooks
+    assert vector_index.choose_backend(100, requested=vector_index.IVFPQ) == vector_index.FLAT
+
+
+@pytest.mark.parametrize("backend", [vector_index.FLAT, vector_index.HNSW])
+def test_filtered_search_only_returns_allowed_ids(backend):
+    vectors = np.random.default_rng(0).standard_normal((500, 32)).astype(np.float32)
+    index = vector_index.build_index(vectors, backend)
+    assert vector_index.backend_of(index) == backend
+    allowed = np.zeros(500, dtype=bool)
+    allowed[[3, 250, 499]] = True
+
+    ids = vector_index.search(index, vectors[:2], k=5, allowed=allowed)
+
+    assert all(set(row) == {3, 250, 499, -1} for row in ids)
+    assert vector_index.search(index, vectors[3:4], k=1)[0][0] == 3
+
+
+def test_add_documents_to_reloaded_ivfpq_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RAG_INDEX_BACKEND", vector_index.IVFPQ)
+    # Enough vectors to train 256-centroid codebooks, without the production margin
+    monkeypatch.setattr(vector_index, "IVFPQ_MIN_TRAIN", 300)
+    first = write_document(tmp_path, "first.txt", 400)
+    second = write_document(tmp_path, "second.txt", 5, seed=1)
+    index_dir = os.path.join(str(tmp_path), ".rag_index")
+
+    built = RAGService([first], index_dir=index_dir)
+    assert vector_index.backend_of(built.index) == vector_index.IVFPQ
+
+    reloaded = RAGService([first], index_dir=index_dir, build=False)
+    assert reloaded.is_ready
+    total = reloaded.index.ntotal
+    reloaded.add_documents([second])
+    assert second not in reloaded.file_errors
+    assert reloaded.index.ntotal > total
+    assert reloaded.get_relevant_chunks("stability humidity tablet")
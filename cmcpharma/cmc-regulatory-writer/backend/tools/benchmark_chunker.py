@@ -0,0 +1,81 @@
+"""
+Chunking benchmark: app.utils.chunker vs langchain's RecursiveCharacterTextSplitter.
+
+Runs on the pages of real files when given, otherwise on a synthetic dossier:
+
+    python tools/benchmark_chunker.py --pages 5000
+    python tools/benchmark_chunker.py path/to/stability_report.pdf
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.utils.chunker import chunk_text
+
+
+def synthetic_pages(count: int):
+    paragraph = (
+        "The drug substance is stored at 25C/60%RH and tested for related substances by HPLC. "
+        "Results for all batches remained within the proposed specification limits. "
+    ) * 4
+    pages = []
+    for i in range(count):
+        section = f"3.2.S.7.{i % 3 + 1} Stability Data Batch {i}\n\n"
+        pages.append(section + "\n\n".join([paragraph] * 5))
+    return pages
+
+
+def measure(label: str, run, total_chars: int):
+    started = time.perf_counter()
+    chunks = run()
+    elapsed = time.perf_counter() - started
+    del chunks
+
+    # Separate run for memory: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    chunks = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:>10} {len(chunks):>9} {elapsed:>9.2f} "
+        f"{total_chars / elapsed / 1e6:>9.2f} {peak / 1024 / 1024:>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="Documents to chunk (parsed via the ingestion loader)")
+    parser.add_argument("--pages", type=int, default=5000, help="Synthetic pages when no files are given")
+    parser.add_argument("--chunk-size", type=int, default=600)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.files:
+        from app.services.document_loader import load_documents
+        pages = [page for parsed in load_documents(args.files) for page in parsed.pages]
+    else:
+        pages = [Document(page_content=text, metadata={"source": "dossier.pdf", "page": i})
+                 for i, text in enumerate(synthetic_pages(args.pages))]
+    total_chars = sum(len(page.page_content) for page in pages)
+    print(f"{len(pages)} pages, {total_chars / 1e6:.1f}M characters")
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    def run_offsets():
+        return [span for page in pages for span in chunk_text(page.page_content, args.chunk_size, args.chunk_overlap)]
+
+    print(f"{'chunker':>10} {'chunks':>9} {'seconds':>9} {'MB/sec':>9} {'peak MB':>10}")
+    measure("recursive", lambda: splitter.split_documents(pages), total_chars)
+    measure("offsets", run_offsets, total_chars)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Embedding throughput benchmark for BatchedEmbeddings.
+
+Start the stand-in server first (or point --base-url at a real endpoint):
+
+    python tools/embedding_server.py --port 8010 --latency-ms 40
+    python tools/benchmark_embeddings.py --base-url http://localhost:8010/v1 --chunks 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.embedding_client import BatchedEmbeddings, OpenAICompatibleEmbeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8010/v1")
+    parser.add_argument("--model", default="nvidia/nv-embedqa-e5-v5")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-chars", type=int, default=600)
+    parser.add_argument("--batch-sizes", default="16,64,128")
+    parser.add_argument("--concurrency", default="1,4,8")
+    args = parser.parse_args()
+
+    filler = "The drug substance is stored at 25C/60%RH and tested for related substances by HPLC. "
+    texts = [f"chunk {i}: " + (filler * (args.chunk_chars // len(filler) + 1))[:args.chunk_chars] for i in range(args.chunks)]
+    client = OpenAICompatibleEmbeddings(args.base_url, args.model, api_key=os.getenv("NVIDIA_API_KEY"))
+
+    print(f"{'batch':>6} {'conc':>5} {'seconds':>9} {'chunks/sec':>11}")
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            embeddings = BatchedEmbeddings(client, batch_size=batch_size, max_concurrency=concurrency)
+            started = time.perf_counter()
+            embeddings.embed_documents(texts)
+            elapsed = time.perf_counter() - started
+            print(f"{batch_size:>6} {concurrency:>5} {elapsed:>9.2f} {args.chunks / elapsed:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Vector index benchmark: recall@k against exact search, query latency and bytes
+per vector for each backend in app.services.vector_index.
+
+Uses clustered synthetic vectors shaped like chunk embeddings by default:
+
+    python tools/benchmark_index.py --vectors 100000 --dim 1024
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_index import BACKENDS, FLAT, build_index
+
+
+def clustered_vectors(count: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors grouped by topic and by section within a topic, like embeddings of many documents"""
+    # Fixed seeds: corpus and queries share the same topics and sections
+    topics = np.random.default_rng(100).standard_normal((clusters, dim)).astype(np.float32)
+    sections = np.random.default_rng(101).standard_normal((clusters * 10, dim)).astype(np.float32)
+    section = rng.integers(0, len(sections), count)
+    vectors = (
+        topics[section % clusters] + 0.5 * sections[section]
+        + 0.35 * rng.standard_normal((count, dim)).astype(np.float32)
+    )
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.vectors, args.dim, args.clusters, rng)
+    queries = clustered_vectors(args.queries, args.dim, args.clusters, np.random.default_rng(1))
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+
+    exact = build_index(vectors, FLAT)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{'backend':>8} {'build s':>8} {'recall@k':>9} {'mean ms':>8} {'p95 ms':>8} {'bytes/vec':>10}")
+    for backend in args.backends.split(","):
+        started = time.perf_counter()
+        index = build_index(vectors, backend)
+        build_seconds = time.perf_counter() - started
+
+        # One query at a time, as retrieval issues them
+        latencies = []
+        found = np.empty_like(truth)
+        for i in range(len(queries)):
+            started = time.perf_counter()
+            _, ids = index.search(queries[i:i + 1], args.k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found[i] = ids[0]
+
+        recall = np.mean([len(set(found[i]) & set(truth[i])) / args.k for i in range(len(queries))])
+        size = faiss.serialize_index(index).nbytes / index.ntotal
+        print(
+            f"{backend:>8} {build_seconds:>8.1f} {recall:>9.3f} {np.mean(latencies):>8.3f} "
+            f"{np.percentile(latencies, 95):>8.3f} {size:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
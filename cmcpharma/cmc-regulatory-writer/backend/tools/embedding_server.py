@@ -0,0 +1,68 @@
+"""
+Local stand-in for an OpenAI/NVIDIA-compatible embeddings endpoint.
+
+Returns deterministic pseudo-random unit vectors derived from a hash of each
+input, with optional artificial latency and failure rate, so embedding
+throughput, batching and retries can be exercised offline.
+
+    python tools/embedding_server.py --port 8010 --latency-ms 40
+    EMBEDDING_BASE_URL=http://localhost:8010/v1 python start_server.py
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+from typing import List, Optional, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+app = FastAPI(title="Stand-in Embedding Server")
+
+config = {"dim": 1024, "latency_ms": 0.0, "failure_rate": 0.0}
+
+
+class EmbeddingRequest(BaseModel):
+    input: Union[str, List[str]]
+    model: str = "stand-in"
+    input_type: Optional[str] = None
+    encoding_format: Optional[str] = "float"
+
+
+def embed_text(text: str, dim: int) -> List[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@app.post("/v1/embeddings")
+async def create_embeddings(request: EmbeddingRequest):
+    if random.random() < config["failure_rate"]:
+        raise HTTPException(status_code=503, detail="Injected transient failure")
+    if config["latency_ms"]:
+        await asyncio.sleep(config["latency_ms"] / 1000)
+
+    texts = [request.input] if isinstance(request.input, str) else request.input
+    return {
+        "object": "list",
+        "model": request.model,
+        "data": [
+            {"object": "embedding", "index": i, "embedding": embed_text(text, config["dim"])}
+            for i, text in enumerate(texts)
+        ],
+        "usage": {"prompt_tokens": sum(len(text.split()) for text in texts), "total_tokens": 0}
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial per-request latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+    config.update(dim=args.dim, latency_ms=args.latency_ms, failure_rate=args.failure_rate)
+    print(f"🚀 Stand-in embedding server on port {args.port} (dim={args.dim})")
+    uvicorn.run(app, host="0.0.0.0", port=args.port, log_level="warning")